@@ -14,6 +14,16 @@ load_dotenv()
 # Import models
 from models.database import Base
 from models.story import Story, StoryMetrics
+from models.digest import Digest
+from models.rescore_run import RescoreRun
+from models.source_stats import SourceStats
+from models.engagement_rollup import StoryMetricsHourly, EventLogOffset
+from models.subscriber import Subscriber, EmailSend
+from models.sync_state import SourceSyncState
+from models.content_job import ContentJob
+from models.story_content import StoryContent
+from models.story_embedding import StoryEmbedding
+from models.story_category import StoryCategory
 
 # this is the Alembic Config object
 config = context.config
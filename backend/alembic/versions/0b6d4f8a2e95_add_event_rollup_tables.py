@@ -0,0 +1,44 @@
+"""Add story_metrics_hourly and event_log_offsets tables
+
+Revision ID: 0b6d4f8a2e95
+Revises: f58c3a0e7d21
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6d4f8a2e95'
+down_revision = 'f58c3a0e7d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('story_metrics_hourly',
+        sa.Column('story_id', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('email_opens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('link_clicks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_spent', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('feedback_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('feedback_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
+        sa.PrimaryKeyConstraint('story_id', 'hour')
+    )
+    op.create_index(op.f('ix_story_metrics_hourly_hour'), 'story_metrics_hourly', ['hour'], unique=False)
+
+    op.create_table('event_log_offsets',
+        sa.Column('segment', sa.String(), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('segment')
+    )
+
+
+def downgrade():
+    op.drop_table('event_log_offsets')
+    op.drop_index(op.f('ix_story_metrics_hourly_hour'), table_name='story_metrics_hourly')
+    op.drop_table('story_metrics_hourly')
@@ -0,0 +1,28 @@
+"""Add near-duplicate cluster_id to stories
+
+Revision ID: 1c8e5a7f3b20
+Revises: 0b6d4f8a2e95
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c8e5a7f3b20'
+down_revision = '0b6d4f8a2e95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stories', sa.Column('cluster_id', sa.Integer(), nullable=True))
+    # Existing stories start as singleton clusters; new ones are clustered at ingest
+    op.execute("UPDATE stories SET cluster_id = id")
+    op.create_index(op.f('ix_stories_cluster_id'), 'stories', ['cluster_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_stories_cluster_id'), table_name='stories')
+    op.drop_column('stories', 'cluster_id')
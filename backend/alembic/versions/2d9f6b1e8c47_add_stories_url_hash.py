@@ -0,0 +1,106 @@
+"""Add canonical url_hash to stories
+
+Revision ID: 2d9f6b1e8c47
+Revises: 1c8e5a7f3b20
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d9f6b1e8c47'
+down_revision = '1c8e5a7f3b20'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# URL canonicalization as of this revision, frozen here so that later changes
+# to services.url_service cannot change what this migration writes.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "cmpid", "ncid", "ocid", "sr_share", "guccounter",
+}
+TRACKING_PREFIXES = ("utm_",)
+AMP_PARAMS = {"amp": None, "outputtype": "amp"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+AMP_PATH = re.compile(r"(/amp/?$|^/amp(?=/)|\.amp$|\.amp(?=\.html$))", re.IGNORECASE)
+
+
+def _canonicalize_url(url):
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    path = AMP_PATH.sub("", parts.path) or "/"
+    path = re.sub(r"/{2,}", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_noise_param(key, value)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def _is_noise_param(key, value):
+    key = key.lower()
+    if key in AMP_PARAMS:
+        return AMP_PARAMS[key] in (None, value.lower())
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def _url_hash(url):
+    canonical = _canonicalize_url(url) if url else None
+    if canonical is None:
+        return None
+    digest = hashlib.blake2b(canonical.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def upgrade():
+    op.add_column('stories', sa.Column('url_hash', sa.BigInteger(), nullable=True))
+
+    # Backfill in id order. Stories whose canonical URL repeats an earlier one (or
+    # whose URL can't be parsed) keep a NULL hash rather than being deleted; new
+    # duplicates are rejected at ingest.
+    conn = op.get_bind()
+    seen = set()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, url FROM stories WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for story_id, url in rows:
+            key = _url_hash(url)
+            if key is not None and key not in seen:
+                seen.add(key)
+                updates.append({"story_id": story_id, "url_hash": key})
+        if updates:
+            conn.execute(sa.text("UPDATE stories SET url_hash = :url_hash WHERE id = :story_id"), updates)
+        last_id = rows[-1][0]
+
+    op.create_index(op.f('ix_stories_url_hash'), 'stories', ['url_hash'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_stories_url_hash'), table_name='stories')
+    op.drop_column('stories', 'url_hash')
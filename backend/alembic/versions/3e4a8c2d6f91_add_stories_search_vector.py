@@ -0,0 +1,34 @@
+"""Add full-text search_vector to stories
+
+Revision ID: 3e4a8c2d6f91
+Revises: 2d9f6b1e8c47
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e4a8c2d6f91'
+down_revision = '2d9f6b1e8c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres-only generated column, kept out of the Story model so that
+    # create_all on SQLite still works; services/search_service.py queries it by name.
+    op.execute("""
+        ALTER TABLE stories ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_stories_search_vector ON stories USING GIN (search_vector)")
+
+
+def downgrade():
+    op.execute("DROP INDEX ix_stories_search_vector")
+    op.drop_column('stories', 'search_vector')
@@ -0,0 +1,46 @@
+"""Keep only the stories indexes the queries use
+
+Revision ID: 4f1b7d3a9e52
+Revises: 3e4a8c2d6f91
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1b7d3a9e52'
+down_revision = '3e4a8c2d6f91'
+branch_labels = None
+depends_on = None
+
+# Indexes the model used to declare but no query needs. Databases built with
+# create_all may have them even though earlier migrations never created them.
+UNUSED_INDEXES = (
+    'ix_stories_id',                 # duplicates the primary key
+    'ix_stories_url',                # superseded by the unique ix_stories_url_hash
+    'ix_stories_title',              # free text; searched through search_vector
+    'ix_stories_description',        # free text; searched through search_vector
+    'ix_stories_source',             # covered by ix_stories_source_published_at
+    'ix_stories_interesting_score',  # filtered inside ix_stories_published_at_id
+    'ix_stories_cluster_id',         # clusters are resolved in memory
+)
+
+
+def upgrade():
+    for name in UNUSED_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.create_index(
+        'ix_stories_source_published_at',
+        'stories',
+        ['source', sa.text('published_at DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_stories_source_published_at', table_name='stories')
+    op.create_index(op.f('ix_stories_cluster_id'), 'stories', ['cluster_id'], unique=False)
+    op.create_index(op.f('ix_stories_url'), 'stories', ['url'], unique=True)
+    op.create_index(op.f('ix_stories_id'), 'stories', ['id'], unique=False)
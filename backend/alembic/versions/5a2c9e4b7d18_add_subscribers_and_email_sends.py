@@ -0,0 +1,47 @@
+"""Add subscribers and email_sends tables
+
+Revision ID: 5a2c9e4b7d18
+Revises: 4f1b7d3a9e52
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a2c9e4b7d18'
+down_revision = '4f1b7d3a9e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('subscribers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('unsubscribe_token', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table('email_sends',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('digest_id', sa.Integer(), nullable=False),
+        sa.Column('subscriber_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['digest_id'], ['digests.id'], ),
+        sa.ForeignKeyConstraint(['subscriber_id'], ['subscribers.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('digest_id', 'subscriber_id', name='uq_email_sends_digest_subscriber')
+    )
+
+
+def downgrade():
+    op.drop_table('email_sends')
+    op.drop_table('subscribers')
@@ -0,0 +1,36 @@
+"""Add unique index on stories.url
+
+Revision ID: 5f2d8c1a9e47
+Revises: 3b07a7a04c5a
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2d8c1a9e47'
+down_revision = '3b07a7a04c5a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicate URLs (keeping the oldest story) so the unique index can be built
+    op.execute("""
+        DELETE FROM story_metrics
+        WHERE story_id IN (
+            SELECT id FROM stories s
+            WHERE EXISTS (SELECT 1 FROM stories o WHERE o.url = s.url AND o.id < s.id)
+        )
+    """)
+    op.execute("""
+        DELETE FROM stories s
+        WHERE EXISTS (SELECT 1 FROM stories o WHERE o.url = s.url AND o.id < s.id)
+    """)
+    op.create_index(op.f('ix_stories_url'), 'stories', ['url'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_stories_url'), table_name='stories')
@@ -0,0 +1,33 @@
+"""Add source_sync_state table
+
+Revision ID: 6c3d0a5f8b21
+Revises: 5a2c9e4b7d18
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c3d0a5f8b21'
+down_revision = '5a2c9e4b7d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('source_sync_state',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('cursor', sa.String(), nullable=True),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade():
+    op.drop_table('source_sync_state')
@@ -0,0 +1,42 @@
+"""Add content_jobs queue for article text extraction
+
+Revision ID: 7e5b2f9c4a63
+Revises: 6c3d0a5f8b21
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e5b2f9c4a63'
+down_revision = '6c3d0a5f8b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('content_jobs',
+        sa.Column('story_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worker', sa.String(length=64), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
+        sa.PrimaryKeyConstraint('story_id')
+    )
+    op.create_index('ix_content_jobs_status_lease', 'content_jobs', ['status', 'lease_until'])
+
+    # Queue every story stored before the extractor existed
+    op.execute(
+        "INSERT INTO content_jobs (story_id, status, attempts) "
+        "SELECT id, 'pending', 0 FROM stories WHERE content IS NULL"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_content_jobs_status_lease', table_name='content_jobs')
+    op.drop_table('content_jobs')
@@ -0,0 +1,31 @@
+"""Add composite index for keyset pagination on stories
+
+Revision ID: 8a4e6b2c7d13
+Revises: 5f2d8c1a9e47
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6b2c7d13'
+down_revision = '5f2d8c1a9e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # published_at leads so the index returns rows already in page order;
+    # interesting_score is carried along so the min_score filter is checked from the index.
+    op.create_index(
+        'ix_stories_published_at_id',
+        'stories',
+        [sa.text('published_at DESC'), sa.text('id DESC'), 'interesting_score'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_stories_published_at_id', table_name='stories')
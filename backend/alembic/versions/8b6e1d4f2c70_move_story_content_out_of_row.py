@@ -0,0 +1,126 @@
+"""Move article content to a compressed story_content table
+
+Revision ID: 8b6e1d4f2c70
+Revises: 7e5b2f9c4a63
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b6e1d4f2c70'
+down_revision = '7e5b2f9c4a63'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Dictionary 1 and the codec of models.story_content as of this revision, frozen
+# here so later changes to the app cannot change what this migration reads or writes.
+DICTIONARY_ID = 1
+DICTIONARY = (
+    "according to the company, which declined to comment on the report. The startup, founded in "
+    "said in a statement on Monday. said in a statement on Tuesday. said in a statement on Wednesday. "
+    "said in a statement on Thursday. said in a statement on Friday. told reporters that the "
+    "chief executive officer, chief technology officer, co-founder and CEO, researchers at the "
+    "university, according to people familiar with the matter, did not immediately respond to a "
+    "request for comment. The announcement comes as investors, analysts said the deal, shares rose "
+    "percent in early trading, billion in funding, million in a Series A round led by venture capital "
+    "firms, valuation of, revenue growth, quarterly earnings, data center, cloud computing, "
+    "semiconductor, chips, GPUs, Nvidia, Microsoft, Google, Amazon, Meta, Apple, OpenAI, Anthropic, "
+    "regulators, the European Union, the AI Act, policy, privacy, copyright lawsuit, safety, "
+    "open-source, open source model, large language model, large language models, LLMs, generative AI, "
+    "artificial intelligence, machine learning, deep learning, neural network, training data, "
+    "inference, benchmark, benchmarks, reasoning, agents, chatbot, assistant, automation, robotics, "
+    "computer vision, natural language processing, fine-tuning, parameters, compute, enterprise "
+    "customers, businesses, small businesses, adoption, productivity, workers, jobs, the technology, "
+    "the model, the models, the company said, the company's, the industry, the market, the world, "
+    "this year, last year, next year, in the past, in recent years, for example, such as, as well as, "
+    "more than, less than, at least, one of the, some of the, many of the, most of the, part of the, "
+    "because of, in order to, to be, will be, would be, could be, can be, has been, have been, had been, "
+    "it is, it was, that is, there is, there are, which is, who are, they are, we are, you can, "
+    "however, also, because, while, which, their, there, about, after, before, between, through, "
+    "into, over, under, other, these, those, people, new, not, but, from, with, have, has, this, "
+    "that, for, are, was, were, its, it's, on the, in the, of the, to the, and the, for the, at the, "
+    "by the, with the, from the, is a, is the, of a, in a, to a, and a, . The , the "
+).encode()
+COMPRESSION_LEVEL = 6
+
+story_content = sa.table('story_content',
+    sa.column('story_id', sa.Integer),
+    sa.column('dictionary', sa.SmallInteger),
+    sa.column('length', sa.Integer),
+    sa.column('body', sa.LargeBinary),
+)
+
+
+def _compress(text):
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=DICTIONARY)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def _decompress(body, dictionary):
+    if dictionary == DICTIONARY_ID:
+        decompressor = zlib.decompressobj(zdict=DICTIONARY)
+    elif dictionary == 0:
+        decompressor = zlib.decompressobj()
+    else:
+        raise ValueError(f"story_content uses dictionary {dictionary}, unknown to this revision")
+    return (decompressor.decompress(body) + decompressor.flush()).decode()
+
+
+def upgrade():
+    op.create_table('story_content',
+        sa.Column('story_id', sa.Integer(), nullable=False),
+        sa.Column('dictionary', sa.SmallInteger(), nullable=False),
+        sa.Column('length', sa.Integer(), nullable=False),
+        sa.Column('body', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
+        sa.PrimaryKeyConstraint('story_id')
+    )
+
+    # Compression happens in Python, so copy in id-ordered batches
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, content FROM stories WHERE content IS NOT NULL AND id > :last_id "
+                    "ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        op.bulk_insert(story_content, [{
+            "story_id": story_id,
+            "dictionary": DICTIONARY_ID,
+            "length": len(content),
+            "body": _compress(content),
+        } for story_id, content in rows])
+        last_id = rows[-1][0]
+
+    op.drop_column('stories', 'content')
+
+
+def downgrade():
+    op.add_column('stories', sa.Column('content', sa.String(), nullable=True))
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT story_id, dictionary, body FROM story_content WHERE story_id > :last_id "
+                    "ORDER BY story_id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text("UPDATE stories SET content = :content WHERE id = :id"),
+            [{"id": story_id, "content": _decompress(body, dictionary)} for story_id, dictionary, body in rows]
+        )
+        last_id = rows[-1][0]
+    op.drop_table('story_content')
@@ -0,0 +1,31 @@
+"""Add story_embeddings table
+
+Revision ID: 9d4a6c2e8f15
+Revises: 8b6e1d4f2c70
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4a6c2e8f15'
+down_revision = '8b6e1d4f2c70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing stories are embedded by the next full rescore (scripts/rescore_stories.py)
+    op.create_table('story_embeddings',
+        sa.Column('story_id', sa.Integer(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
+        sa.PrimaryKeyConstraint('story_id')
+    )
+
+
+def downgrade():
+    op.drop_table('story_embeddings')
@@ -0,0 +1,34 @@
+"""Add story_categories table
+
+Revision ID: a6f3b8d1e904
+Revises: 9d4a6c2e8f15
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f3b8d1e904'
+down_revision = '9d4a6c2e8f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing stories are categorized by scripts/categorize_stories.py
+    op.create_table('story_categories',
+        sa.Column('story_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=32), nullable=False),
+        sa.Column('published_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ),
+        sa.PrimaryKeyConstraint('story_id', 'category')
+    )
+    op.create_index('ix_story_categories_category_published_at', 'story_categories',
+                    ['category', sa.text('published_at DESC'), sa.text('story_id DESC')])
+
+
+def downgrade():
+    op.drop_index('ix_story_categories_category_published_at', table_name='story_categories')
+    op.drop_table('story_categories')
@@ -0,0 +1,35 @@
+"""Add digests table
+
+Revision ID: c71e0f3b5a82
+Revises: 8a4e6b2c7d13
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e0f3b5a82'
+down_revision = '8a4e6b2c7d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('digests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('digest_date', sa.Date(), nullable=False),
+        sa.Column('min_score', sa.Float(), nullable=False),
+        sa.Column('story_limit', sa.Integer(), nullable=False),
+        sa.Column('story_count', sa.Integer(), nullable=False),
+        sa.Column('story_fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('digest_date', 'min_score', 'story_limit', name='uq_digests_date_params')
+    )
+
+
+def downgrade():
+    op.drop_table('digests')
@@ -0,0 +1,37 @@
+"""Add rescore_runs table and story_metrics.updated_at index
+
+Revision ID: d94b2e6f1c38
+Revises: c71e0f3b5a82
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94b2e6f1c38'
+down_revision = 'c71e0f3b5a82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rescore_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('watermark', sa.DateTime(), nullable=True),
+        sa.Column('rows_scanned', sa.Integer(), nullable=True),
+        sa.Column('rows_updated', sa.Integer(), nullable=True),
+        sa.Column('seconds', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_rescore_runs_started_at'), 'rescore_runs', ['started_at'], unique=False)
+    # Lets the rescoring job find stories whose metrics changed since its watermark
+    op.create_index(op.f('ix_story_metrics_updated_at'), 'story_metrics', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_story_metrics_updated_at'), table_name='story_metrics')
+    op.drop_index(op.f('ix_rescore_runs_started_at'), table_name='rescore_runs')
+    op.drop_table('rescore_runs')
@@ -0,0 +1,50 @@
+"""Add source_stats aggregate table
+
+Revision ID: e3a7c9d1f5b6
+Revises: d94b2e6f1c38
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7c9d1f5b6'
+down_revision = 'd94b2e6f1c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('source_stats',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('story_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('email_opens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('link_clicks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_spent', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('feedback_total', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('feedback_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('source')
+    )
+
+    # Backfill from existing metrics; afterwards StoryService keeps it up to date
+    op.execute("""
+        INSERT INTO source_stats (source, story_count, email_opens, link_clicks,
+                                  time_spent, feedback_total, feedback_count)
+        SELECT s.source,
+               COUNT(m.id),
+               COALESCE(SUM(m.email_opens), 0),
+               COALESCE(SUM(m.link_clicks), 0),
+               COALESCE(SUM(m.time_spent), 0),
+               COALESCE(SUM(m.feedback_score), 0),
+               COUNT(NULLIF(m.feedback_score, 0))
+        FROM stories s
+        JOIN story_metrics m ON m.story_id = s.id
+        GROUP BY s.source
+    """)
+
+
+def downgrade():
+    op.drop_table('source_stats')
@@ -0,0 +1,33 @@
+"""One story_metrics row per story; add feedback_count
+
+Revision ID: f58c3a0e7d21
+Revises: e3a7c9d1f5b6
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f58c3a0e7d21'
+down_revision = 'e3a7c9d1f5b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Event increments upsert by story_id, so keep only the oldest metrics row per story
+    op.execute("""
+        DELETE FROM story_metrics m
+        WHERE EXISTS (
+            SELECT 1 FROM story_metrics o WHERE o.story_id = m.story_id AND o.id < m.id
+        )
+    """)
+    op.create_index(op.f('ix_story_metrics_story_id'), 'story_metrics', ['story_id'], unique=True)
+    op.add_column('story_metrics', sa.Column('feedback_count', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('story_metrics', 'feedback_count')
+    op.drop_index(op.f('ix_story_metrics_story_id'), table_name='story_metrics')
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.database import get_db
-from services.digest_service import DigestService
+from models.database import get_api_db, is_async_session, run_db_call
+from services.cache_service import cached_response, response_cache
+from services.digest_service import DigestService, get_renderer
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Literal, Optional, Union
 
 router = APIRouter()
 
@@ -16,29 +21,56 @@ class DigestResponse(BaseModel):
 
 @router.get("/generate", response_model=DigestResponse)
 async def generate_digest(
+    request: Request,
     min_score: float = 0.7,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
 ):
-    """Generate a markdown digest of top AI stories."""
+    """Serve the markdown digest of top AI stories, rebuilt only when its stories change."""
+    cache_key, cached = response_cache.get(f"digest:{min_score}:{limit}")
+    if cached:
+        return cached_response(request, cached)
+
     try:
-        content = DigestService.generate_daily_digest(
-            db=db,
+        digest = await run_db_call(
+            db,
+            DigestService.get_or_create_digest,
+            DigestService.get_or_create_digest_async,
             min_score=min_score,
             limit=limit
         )
         
-        # Count actual stories in digest (by counting ### prefixes)
-        story_count = content.count("### ")
-        
-        return DigestResponse(
-            content=content,
-            generated_at=datetime.utcnow(),
-            story_count=story_count,
+        digest_response = DigestResponse(
+            content=digest.content,
+            generated_at=digest.generated_at,
+            story_count=digest.story_count,
             min_score=min_score
         )
+        body = json.dumps(jsonable_encoder(digest_response)).encode()
+        return cached_response(request, response_cache.set(cache_key, body))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error generating digest: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/export")
+async def export_digest(
+    format: Literal["markdown", "html", "text", "ndjson"] = "markdown",
+    days: int = Query(7, ge=1, le=366, description="Archive the stories published in the last N days"),
+    min_score: float = Query(0.7, ge=0.0, description="Minimum interesting score"),
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
+):
+    """Stream an archive of stories as markdown, HTML, plain text or NDJSON without building it in memory."""
+    renderer = get_renderer(format)
+    since = datetime.utcnow() - timedelta(days=days)
+    if is_async_session(db):
+        body = DigestService.stream_archive_async(db, since, min_score, format)
+    else:
+        body = DigestService.stream_archive(db, since, min_score, format)
+    filename = f"digest-{since.strftime('%Y-%m-%d')}-{days}d.{renderer.extension}"
+    return StreamingResponse(
+        body,
+        media_type=renderer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
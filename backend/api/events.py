@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Union
+
+from services.event_service import event_buffer
+
+router = APIRouter()
+
+class EngagementEvent(BaseModel):
+    story_id: int
+    type: Literal["open", "click", "time_spent", "feedback"]
+    value: float = Field(1.0, description="Count for open/click, seconds for time_spent, rating for feedback")
+
+@router.post("/events", status_code=202)
+async def record_events(events: Union[List[EngagementEvent], EngagementEvent]):
+    """Accept one or many engagement events; they are written to story_metrics in batches."""
+    batch = events if isinstance(events, list) else [events]
+    if not event_buffer.add(event.dict() for event in batch):
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Event buffer is full, retry later"},
+            headers={"Retry-After": "1"}
+        )
+    return {"accepted": len(batch)}
+
+@router.get("/events/stats")
+async def get_event_stats():
+    """Buffer counters for this worker process."""
+    return event_buffer.stats()
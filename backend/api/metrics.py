@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from models.database import get_pool_metrics
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    """Connection pool metrics for this worker process."""
+    return {"pools": get_pool_metrics()}
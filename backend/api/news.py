@@ -1,98 +1,164 @@
-from fastapi import APIRouter, Depends, Query
-from models.news_item import NewsItem
-from typing import List, Optional
-from datetime import datetime
-import os
-from dotenv import load_dotenv
-from newsapi import NewsApiClient
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from typing import List, Optional, Union
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.database import get_db
+from models.database import get_api_db, run_db_call
 from models.news_item import NewsItem
+from services.cache_service import cached_response, response_cache
+from services.category_service import CategoryService
+from services.search_service import SearchService
+from services.similarity_service import SimilarityService
 from services.story_service import StoryService
 
 router = APIRouter()
 
 @router.get("/news", response_model=List[NewsItem])
 async def get_news(
-    skip: int = Query(0, description="Number of stories to skip"),
-    limit: int = Query(10, description="Number of stories to return"),
-    min_score: float = Query(0.0, description="Minimum interesting score"),
-    db: Session = Depends(get_db)
+    request: Request,
+    skip: int = Query(0, ge=0, description="Number of stories to skip (prefer cursor)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of stories to return"),
+    min_score: float = Query(0.0, ge=0.0, description="Minimum interesting score"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
+    category: Optional[str] = Query(None, description="Only stories in this category (see /api/news/categories)"),
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
 ):
+    """Read stories from the database; ingestion runs separately (see services/ingestion_service.py).
+
+    When a full page is returned, the X-Next-Cursor header carries the cursor for the next page.
+    Responses are cached until stories change and carry an ETag for If-None-Match requests.
+    """
+    cache_key, cached = response_cache.get(f"news:{skip}:{cursor}:{limit}:{min_score}:{category}")
+    if cached:
+        return cached_response(request, cached)
+
     try:
-        # First try to get stories from database
-        stories = StoryService.get_stories(db, skip=skip, limit=limit, min_score=min_score)
-        
-        # If we don't have enough stories, fetch more from the API
-        if len(stories) < limit:
-            # Initialize NewsAPI client
-            api_key = os.getenv("NEWS_API_KEY")
-            if not api_key:
-                print("ERROR: NEWS_API_KEY not found in environment variables")
-                return JSONResponse(
-                    status_code=500,
-                    content={"error": "NEWS_API_KEY not found in environment variables"}
-                )
-                
-            print(f"Initializing NewsAPI client with key: {api_key[:4]}...")
-            newsapi = NewsApiClient(api_key=api_key)
-            
-            # Fetch AI-related news
-            print("Fetching news from NewsAPI...")
-            news = newsapi.get_everything(
-                q='artificial intelligence OR machine learning',
-                language='en',
-                sort_by='relevancy',
-                page_size=limit
-            )
-            
-            print(f"Received {len(news['articles'])} articles")
-            
-            # Store new articles in database
-            for article in news['articles']:
-                # Check if article already exists
-                existing_story = StoryService.get_story_by_url(db, article['url'])
-                if not existing_story:
-                    # Calculate initial interesting score based on relevancy and freshness
-                    hours_old = (datetime.utcnow() - datetime.strptime(article['publishedAt'], '%Y-%m-%dT%H:%M:%SZ')).total_seconds() / 3600
-                    freshness_score = max(0, 1 - (hours_old / 72))  # Decay over 72 hours
-                    initial_score = 0.7 + (freshness_score * 0.3)  # Base score 0.7 plus freshness bonus
-                    
-                    # Create new story
-                    story = StoryService.create_story(
-                        db=db,
-                        title=article['title'],
-                        description=article['description'],
-                        url=article['url'],
-                        source=article['source']['name'],
-                        interesting_score=initial_score,
-                        published_at=datetime.strptime(article['publishedAt'], '%Y-%m-%dT%H:%M:%SZ')
-                    )
-                    
-                    # Initialize metrics
-                    StoryService.create_story_metrics(db, story.id)
-            
-            # Get updated list of stories
-            stories = StoryService.get_stories(db, skip=skip, limit=limit, min_score=min_score)
-        
+        stories = await run_db_call(
+            db,
+            StoryService.get_stories,
+            StoryService.get_stories_async,
+            skip=skip,
+            limit=limit,
+            min_score=min_score,
+            cursor=cursor,
+            category=category
+        )
+
+        headers = {}
+        if len(stories) == limit and stories.cursor:
+            headers["X-Next-Cursor"] = stories.cursor
+
         print(f"Returning {len(stories)} processed articles")
-        return [
-            NewsItem(
-                title=story.title,
-                description=story.description,
-                url=story.url,
-                source=story.source,
-                interesting_score=story.interesting_score,
-                published_at=story.published_at,
-                created_at=story.created_at
-            ) for story in stories
-        ]
-        
+        body = json.dumps(jsonable_encoder(_news_items(stories))).encode()
+        return cached_response(request, response_cache.set(cache_key, body, headers))
+
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         print(f"ERROR in /api/news endpoint: {str(e)}")
         return JSONResponse(
             status_code=500,
             content={"error": f"Error fetching news: {str(e)}"}
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/news/categories")
+async def get_news_categories(db: Union[Session, AsyncSession] = Depends(get_api_db)):
+    """Every category with its story count, for category filters on /api/news."""
+    return await run_db_call(
+        db,
+        CategoryService.get_category_counts,
+        CategoryService.get_category_counts_async
+    )
+
+
+@router.get("/news/search", response_model=List[NewsItem])
+async def search_news(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=256, description="Search terms"),
+    skip: int = Query(0, ge=0, le=1000, description="Number of results to skip"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results to return"),
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
+):
+    """Full-text search over story titles and descriptions, best match first."""
+    cache_key, cached = response_cache.get(f"search:{skip}:{limit}:{q}")
+    if cached:
+        return cached_response(request, cached)
+
+    try:
+        stories = await run_db_call(
+            db,
+            SearchService.search_stories,
+            SearchService.search_stories_async,
+            q=q,
+            skip=skip,
+            limit=limit
+        )
+        body = json.dumps(jsonable_encoder(_news_items(stories))).encode()
+        return cached_response(request, response_cache.set(cache_key, body))
+
+    except Exception as e:
+        print(f"ERROR in /api/news/search endpoint: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Error searching news: {str(e)}"}
+        )
+
+
+@router.get("/news/{story_id}/content")
+async def get_news_content(
+    story_id: int,
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
+):
+    """Extracted article text of one story; listings never load it."""
+    content = await run_db_call(
+        db,
+        StoryService.get_story_content,
+        StoryService.get_story_content_async,
+        story_id
+    )
+    if content is None:
+        raise HTTPException(status_code=404, detail="No content for this story")
+    return {"id": story_id, "content": content}
+
+
+@router.get("/news/{story_id}/similar", response_model=List[NewsItem])
+async def get_similar_news(
+    request: Request,
+    story_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Number of stories to return"),
+    db: Union[Session, AsyncSession] = Depends(get_api_db)
+):
+    """Stories closest to this one by embedding (approximate nearest neighbours), near-duplicates excluded."""
+    cache_key, cached = response_cache.get(f"similar:{story_id}:{limit}")
+    if cached:
+        return cached_response(request, cached)
+
+    stories = await run_db_call(
+        db,
+        SimilarityService.similar_stories,
+        SimilarityService.similar_stories_async,
+        story_id,
+        limit=limit
+    )
+    if stories is None:
+        raise HTTPException(status_code=404, detail="No embedding for this story")
+    body = json.dumps(jsonable_encoder(_news_items(stories))).encode()
+    return cached_response(request, response_cache.set(cache_key, body))
+
+
+def _news_items(stories) -> List[NewsItem]:
+    return [
+        NewsItem(
+            title=story.title,
+            description=story.description,
+            url=story.url,
+            source=story.source,
+            interesting_score=story.interesting_score,
+            published_at=story.published_at,
+            created_at=story.created_at
+        ) for story in stories
+    ]
@@ -1,16 +1,15 @@
-from fastapi import FastAPI, Depends, Query
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import news
+import asyncio
 import os
 from dotenv import load_dotenv
-from newsapi import NewsApiClient
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
 
-from models.database import get_db
-from models.story import Story as DBStory
-from services.story_service import StoryService
 from api import digest
+from api import events
+from api import metrics
+from services.event_service import event_buffer
+from services.ingestion_service import get_ingestion_settings, run_ingestion_loop
 
 # Load environment variables first thing
 load_dotenv()
@@ -31,12 +30,52 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"]
 )
 
 # Include routers
 app.include_router(digest.router, prefix="/api/digest", tags=["digest"])
 app.include_router(news.router, prefix="/api", tags=["news"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+
+
+@app.on_event("startup")
+async def start_ingestion():
+    """Optionally run ingestion (NewsAPI and feeds) as an in-process background task."""
+    settings = get_ingestion_settings()
+    app.state.ingestion_task = None
+    if settings["enabled"]:
+        print(f"Starting background ingestion every {settings['interval_seconds']}s")
+        app.state.ingestion_task = asyncio.create_task(run_ingestion_loop(
+            interval_seconds=settings["interval_seconds"],
+            query=settings["query"],
+            page_size=settings["page_size"]
+        ))
+
+
+@app.on_event("startup")
+async def start_event_buffer():
+    """Flush buffered engagement events in the background."""
+    event_buffer.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_buffer():
+    """Write any buffered engagement events before the worker exits."""
+    await event_buffer.stop()
+
+
+@app.on_event("shutdown")
+async def stop_ingestion():
+    task = getattr(app.state, "ingestion_task", None)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
 
 @app.get("/")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from datetime import datetime
+from .database import Base
+
+class ContentJob(Base):
+    """Work queue for article full-text extraction: one row per story awaiting (or done with) it."""
+    __tablename__ = "content_jobs"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    status = Column(String(16), nullable=False, default="pending")  # "pending", "done" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    # A claimed job belongs to `worker` until its lease runs out; crashed workers' jobs are reclaimed after
+    worker = Column(String(64))
+    lease_until = Column(DateTime)
+    error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Claim scan: pending jobs whose lease is free, oldest story first
+        Index("ix_content_jobs_status_lease", status, lease_until),
+    )
@@ -1,27 +1,114 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 import os
+import time
 from dotenv import load_dotenv
 
+from .pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolMetrics,
+    get_pool_settings,
+    instrument_engine,
+)
+
 load_dotenv()
 
 # Database connection URL
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# Async connection URL (asyncpg); override with e.g. sqlite+aiosqlite:///./test.db in tests
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+# Serve API reads from the async engine instead of the sync one
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# Pool sizing and pre-ping/recycle policy (DB_POOL_* env vars), applied per process
+POOL_SETTINGS = get_pool_settings()
+
+# Pool instrumentation, exposed on /api/metrics
+pool_metrics = PoolMetrics("database")
+async_pool_metrics = PoolMetrics("async_database")
+
 # Create engine instance
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = instrument_engine(
+    create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_SETTINGS),
+    pool_metrics
+)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory, created on first use so the async driver
+# (asyncpg/aiosqlite) is only required when the async layer is used
+_async_engine = None
+_AsyncSessionLocal = None
+
 # Create base class for models
 Base = declarative_base()
 
 # Dependency to get database session
 def get_db():
+    started = time.perf_counter()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+        pool_metrics.record_session(time.perf_counter() - started)
+
+def get_async_engine():
+    """Return the shared async engine, creating it on first use."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        if ASYNC_DATABASE_URL.startswith("sqlite"):
+            _async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        else:
+            _async_engine = instrument_engine(
+                create_async_engine(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_SETTINGS),
+                async_pool_metrics
+            )
+        _AsyncSessionLocal = sessionmaker(
+            bind=_async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+# Dependency to get async database session
+async def get_async_db():
+    get_async_engine()
+    started = time.perf_counter()
+    db = _AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+        async_pool_metrics.record_session(time.perf_counter() - started)
+
+# Session dependency used by the API handlers, selected by USE_ASYNC_DB
+get_api_db = get_async_db if USE_ASYNC_DB else get_db
+
+def get_pool_metrics():
+    """Snapshot of pool instrumentation for this worker process."""
+    metrics = {"pid": os.getpid(), "settings": POOL_SETTINGS, "database": pool_metrics.snapshot()}
+    if _async_engine is not None:
+        metrics["async_database"] = async_pool_metrics.snapshot()
+    return metrics
+
+def is_async_session(db) -> bool:
+    """Whether db is an AsyncSession (from get_async_db) rather than a sync Session."""
+    return isinstance(db, AsyncSession)
+
+async def run_db_call(db, sync_fn, async_fn, *args, **kwargs):
+    """Run a query off the event loop: natively on async sessions, in the threadpool on sync ones."""
+    if is_async_session(db):
+        return await async_fn(db, *args, **kwargs)
+    return await run_in_threadpool(sync_fn, db, *args, **kwargs)
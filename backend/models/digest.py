@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, UniqueConstraint
+from datetime import datetime
+from .database import Base
+
+class Digest(Base):
+    __tablename__ = "digests"
+
+    id = Column(Integer, primary_key=True)
+    digest_date = Column(Date, nullable=False)
+    min_score = Column(Float, nullable=False)
+    story_limit = Column(Integer, nullable=False)
+    story_count = Column(Integer, nullable=False, default=0)
+    story_fingerprint = Column(String(40), nullable=False)  # sha1 of the selected (id, score) pairs
+    content = Column(Text, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("digest_date", "min_score", "story_limit", name="uq_digests_date_params"),
+    )
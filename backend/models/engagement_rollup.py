@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, BigInteger, ForeignKey
+from datetime import datetime
+from .database import Base
+
+class StoryMetricsHourly(Base):
+    """Engagement per story per hour, rolled up from the raw event log."""
+    __tablename__ = "story_metrics_hourly"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    hour = Column(DateTime, primary_key=True, index=True)
+    email_opens = Column(Integer, nullable=False, default=0)
+    link_clicks = Column(Integer, nullable=False, default=0)
+    time_spent = Column(Float, nullable=False, default=0.0)
+    feedback_sum = Column(Float, nullable=False, default=0.0)
+    feedback_count = Column(Integer, nullable=False, default=0)
+
+class EventLogOffset(Base):
+    """How far the rollup job has read into each event log segment."""
+    __tablename__ = "event_log_offsets"
+
+    segment = Column(String, primary_key=True)  # path relative to the log directory
+    offset = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Thread-safe counters for one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.sessions = 0
+        self.total_session_time = 0.0
+        self.max_session_time = 0.0
+        self.session_hooks: List[Callable[[float], None]] = []
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_session(self, duration: float) -> None:
+        """Record how long a request held its session; called from get_db."""
+        with self._lock:
+            self.sessions += 1
+            self.total_session_time += duration
+            self.max_session_time = max(self.max_session_time, duration)
+        for hook in self.session_hooks:
+            hook(duration)
+
+    def add_session_hook(self, hook: Callable[[float], None]) -> None:
+        """Register a callback receiving each session's hold time in seconds."""
+        self.session_hooks.append(hook)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_checkout_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": self.max_wait * 1000,
+                "sessions": self.sessions,
+                "avg_session_ms": (self.total_session_time / self.sessions * 1000) if self.sessions else 0.0,
+                "max_session_ms": self.max_session_time * 1000,
+            }
+        if self.pool is not None:
+            stats.update({
+                "pool_size": self.pool.size(),
+                "in_use": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": max(0, self.pool.overflow()),
+            })
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    """Times each checkout and counts pool timeouts into self.metrics."""
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def get_pool_settings() -> Dict[str, object]:
+    """Read pool settings from the environment (sized per uvicorn worker process)."""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", -1)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+def instrument_engine(engine, metrics: PoolMetrics):
+    """Attach metrics to an engine created with an instrumented pool class."""
+    pool = engine.pool
+    pool.metrics = metrics
+    metrics.pool = pool
+    return engine
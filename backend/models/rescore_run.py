@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from datetime import datetime
+from .database import Base
+
+class RescoreRun(Base):
+    __tablename__ = "rescore_runs"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    watermark = Column(DateTime, nullable=True)  # started_at of the previous run; None means full rescore
+    rows_scanned = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    seconds = Column(Float, default=0.0)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from .database import Base
+
+class SourceStats(Base):
+    """Per-source engagement totals, maintained incrementally as story metrics change."""
+    __tablename__ = "source_stats"
+
+    source = Column(String, primary_key=True)
+    story_count = Column(Integer, nullable=False, default=0)
+    email_opens = Column(Integer, nullable=False, default=0)
+    link_clicks = Column(Integer, nullable=False, default=0)
+    time_spent = Column(Float, nullable=False, default=0.0)
+    feedback_total = Column(Float, nullable=False, default=0.0)
+    feedback_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,33 +1,57 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
 from .database import Base
+from .story_content import StoryContent
 
 class Story(Base):
     __tablename__ = "stories"
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
-    description = Column(String, index=True)
-    url = Column(String, index=True)
-    source = Column(String, index=True)
-    interesting_score = Column(Float, index=True)
+    # Indexes are declared explicitly in __table_args__; each one is paid for on every insert
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+    description = Column(String)
+    url = Column(String)
+    url_hash = Column(BigInteger)  # services.url_service.url_hash(url)
+    source = Column(String)
+    interesting_score = Column(Float)
     published_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     used_in_email = Column(Boolean, default=False)
-    content = Column(String)  # Added content attribute
+    cluster_id = Column(Integer)  # Near-duplicate cluster (id of its first story)
+
+    metrics = relationship("StoryMetrics", back_populates="story", uselist=False)
+    # Article text lives compressed in story_content and is only loaded when `content` is read
+    content_row = relationship(StoryContent, uselist=False, lazy="select", cascade="all, delete-orphan")
+
+    @property
+    def content(self) -> Optional[str]:
+        return self.content_row.text if self.content_row is not None else None
+
+    @content.setter
+    def content(self, text: Optional[str]) -> None:
+        self.content_row = StoryContent.from_text(text) if text is not None else None
 
-    metrics = relationship("StoryMetrics", back_populates="story")
+    __table_args__ = (
+        # Serves keyset pagination: ORDER BY published_at DESC, id DESC with a score filter
+        Index("ix_stories_published_at_id", published_at.desc(), id.desc(), interesting_score),
+        # Duplicate checks at ingest and get_story_by_url
+        Index("ix_stories_url_hash", url_hash, unique=True),
+        # Per-source listings and watermarks (newest story of a source)
+        Index("ix_stories_source_published_at", source, published_at.desc()),
+    )
 
 class StoryMetrics(Base):
     __tablename__ = "story_metrics"
 
     id = Column(Integer, primary_key=True, index=True)
-    story_id = Column(Integer, ForeignKey("stories.id"))
+    story_id = Column(Integer, ForeignKey("stories.id"), unique=True, index=True)
     email_opens = Column(Integer, default=0)
     link_clicks = Column(Integer, default=0)
     time_spent = Column(Float, default=0.0)
     feedback_score = Column(Float, default=0.0)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    feedback_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     story = relationship("Story", back_populates="metrics")
\ No newline at end of file
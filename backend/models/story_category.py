@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from .database import Base
+
+class StoryCategory(Base):
+    """A category assigned to a story (stories can have several).
+
+    published_at is copied from the story so that a category's newest stories
+    are one range of ix_story_categories_category_published_at.
+    """
+    __tablename__ = "story_categories"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    category = Column(String(32), primary_key=True)
+    published_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Serves /api/news?category=: ORDER BY published_at DESC, story_id DESC within a category
+        Index("ix_story_categories_category_published_at", category, published_at.desc(), story_id.desc()),
+    )
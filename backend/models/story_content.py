@@ -0,0 +1,78 @@
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Integer, SmallInteger, LargeBinary, DateTime, ForeignKey
+from .database import Base
+
+# Preset zlib dictionaries, by id. Article bodies are a few KB each, too short for
+# zlib to learn much on its own; seeding the window with common news phrasing
+# lets even the first sentences compress. Never edit a published dictionary:
+# stored rows name the one they were written with. Add a new id instead.
+# Strings used most often go last (they are cheapest to reference).
+CONTENT_DICTIONARIES = {
+    1: (
+        "according to the company, which declined to comment on the report. The startup, founded in "
+        "said in a statement on Monday. said in a statement on Tuesday. said in a statement on Wednesday. "
+        "said in a statement on Thursday. said in a statement on Friday. told reporters that the "
+        "chief executive officer, chief technology officer, co-founder and CEO, researchers at the "
+        "university, according to people familiar with the matter, did not immediately respond to a "
+        "request for comment. The announcement comes as investors, analysts said the deal, shares rose "
+        "percent in early trading, billion in funding, million in a Series A round led by venture capital "
+        "firms, valuation of, revenue growth, quarterly earnings, data center, cloud computing, "
+        "semiconductor, chips, GPUs, Nvidia, Microsoft, Google, Amazon, Meta, Apple, OpenAI, Anthropic, "
+        "regulators, the European Union, the AI Act, policy, privacy, copyright lawsuit, safety, "
+        "open-source, open source model, large language model, large language models, LLMs, generative AI, "
+        "artificial intelligence, machine learning, deep learning, neural network, training data, "
+        "inference, benchmark, benchmarks, reasoning, agents, chatbot, assistant, automation, robotics, "
+        "computer vision, natural language processing, fine-tuning, parameters, compute, enterprise "
+        "customers, businesses, small businesses, adoption, productivity, workers, jobs, the technology, "
+        "the model, the models, the company said, the company's, the industry, the market, the world, "
+        "this year, last year, next year, in the past, in recent years, for example, such as, as well as, "
+        "more than, less than, at least, one of the, some of the, many of the, most of the, part of the, "
+        "because of, in order to, to be, will be, would be, could be, can be, has been, have been, had been, "
+        "it is, it was, that is, there is, there are, which is, who are, they are, we are, you can, "
+        "however, also, because, while, which, their, there, about, after, before, between, through, "
+        "into, over, under, other, these, those, people, new, not, but, from, with, have, has, this, "
+        "that, for, are, was, were, its, it's, on the, in the, of the, to the, and the, for the, at the, "
+        "by the, with the, from the, is a, is the, of a, in a, to a, and a, . The , the "
+    ).encode(),
+}
+CURRENT_DICTIONARY = 1
+COMPRESSION_LEVEL = 6
+
+
+def compress_content(text: str, dictionary: int = CURRENT_DICTIONARY) -> bytes:
+    """zlib-compress article text with a preset dictionary (0 means none)."""
+    if dictionary:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=CONTENT_DICTIONARIES[dictionary])
+    else:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress_content(body: bytes, dictionary: int) -> str:
+    if dictionary:
+        decompressor = zlib.decompressobj(zdict=CONTENT_DICTIONARIES[dictionary])
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(body) + decompressor.flush()).decode()
+
+
+class StoryContent(Base):
+    """Full article text, compressed and kept out of the stories rows that listings scan."""
+    __tablename__ = "story_content"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    dictionary = Column(SmallInteger, nullable=False, default=CURRENT_DICTIONARY)
+    length = Column(Integer, nullable=False)  # Characters before compression
+    body = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def from_text(cls, text: str) -> "StoryContent":
+        return cls(dictionary=CURRENT_DICTIONARY, length=len(text), body=compress_content(text))
+
+    @property
+    def text(self) -> Optional[str]:
+        return decompress_content(self.body, self.dictionary) if self.body is not None else None
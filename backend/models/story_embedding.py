@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey
+from .database import Base
+
+# Stored vectors are little-endian float16: half the bytes of float32, and
+# plenty of precision for cosine similarities between unit vectors.
+VECTOR_DTYPE = np.dtype("<f2")
+
+
+def pack_vector(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def unpack_vectors(bodies: Sequence[bytes], dim: int) -> np.ndarray:
+    """Stack stored vectors into an (n, dim) float16 matrix in one copy."""
+    if not bodies:
+        return np.empty((0, dim), dtype=VECTOR_DTYPE)
+    return np.frombuffer(b"".join(bodies), dtype=VECTOR_DTYPE).reshape(len(bodies), dim)
+
+
+class StoryEmbedding(Base):
+    """Embedding of a story's text, used for relevance scoring and similar-story lookups."""
+    __tablename__ = "story_embeddings"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
+from datetime import datetime
+from .database import Base
+
+class Subscriber(Base):
+    __tablename__ = "subscribers"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False, unique=True)
+    name = Column(String)
+    active = Column(Boolean, nullable=False, default=True)
+    unsubscribe_token = Column(String(32), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class EmailSend(Base):
+    """Send log: one row per (digest, subscriber) delivery attempt outcome."""
+    __tablename__ = "email_sends"
+
+    id = Column(Integer, primary_key=True)
+    digest_id = Column(Integer, ForeignKey("digests.id"), nullable=False)
+    subscriber_id = Column(Integer, ForeignKey("subscribers.id"), nullable=False)
+    status = Column(String(16), nullable=False)  # "sent" or "failed"
+    attempts = Column(Integer, nullable=False, default=1)
+    error = Column(Text)
+    sent_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Reruns skip subscribers already sent this digest
+        UniqueConstraint("digest_id", "subscriber_id", name="uq_email_sends_digest_subscriber"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from .database import Base
+
+class SourceSyncState(Base):
+    """Where each ingestion source left off, so a cycle only asks for what is new."""
+    __tablename__ = "source_sync_state"
+
+    source = Column(String, primary_key=True)  # Connector key, e.g. "feed:https://example.com/rss"
+    watermark = Column(DateTime)  # Newest publishedAt seen
+    cursor = Column(String)  # Connector-specific position; the URL of the article at the watermark
+    etag = Column(String)
+    last_modified = Column(String)
+    fetched_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Measure keyword categorization throughput.
+
+Runs in memory, no database needed:
+
+    python scripts/benchmark_categories.py --texts 100000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.category_service import CATEGORIES, CategoryService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark story categorization.")
+    parser.add_argument("--texts", type=int, default=10000, help="Random texts categorized")
+    parser.add_argument("--words", type=int, default=60, help="Words per text")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = [phrase for phrases in CATEGORIES.values() for phrase in phrases]
+    words += "the a new of to in for on with and said company year market users people".split() * 20
+    texts = [" ".join(rng.choices(words, k=args.words)) for _ in range(args.texts)]
+
+    started = time.perf_counter()
+    categories = CategoryService.categorize(texts)
+    seconds = time.perf_counter() - started
+    assigned = sum(len(names) for names in categories)
+    print(f"categorized {args.texts} texts ({assigned} categories) in {seconds:.3f}s "
+          f"({args.texts / seconds:,.0f} texts/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Measure how long adding a story to a populated near-duplicate index takes.
+
+Runs in memory, no database needed:
+
+    python scripts/benchmark_dedup.py --stories 50000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.dedup_service import NearDuplicateIndex
+
+WIRE_TITLE = "OpenAI unveils new reasoning model that outperforms rivals on math benchmarks"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate index lookups.")
+    parser.add_argument("--stories", type=int, default=5000, help="Distinct stories indexed before timing")
+    parser.add_argument("--adds", type=int, default=1000, help="Timed adds of near-duplicate stories")
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex()
+    started = time.perf_counter()
+    for i in range(args.stories):
+        index.add(i, f"Story {i} about topic {i % 97} with detail {i * 7} and more words {i % 13}")
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(args.stories, args.stories + args.adds):
+        index.add(i, f"{WIRE_TITLE} {i}")
+    add_ms = (time.perf_counter() - started) * 1000 / args.adds
+
+    print(f"indexed {args.stories} stories in {build_seconds:.2f}s")
+    print(f"add against the populated index: {add_ms:.3f} ms per story ({len(index)} indexed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Measure how long rendering a digest in every format takes.
+
+Runs in memory, no database needed:
+
+    python scripts/benchmark_digest.py --stories 50
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.story import Story
+from services.digest_service import render_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark digest rendering (markdown, html and text).")
+    parser.add_argument("--stories", type=int, default=50, help="Stories in the digest")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed renders")
+    args = parser.parse_args()
+
+    stories = [Story(id=i, title=f"Story {i}", description="Words " * 40, url=f"https://s{i}.com",
+                     source="Source", interesting_score=0.8, published_at=datetime.utcnow())
+               for i in range(args.stories)]
+    render_digest(stories)
+
+    samples = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        render_digest(stories)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(f"render {args.stories} stories in all formats: median {statistics.median(samples):.2f} ms, "
+          f"p95 {samples[int(len(samples) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
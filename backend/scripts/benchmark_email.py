@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Measure how long building one subscriber's digest email takes.
+
+The digest is rendered once; this times the per-recipient personalization.
+Runs in memory, no database or SMTP server needed:
+
+    python scripts/benchmark_email.py --recipients 10000
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.story import Story
+from services.email_service import DigestEmail
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark digest email personalization.")
+    parser.add_argument("--stories", type=int, default=10, help="Stories in the digest")
+    parser.add_argument("--recipients", type=int, default=1000, help="Messages built")
+    args = parser.parse_args()
+
+    stories = [Story(id=i, title=f"Story {i}", description="Body " * 40, url=f"https://t{i}.com",
+                     source="Source", interesting_score=0.8, published_at=datetime.utcnow())
+               for i in range(args.stories)]
+    started = time.perf_counter()
+    digest_email = DigestEmail.render(stories, "digest@example.com")
+    render_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for i in range(args.recipients):
+        digest_email.message_for(f"reader{i}@example.com", f"Reader {i}", f"{i:032x}")
+    message_ms = (time.perf_counter() - started) * 1000 / args.recipients
+
+    print(f"render once: {render_ms:.2f} ms")
+    print(f"personalize: {message_ms:.3f} ms per recipient ({args.recipients} recipients)")
+
+
+if __name__ == "__main__":
+    main()
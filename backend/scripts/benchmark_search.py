@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Measure in-memory search index build time and query latency.
+
+Runs in memory, no database needed:
+
+    python scripts/benchmark_search.py --documents 100000
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.search_service import InvertedIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory search index.")
+    parser.add_argument("--documents", type=int, default=100000, help="Documents indexed")
+    parser.add_argument("--queries", type=int, default=100, help="Timed selective queries")
+    args = parser.parse_args()
+
+    index = InvertedIndex()
+    index.pending_statement(bind=None)
+    started = time.perf_counter()
+    index.add_rows(
+        (i, f"story {i} topic{i % 500} about models", f"words{i % 1000} detail{i % 37}")
+        for i in range(1, args.documents + 1)
+    )
+    print(f"indexed {len(index)} documents in {time.perf_counter() - started:.2f}s")
+
+    samples = []
+    for i in range(args.queries):
+        started = time.perf_counter()
+        index.search(f"topic{i % 500} words{i % 1000}", limit=10)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(f"selective query: median {statistics.median(samples):.2f} ms, "
+          f"p95 {samples[int(len(samples) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.database import SessionLocal
+from services.category_service import DEFAULT_BATCH_SIZE, CategoryService
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recategorize every stored story (new stories are categorized at ingest).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Stories per batch")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = CategoryService.categorize_all(db, batch_size=args.batch_size)
+        print(f"Categorized {stats['stories']} stories ({stats['assigned']} categories) in {stats['seconds']:.3f}s")
+    except Exception as e:
+        print(f"Error categorizing stories: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
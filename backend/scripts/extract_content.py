@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.database import SessionLocal
+from services.extraction_service import (DEFAULT_PROCESSES, ExtractionService, get_extraction_settings,
+                                         worker_id)
+
+def main():
+    settings = get_extraction_settings()
+
+    parser = argparse.ArgumentParser(description="Fetch queued article pages and store their main text in story_content.")
+    parser.add_argument("--batch-size", type=int, default=settings["batch_size"], help="Stories claimed per batch")
+    parser.add_argument("--concurrency", type=int, default=settings["concurrency"], help="Page downloads in flight")
+    parser.add_argument("--per-host-limit", type=int, default=settings["per_host_limit"],
+                        help="Page downloads in flight per host")
+    parser.add_argument("--processes", type=int,
+                        default=int(os.getenv("EXTRACTION_PROCESSES", DEFAULT_PROCESSES)),
+                        help="Processes parsing HTML")
+    parser.add_argument("--enqueue-missing", action="store_true",
+                        help="First queue every stored story that has no content")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds to wait when the queue is empty; 0 exits once it is drained")
+    args = parser.parse_args()
+
+    worker = worker_id()
+    db = SessionLocal()
+    try:
+        if args.enqueue_missing:
+            print(f"Queued {ExtractionService.enqueue_missing(db)} stories")
+
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            while True:
+                try:
+                    report = ExtractionService.run_batch(
+                        db,
+                        worker,
+                        executor=executor,
+                        batch_size=args.batch_size,
+                        concurrency=args.concurrency,
+                        per_host_limit=args.per_host_limit,
+                        timeout=settings["timeout"],
+                        lease_seconds=settings["lease_seconds"],
+                        max_attempts=settings["max_attempts"]
+                    )
+                except Exception as e:
+                    db.rollback()
+                    print(f"Error extracting content: {str(e)}")
+                    if not args.interval:
+                        sys.exit(1)
+                    time.sleep(args.interval)
+                    continue
+
+                if report["claimed"]:
+                    print(f"Extracted {report['extracted']} of {report['claimed']} stories "
+                          f"({report['failed']} failed; fetch {report['fetch_seconds']:.2f}s, "
+                          f"parse {report['parse_seconds']:.2f}s)")
+                    continue
+                if not args.interval:
+                    break
+                time.sleep(args.interval)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
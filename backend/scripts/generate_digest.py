@@ -16,8 +16,8 @@ def generate_daily_digest(db: Session):
     print(f"Generating digest for {datetime.now().strftime('%Y-%m-%d')}...")
     
     try:
-        # Generate digest content
-        content = DigestService.generate_daily_digest(
+        # Materialize digest (reused as-is if its stories have not changed)
+        digest = DigestService.get_or_create_digest(
             db=db,
             min_score=0.7,  # Only include high-scoring stories
             limit=10        # Top 10 stories
@@ -25,9 +25,9 @@ def generate_daily_digest(db: Session):
         
         # Save to file
         digest_dir = os.path.join(os.path.dirname(__file__), "..", "digests")
-        filename = DigestService.save_daily_digest(content, digest_dir)
+        filename = DigestService.save_daily_digest(digest.content, digest_dir)
         
-        print(f"Successfully generated digest: {filename}")
+        print(f"Successfully generated digest: {filename} ({digest.story_count} stories)")
         
         # Preview the first few lines
         print("\nPreview:")
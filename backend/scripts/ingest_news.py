@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from services.ingestion_service import IngestionService, get_ingestion_settings
+
+def ingest_once(query: str, page_size: int) -> int:
+    """Run a single ingestion cycle."""
+    print(f"Ingesting news at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}...")
+    return IngestionService.run_ingestion_cycle(query=query, page_size=page_size)
+
+def main():
+    load_dotenv()
+    settings = get_ingestion_settings()
+
+    parser = argparse.ArgumentParser(description="Pull articles from NewsAPI and configured feeds into the stories table.")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--interval", type=float, default=settings["interval_seconds"],
+                        help="Seconds between cycles when running as a worker")
+    parser.add_argument("--query", default=settings["query"], help="NewsAPI search query")
+    parser.add_argument("--page-size", type=int, default=settings["page_size"],
+                        help="Articles requested per cycle")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            ingest_once(args.query, args.page_size)
+        except Exception as e:
+            print(f"Error ingesting news: {str(e)}")
+            if args.once:
+                sys.exit(1)
+
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
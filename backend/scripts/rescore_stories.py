@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.database import SessionLocal
+from services.scoring_service import DEFAULT_BATCH_SIZE, ScoringService
+
+def rescore(full: bool, batch_size: int):
+    """Run one rescoring pass and print its stats."""
+    db = SessionLocal()
+    try:
+        if full:
+            stats = ScoringService.rescore_stories(db, batch_size=batch_size)
+            print(f"Rescored stories: scanned {stats['scanned']}, updated {stats['updated']} in {stats['seconds']:.3f}s")
+        else:
+            ScoringService.rescore_incremental(db, batch_size=batch_size)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh interesting scores as freshness decays and metrics change.")
+    parser.add_argument("--full", action="store_true", help="Rescore every story instead of only changed ones")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds between runs; 0 runs once and exits")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Stories per batch")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            rescore(args.full, args.batch_size)
+        except Exception as e:
+            print(f"Error rescoring stories: {str(e)}")
+            if not args.interval:
+                sys.exit(1)
+
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
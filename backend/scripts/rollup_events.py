@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.database import SessionLocal
+from services.event_log_service import DEFAULT_RETENTION_DAYS, EventLog, EventRollupService
+
+def rollup(log: EventLog, retention_days: int):
+    """Fold new raw events into hourly aggregates and prune old, fully rolled-up days."""
+    db = SessionLocal()
+    try:
+        EventRollupService.rollup(db, log)
+        removed = EventRollupService.prune(db, log, retention_days)
+        if removed:
+            print(f"Pruned {removed} day(s) of raw events")
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll raw engagement events up into story_metrics_hourly.")
+    parser.add_argument("--log-dir", default=os.getenv("EVENT_LOG_DIR", "event_log"), help="Event log directory")
+    parser.add_argument("--retention-days", type=int,
+                        default=int(os.getenv("EVENT_LOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)),
+                        help="Days of raw events to keep after they are rolled up")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds between runs; 0 runs once and exits")
+    args = parser.parse_args()
+
+    log = EventLog(args.log_dir)
+    while True:
+        try:
+            rollup(log, args.retention_days)
+        except Exception as e:
+            print(f"Error rolling up events: {str(e)}")
+            if not args.interval:
+                sys.exit(1)
+
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.database import SessionLocal
+from services.email_service import (DEFAULT_MAX_RETRIES, DEFAULT_RATE_PER_SECOND, DEFAULT_UNSUBSCRIBE_URL,
+                                    EmailService, SMTPConnectionPool, get_smtp_settings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Email today's digest to all active subscribers.")
+    parser.add_argument("--min-score", type=float, default=0.7, help="Minimum interest score of digest stories")
+    parser.add_argument("--limit", type=int, default=10, help="Stories in the digest")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="SMTP connections used in parallel (default SMTP_POOL_SIZE)")
+    parser.add_argument("--rate", type=float,
+                        default=float(os.getenv("EMAIL_RATE_PER_SECOND", DEFAULT_RATE_PER_SECOND)),
+                        help="Maximum messages per second; 0 disables the limit")
+    parser.add_argument("--max-retries", type=int,
+                        default=int(os.getenv("EMAIL_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                        help="Retries per message on transient SMTP errors")
+    args = parser.parse_args()
+
+    settings = get_smtp_settings()
+    if args.concurrency:
+        settings["size"] = args.concurrency
+    pool = SMTPConnectionPool(**settings)
+    db = SessionLocal()
+    try:
+        report = EmailService.send_digest(
+            db,
+            pool,
+            sender=os.getenv("EMAIL_FROM", "digest@localhost"),
+            min_score=args.min_score,
+            limit=args.limit,
+            rate_per_second=args.rate,
+            max_retries=args.max_retries,
+            unsubscribe_url=os.getenv("EMAIL_UNSUBSCRIBE_URL", DEFAULT_UNSUBSCRIBE_URL)
+        )
+    except Exception as e:
+        print(f"Error sending digest: {str(e)}")
+        sys.exit(1)
+    finally:
+        pool.close()
+        db.close()
+
+    if report["failed"]:
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 512
+
+# (body, etag, extra headers)
+CachedResponse = Tuple[bytes, str, Dict[str, str]]
+
+
+class CacheBackend(ABC):
+    """Storage interface for ResponseCache; implement this to plug in a shared cache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def get_version(self) -> int:
+        ...
+
+    @abstractmethod
+    def bump_version(self) -> int:
+        ...
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU with per-entry TTL.
+
+    The data version lives in this process only, so writes made by a separate
+    ingestion worker become visible here after at most one TTL.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_version(self) -> int:
+        return self._version
+
+    def bump_version(self) -> int:
+        with self._lock:
+            self._version += 1
+            # Entries keyed on older versions can never be hit again
+            self._entries.clear()
+            return self._version
+
+
+class ResponseCache:
+    """Caches serialized API responses keyed on request parameters and the data version."""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def _versioned(self, key: str) -> str:
+        return f"v{self.backend.get_version()}:{key}"
+
+    def get(self, key: str) -> Tuple[str, Optional[CachedResponse]]:
+        """Look up a response; returns the versioned key to pass to set() on a miss.
+
+        The version is read here, before the caller queries the database, so a
+        response built while invalidate() runs is stored under the old version
+        and never served.
+        """
+        versioned = self._versioned(key)
+        if not self.enabled:
+            return versioned, None
+        return versioned, self.backend.get(versioned)
+
+    def set(self, versioned_key: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        value = (body, etag, headers or {})
+        if self.enabled:
+            self.backend.set(versioned_key, value)
+        return value
+
+    def invalidate(self) -> None:
+        """Bump the data version; called whenever stories are written."""
+        self.backend.bump_version()
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def cached_response(request: Request, cached: CachedResponse) -> Response:
+    """Build the response for a cached entry, answering 304 when the client's ETag matches."""
+    body, etag, headers = cached
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    LRUCacheBackend(
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    ),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+)
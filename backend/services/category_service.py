@@ -0,0 +1,230 @@
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.story import Story
+from models.story_category import StoryCategory
+from .cache_service import response_cache
+
+DEFAULT_BATCH_SIZE = 10000
+
+# (id, title, description, published_at) of the stories to categorize. Undated
+# stories are filed under the time they were ingested.
+CATEGORY_SOURCE_COLUMNS = (Story.id, Story.title, Story.description,
+                           func.coalesce(Story.published_at, Story.created_at))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Keyword phrases per category, matched as whole words (case-insensitive). A
+# story gets every category with at least one match.
+CATEGORIES = {
+    "business": (
+        "enterprise", "enterprises", "adoption", "adopt", "adopts", "adopting", "small business",
+        "small businesses", "productivity", "return on investment", "roi", "deployment", "deploys",
+        "cio", "cios", "ceo", "ceos", "strategy", "revenue", "earnings", "customers", "corporate",
+    ),
+    "funding": (
+        "funding", "raises", "raised", "series a", "series b", "series c", "seed round", "valuation",
+        "investors", "investment", "venture capital", "acquires", "acquisition", "acquired", "ipo",
+    ),
+    "policy": (
+        "regulation", "regulations", "regulators", "regulatory", "ai act", "law", "laws", "lawsuit",
+        "copyright", "compliance", "governance", "privacy", "congress", "senate", "european union",
+        "ftc", "executive order", "policy", "policymakers",
+    ),
+    "research": (
+        "research", "researchers", "paper", "study", "benchmark", "benchmarks", "dataset", "datasets",
+        "arxiv", "scaling laws", "breakthrough", "university", "lab", "labs",
+    ),
+    "models": (
+        "llm", "llms", "large language model", "large language models", "language model",
+        "language models", "foundation model", "foundation models", "gpt", "chatgpt", "claude",
+        "gemini", "llama", "open source model", "open weights", "fine tuning", "reasoning model",
+    ),
+    "hardware": (
+        "chip", "chips", "chipmaker", "chipmakers", "gpu", "gpus", "semiconductor", "semiconductors",
+        "nvidia", "accelerator", "accelerators", "data center", "data centers", "tpu", "fabs",
+    ),
+    "robotics": (
+        "robot", "robots", "robotics", "humanoid", "humanoids", "self driving", "autonomous vehicles",
+        "drone", "drones",
+    ),
+    "products": (
+        "launches", "launched", "unveils", "app", "apps", "assistant", "assistants", "copilot",
+        "copilots", "chatbot", "chatbots", "plugin", "api", "new feature", "new features",
+    ),
+    "jobs": (
+        "jobs", "workers", "workforce", "hiring", "layoffs", "employees", "skills", "labor", "automation",
+    ),
+    "healthcare": (
+        "health", "healthcare", "medical", "medicine", "hospital", "hospitals", "drug", "drugs",
+        "patients", "clinical", "diagnosis",
+    ),
+    "safety": (
+        "ai safety", "alignment", "misinformation", "deepfake", "deepfakes", "bias", "security",
+        "cybersecurity", "risks",
+    ),
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton matching keyword phrases over word tokens.
+
+    All phrases of all categories are compiled into one trie with failure
+    links, so a text is classified in a single pass over its words whatever the
+    number of keywords. Outputs are bitmasks of category positions; tokens that
+    occur in no phrase reset the automaton without a dictionary walk.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        self.categories = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output = [0]
+        for bit, phrases in enumerate(keywords.values()):
+            for phrase in phrases:
+                node = 0
+                for token in tokenize(phrase):
+                    if token not in self._goto[node]:
+                        self._goto[node][token] = len(self._goto)
+                        self._goto.append({})
+                        self._output.append(0)
+                    node = self._goto[node][token]
+                self._output[node] |= 1 << bit
+        self._vocabulary = frozenset(token for edges in self._goto for token in edges)
+
+        # Breadth-first, so a node's failure target is final before its children need it
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] |= self._output[self._fail[child]]
+
+    def match(self, text: Optional[str]) -> int:
+        """Bitmask of the categories with a phrase in `text`."""
+        goto, fail, output, vocabulary = self._goto, self._fail, self._output, self._vocabulary
+        node = mask = 0
+        for token in tokenize(text):
+            if token not in vocabulary:
+                node = 0
+                continue
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            mask |= output[node]
+        return mask
+
+    def names(self, mask: int) -> List[str]:
+        return [name for bit, name in enumerate(self.categories) if mask >> bit & 1]
+
+
+class CategoryService:
+    @staticmethod
+    def categorize(texts: Sequence[Optional[str]]) -> List[List[str]]:
+        """Categories of each text, in CATEGORIES order."""
+        matcher = category_matcher
+        return [matcher.names(matcher.match(text)) for text in texts]
+
+    @staticmethod
+    def add_categories(db: Session, stories: Sequence[Tuple[int, Optional[str], Optional[str], Optional[datetime]]]) -> int:
+        """Categorize new (id, title, description, published_at) stories in the caller's transaction.
+
+        For stories without stored categories: bulk_upsert_stories calls it for the
+        rows it inserts, so stories and categories are committed together. Undated
+        stories are filed under the current (ingest) time. Does not commit; returns
+        the number of (story, category) rows added.
+        """
+        values = _category_values(stories, datetime.utcnow())
+        if values:
+            db.execute(insert(StoryCategory), values)
+        return len(values)
+
+    @staticmethod
+    def assign_categories(db: Session, story_ids: Sequence[int]) -> int:
+        """Categorize stories from their title and description and store the result.
+
+        Replaces any categories the stories had. Returns the number of
+        (story, category) rows written.
+        """
+        if not story_ids:
+            return 0
+        rows = db.query(*CATEGORY_SOURCE_COLUMNS)\
+                 .filter(Story.id.in_(list(story_ids)))\
+                 .all()
+        return _store_categories(db, rows)
+
+    @staticmethod
+    def categorize_all(db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, float]:
+        """Recategorize every story, walking the table in id order; returns counts and wall time."""
+        started = time.perf_counter()
+        stories = assigned = 0
+        last_id = 0
+        while True:
+            rows = db.query(*CATEGORY_SOURCE_COLUMNS)\
+                     .filter(Story.id > last_id)\
+                     .order_by(Story.id)\
+                     .limit(batch_size)\
+                     .all()
+            if not rows:
+                break
+            stories += len(rows)
+            assigned += _store_categories(db, rows)
+            last_id = rows[-1][0]
+        return {"stories": stories, "assigned": assigned, "seconds": time.perf_counter() - started}
+
+    @staticmethod
+    def get_category_counts(db: Session) -> List[Dict[str, int]]:
+        """Story count of every category (zero included), in CATEGORIES order."""
+        return _category_counts(db.execute(_counts_statement()).all())
+
+    @staticmethod
+    async def get_category_counts_async(db: AsyncSession) -> List[Dict[str, int]]:
+        """Async variant of get_category_counts."""
+        result = await db.execute(_counts_statement())
+        return _category_counts(result.all())
+
+
+def _store_categories(db: Session, rows) -> int:
+    """Categorize CATEGORY_SOURCE_COLUMNS rows and replace their stored categories."""
+    values = _category_values(rows, datetime.utcnow())
+    db.execute(delete(StoryCategory).where(StoryCategory.story_id.in_([row[0] for row in rows])))
+    if values:
+        db.execute(insert(StoryCategory), values)
+    db.commit()
+    response_cache.invalidate()
+    return len(values)
+
+
+def _category_values(rows, undated: datetime) -> List[Dict[str, Any]]:
+    """story_categories rows for (id, title, description, published_at) rows; `undated` stands in for a NULL date."""
+    categories = CategoryService.categorize([f"{title or ''} {description or ''}" for _, title, description, _ in rows])
+    return [{"story_id": story_id, "category": category, "published_at": published_at or undated}
+            for (story_id, _, _, published_at), names in zip(rows, categories)
+            for category in names]
+
+
+def _counts_statement():
+    return select(StoryCategory.category, func.count()).group_by(StoryCategory.category)
+
+
+def _category_counts(rows) -> List[Dict[str, int]]:
+    counts = dict(rows)
+    return [{"category": category, "stories": counts.get(category, 0)} for category in CATEGORIES]
+
+
+category_matcher = KeywordAutomaton(CATEGORIES)
@@ -0,0 +1,404 @@
+import asyncio
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import unescape
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+from dateutil.parser import isoparse
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_MAX_CONNECTIONS = 50
+DEFAULT_TIMEOUT_SECONDS = 20.0
+# NewsAPI pages requested per cycle while catching up to the watermark
+DEFAULT_NEWSAPI_MAX_PAGES = 5
+USER_AGENT = "ai-news-aggregator/1.0"
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ITUNES = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+
+
+def newsapi_params(query: str, page_size: int) -> Dict[str, Any]:
+    return {"q": query, "language": "en", "sort_by": "publishedAt", "page_size": page_size}
+
+
+class Connector(ABC):
+    """A news source fetched by the scheduler.
+
+    `fetch` returns articles normalized to the NewsAPI shape ingest_articles
+    expects: {"source": {"name"}, "title", "description", "url", "publishedAt"}.
+
+    `state` carries the source's sync state between cycles (watermark, cursor,
+    etag, last_modified; see SourceSyncState). Connectors read it to ask only for
+    new items and update it as they fetch; it is persisted once the cycle's
+    articles are stored.
+    """
+
+    kind = "connector"
+
+    def __init__(self, url: str, name: Optional[str] = None):
+        self.url = url
+        self.name = name
+        self.reset({})
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.url).hostname or ""
+
+    @property
+    def key(self) -> str:
+        return repr(self)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{self.url}"
+
+    def reset(self, state: Dict[str, Any]) -> None:
+        """Start a cycle from a stored sync state."""
+        self.state = dict(state)
+        self.bytes_received = 0
+        self.parse_seconds = 0.0
+        self.not_modified = False
+
+    def advance(self, articles: List[Dict[str, Any]], complete: bool = True) -> List[Dict[str, Any]]:
+        """Drop articles older than the watermark and move it to the newest one kept.
+
+        The article at the watermark itself (remembered as the cursor) is dropped
+        too, since `from=` style filters include their bound. With `complete`
+        False (the fetch stopped before reaching the watermark, leaving a gap of
+        unseen articles) the articles are filtered but the state is kept, so the
+        next cycle asks again from the same point.
+        """
+        watermark, cursor = self.state.get("watermark"), self.state.get("cursor")
+        fresh, newest, newest_url = [], watermark, cursor
+        for article in articles:
+            published_at = published(article)
+            if watermark and published_at:
+                if published_at < watermark or (published_at == watermark and article.get("url") == cursor):
+                    continue
+            fresh.append(article)
+            if published_at and (newest is None or published_at > newest):
+                newest, newest_url = published_at, article.get("url")
+        if complete:
+            self.state["watermark"], self.state["cursor"] = newest, newest_url
+        return fresh
+
+    @abstractmethod
+    async def fetch(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        ...
+
+
+class NewsAPIConnector(Connector):
+    """NewsAPI /v2/everything search; `client` (anything with get_everything) replaces the HTTP call."""
+
+    kind = "newsapi"
+
+    def __init__(self,
+                 query: str,
+                 page_size: int,
+                 api_key: Optional[str] = None,
+                 client: Optional[Any] = None,
+                 url: str = NEWSAPI_URL,
+                 max_pages: int = DEFAULT_NEWSAPI_MAX_PAGES):
+        super().__init__(url, "NewsAPI")
+        self.query = query
+        self.page_size = page_size
+        self.api_key = api_key
+        self.client = client
+        self.max_pages = max_pages
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Search for articles published since the watermark (the first page only on a first sync).
+
+        Results come newest first, so pages are requested until one reaches the
+        watermark or the results run out. If `max_pages` runs out first, the
+        articles fetched are returned but the watermark stays put: advancing it
+        would skip the unfetched articles between it and the oldest one fetched.
+        """
+        params = newsapi_params(self.query, self.page_size)
+        watermark = self.state.get("watermark")
+        if watermark:
+            params["from_param"] = watermark.strftime(NEWSAPI_DATE_FORMAT)
+
+        articles: List[Dict[str, Any]] = []
+        for page in range(1, self.max_pages + 1):
+            news = await self._get_page(client, dict(params, page=page))
+            batch = news.get('articles', [])
+            articles += batch
+            total = news.get("totalResults")
+            if (not watermark
+                    or len(batch) < self.page_size
+                    or (total is not None and page * self.page_size >= total)
+                    or any(published_at and published_at <= watermark
+                           for published_at in map(published, batch))):
+                return self.advance(articles)
+        return self.advance(articles, complete=False)
+
+    async def _get_page(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.client is not None:
+            news = await asyncio.to_thread(self.client.get_everything, **params)
+        else:
+            query = {"q": params["q"], "language": params["language"], "sortBy": params["sort_by"],
+                     "pageSize": params["page_size"], "page": params["page"]}
+            if "from_param" in params:
+                query["from"] = params["from_param"]
+            response = await client.get(self.url, params=query, headers={"X-Api-Key": self.api_key or ""})
+            response.raise_for_status()
+            self.bytes_received += len(response.content)
+            news = response.json()
+        if news.get("status", "ok") != "ok":
+            raise ValueError(news.get("message") or "NewsAPI request failed")
+        return news
+
+
+class FeedConnector(Connector):
+    """An RSS 2.0 or Atom feed, fetched with a conditional GET."""
+
+    kind = "feed"
+    podcast = False
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        headers = {}
+        if self.state.get("etag"):
+            headers["If-None-Match"] = self.state["etag"]
+        if self.state.get("last_modified"):
+            headers["If-Modified-Since"] = self.state["last_modified"]
+        response = await client.get(self.url, headers=headers)
+        if response.status_code == 304:
+            self.not_modified = True
+            return []
+        response.raise_for_status()
+        self.bytes_received = len(response.content)
+        self.state["etag"] = response.headers.get("ETag")
+        self.state["last_modified"] = response.headers.get("Last-Modified")
+
+        started = time.perf_counter()
+        articles = parse_feed(response.content, source=self.name, default_source=self.host,
+                              podcast=self.podcast, since=self.state.get("watermark"))
+        self.parse_seconds = time.perf_counter() - started
+        return self.advance(articles)
+
+
+class PodcastConnector(FeedConnector):
+    """A podcast RSS feed: episode summaries become descriptions, enclosures stand in for missing links."""
+
+    kind = "podcast"
+    podcast = True
+
+
+class FetchScheduler:
+    """Fetches many connectors concurrently over one HTTP client.
+
+    At most `per_host_limit` fetches run against any one host and
+    `max_connections` overall; each fetch is cut off after `timeout` seconds. A
+    failing source is reported and skipped without holding up the others.
+    """
+
+    def __init__(self,
+                 connectors: Sequence[Connector],
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.connectors = list(connectors)
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+    async def fetch_all(self, states: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Fetch every connector, each starting from its entry in `states` (keyed by connector key).
+
+        Returns {"articles", "errors" ({source: message}), "states" (updated sync
+        state of each source that succeeded), "sources", "not_modified", "bytes",
+        "parse_seconds", "seconds"}.
+        """
+        started = time.perf_counter()
+        states = states or {}
+        for connector in self.connectors:
+            connector.reset(states.get(connector.key, {}))
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+
+        async with httpx.AsyncClient(limits=limits,
+                                     timeout=self.timeout,
+                                     follow_redirects=True,
+                                     headers={"User-Agent": USER_AGENT}) as client:
+            async def run(connector: Connector) -> List[Dict[str, Any]]:
+                slots = host_slots.setdefault(connector.host, asyncio.Semaphore(self.per_host_limit))
+                async with slots:
+                    return await asyncio.wait_for(connector.fetch(client), self.timeout)
+
+            results = await asyncio.gather(*(run(connector) for connector in self.connectors),
+                                           return_exceptions=True)
+
+        articles, errors, new_states = [], {}, {}
+        for connector, result in zip(self.connectors, results):
+            if isinstance(result, BaseException):
+                errors[connector.key] = f"{type(result).__name__}: {result}"
+            else:
+                articles.extend(result)
+                new_states[connector.key] = connector.state
+        return {
+            "articles": articles,
+            "errors": errors,
+            "states": new_states,
+            "sources": len(self.connectors),
+            "not_modified": sum(1 for connector in self.connectors if connector.not_modified),
+            "bytes": sum(connector.bytes_received for connector in self.connectors),
+            "parse_seconds": sum(connector.parse_seconds for connector in self.connectors),
+            "seconds": time.perf_counter() - started,
+        }
+
+
+def parse_feed(content: bytes,
+               source: Optional[str] = None,
+               default_source: str = "Unknown",
+               podcast: bool = False,
+               since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Articles from an RSS 2.0 or Atom document, in the NewsAPI article shape.
+
+    Items dated before `since` are skipped before any of their text is processed.
+    """
+    root = ET.fromstring(content)
+    if root.tag == f"{ATOM}feed":
+        source = source or _text(root.find(f"{ATOM}title")) or default_source
+        articles = []
+        for entry in root.iter(f"{ATOM}entry"):
+            published_at = _iso_date(_text(entry.find(f"{ATOM}published")) or _text(entry.find(f"{ATOM}updated")))
+            if since is None or published_at is None or published_at >= since:
+                articles.append(_atom_article(entry, source, published_at))
+        return articles
+
+    channel = root.find("channel")
+    if channel is None:
+        raise ValueError(f"Unrecognized feed format: {root.tag}")
+    source = source or _text(channel.find("title")) or default_source
+    articles = []
+    for item in channel.iter("item"):
+        published_at = _rfc822_date(_text(item.find("pubDate")))
+        if since is None or published_at is None or published_at >= since:
+            articles.append(_rss_article(item, source, podcast, published_at))
+    return articles
+
+
+def published(article: Dict[str, Any]) -> Optional[datetime]:
+    """An article's publishedAt as a naive UTC datetime."""
+    return _iso_date(article.get("publishedAt"))
+
+
+def _rss_article(item: ET.Element, source: str, podcast: bool, published_at: Optional[datetime]) -> Dict[str, Any]:
+    url = _text(item.find("link"))
+    if not url:
+        guid = item.find("guid")
+        if guid is not None and guid.get("isPermaLink", "true") == "true":
+            url = _text(guid)
+    description = _text(item.find("description"))
+    if podcast:
+        description = _text(item.find(f"{ITUNES}summary")) or description
+        enclosure = item.find("enclosure")
+        if not url and enclosure is not None:
+            url = enclosure.get("url")
+    elif not description:
+        description = _text(item.find(f"{CONTENT}encoded"))
+    return _article(source, _text(item.find("title")), description, url, published_at)
+
+
+def _atom_article(entry: ET.Element, source: str, published_at: Optional[datetime]) -> Dict[str, Any]:
+    url = None
+    for link in entry.iter(f"{ATOM}link"):
+        if link.get("rel", "alternate") == "alternate":
+            url = link.get("href")
+            break
+    description = _text(entry.find(f"{ATOM}summary")) or _text(entry.find(f"{ATOM}content"))
+    return _article(source, _text(entry.find(f"{ATOM}title")), description, url, published_at)
+
+
+def _article(source: str,
+             title: Optional[str],
+             description: Optional[str],
+             url: Optional[str],
+             published_at: Optional[datetime]) -> Dict[str, Any]:
+    return {
+        "source": {"id": None, "name": source},
+        "title": _plain(title),
+        "description": _plain(description),
+        "url": url.strip() if url else None,
+        "publishedAt": published_at.strftime(NEWSAPI_DATE_FORMAT) if published_at else None,
+    }
+
+
+def _text(element: Optional[ET.Element]) -> Optional[str]:
+    if element is None or element.text is None:
+        return None
+    return element.text.strip() or None
+
+
+def _plain(text: Optional[str]) -> Optional[str]:
+    """Feed titles and summaries are often HTML; keep their text only."""
+    if not text:
+        return None
+    return SPACE_PATTERN.sub(" ", unescape(TAG_PATTERN.sub(" ", text))).strip() or None
+
+
+def _rfc822_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return _naive_utc(parsedate_to_datetime(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _iso_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return _naive_utc(isoparse(value))
+    except ValueError:
+        return None
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def feed_connectors(feeds: Sequence[str] = (), podcast_feeds: Sequence[str] = (),
+                    feeds_file: Optional[str] = None) -> List[Connector]:
+    """Connectors for configured feed URLs.
+
+    `feeds_file` lists one feed per line; lines starting with "podcast " are
+    podcast feeds, blank lines and "#" comments are ignored.
+    """
+    connectors: List[Connector] = [FeedConnector(url) for url in feeds]
+    connectors += [PodcastConnector(url) for url in podcast_feeds]
+    if feeds_file:
+        with open(feeds_file) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("podcast "):
+                    connectors.append(PodcastConnector(line[len("podcast "):].strip()))
+                else:
+                    connectors.append(FeedConnector(line))
+    return connectors
+
+
+def get_scheduler_settings() -> Dict[str, Any]:
+    return {
+        "per_host_limit": int(os.getenv("INGESTION_PER_HOST_LIMIT", DEFAULT_PER_HOST_LIMIT)),
+        "max_connections": int(os.getenv("INGESTION_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        "timeout": float(os.getenv("INGESTION_FETCH_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)),
+    }
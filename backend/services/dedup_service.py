@@ -0,0 +1,183 @@
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.story import Story
+from .story_service import StoryService
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+# Estimated Jaccard similarity of word-bigram sets above which two stories are duplicates
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_REBUILD_SECONDS = 24 * 3600
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text: str) -> List[str]:
+    """Lower-cased word bigrams of a text (single words for one-word texts)."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < 2:
+        return tokens
+    return [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+def story_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index mapping story text to a near-duplicate cluster.
+
+    Each story's word bigrams are reduced to a `num_perm` MinHash signature, split
+    into `bands`; stories sharing any band bucket are candidates, confirmed when
+    their signatures agree on at least `threshold` of positions (an estimate of
+    Jaccard similarity). The index covers stories published in the last
+    `window_days` and is rebuilt from the database every `rebuild_seconds`, or when
+    used against a different database.
+    """
+
+    def __init__(self,
+                 num_perm: int = DEFAULT_NUM_PERM,
+                 bands: int = DEFAULT_BANDS,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 window_days: int = DEFAULT_WINDOW_DAYS,
+                 rebuild_seconds: float = DEFAULT_REBUILD_SECONDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self.window_days = window_days
+        self.rebuild_seconds = rebuild_seconds
+        rng = np.random.default_rng(1)
+        # Multiply-shift hash family: h(x) = ((a * x + b) mod 2^64) >> 32, a odd
+        self._a = rng.integers(1, 2 ** 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._signatures: Dict[int, np.ndarray] = {}
+            self._clusters: Dict[int, int] = {}
+            self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+            self._loaded_at: Optional[float] = None
+            self._bind = None
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it has no words."""
+        grams = shingles(text)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+        with np.errstate(over="ignore"):
+            permuted = (self._a * hashes + self._b) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, -1)]
+
+    def find(self, signature: Optional[np.ndarray]) -> Optional[int]:
+        """Cluster id of the most similar indexed story above the threshold, if any."""
+        if signature is None:
+            return None
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        if not candidates:
+            return None
+        candidates = list(candidates)
+        stacked = np.stack([self._signatures[story_id] for story_id in candidates])
+        similarities = np.count_nonzero(stacked == signature, axis=1) / self.num_perm
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._clusters[candidates[best]]
+
+    def cluster_of(self, story_id: int) -> Optional[int]:
+        return self._clusters.get(story_id)
+
+    def add(self, story_id: int, text: str, cluster_id: Optional[int] = None) -> int:
+        """Index a story and return its cluster id.
+
+        Without an explicit `cluster_id`, the story joins the cluster of its closest
+        near-duplicate or starts a cluster of its own (keyed on its id).
+        """
+        signature = self.signature(text)
+        with self._lock:
+            if cluster_id is None:
+                cluster_id = self.find(signature)
+                if cluster_id is None:
+                    cluster_id = story_id
+            if signature is not None:
+                self._signatures[story_id] = signature
+                self._clusters[story_id] = cluster_id
+                for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                    buckets.setdefault(key, []).append(story_id)
+        return cluster_id
+
+    def rebuild(self, db: Session) -> None:
+        """Reload the index from stories published within the window.
+
+        Stories without a stored cluster id (inserted but not yet clustered) are
+        matched against the ones loaded before them.
+        """
+        since = datetime.utcnow() - timedelta(days=self.window_days)
+        rows = db.query(Story.id, Story.title, Story.description, Story.cluster_id)\
+                 .filter(Story.published_at >= since)\
+                 .order_by(Story.id)\
+                 .yield_per(10000)
+        self.clear()
+        for story_id, title, description, cluster_id in rows:
+            self.add(story_id, story_text(title, description), cluster_id)
+        self._bind = db.get_bind()
+        self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if (self._loaded_at is None
+                or self._bind is not db.get_bind()
+                or time.monotonic() - self._loaded_at > self.rebuild_seconds):
+            self.rebuild(db)
+
+
+class DedupService:
+    @staticmethod
+    def assign_clusters(db: Session, story_ids: Sequence[int], index: Optional[NearDuplicateIndex] = None) -> Dict[int, int]:
+        """Cluster newly inserted stories against the index and store their cluster ids.
+
+        Stories are indexed in id order, so duplicates within one batch cluster with
+        the earliest of them. Returns {story_id: cluster_id}.
+        """
+        index = near_duplicate_index if index is None else index
+        if not story_ids:
+            return {}
+        index.ensure_loaded(db)
+        rows = db.query(Story.id, Story.title, Story.description)\
+                 .filter(Story.id.in_(list(story_ids)))\
+                 .order_by(Story.id).all()
+        clusters = {}
+        for story_id, title, description in rows:
+            cluster_id = index.cluster_of(story_id)
+            if cluster_id is None:
+                cluster_id = index.add(story_id, story_text(title, description))
+            clusters[story_id] = cluster_id
+        StoryService.bulk_update_clusters(db, list(clusters), list(clusters.values()))
+        return clusters
+
+
+near_duplicate_index = NearDuplicateIndex(
+    threshold=float(os.getenv("DEDUP_THRESHOLD", DEFAULT_THRESHOLD)),
+    window_days=int(os.getenv("DEDUP_WINDOW_DAYS", DEFAULT_WINDOW_DAYS))
+)
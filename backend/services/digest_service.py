@@ -1,23 +1,165 @@
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, datetime, timedelta
+from html import escape
+from string import Formatter
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence
+import hashlib
+import json
 import os
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from models.digest import Digest
 from models.story import Story
 from .story_service import StoryService
 
+# Stories fetched per round trip when streaming an archive
+STREAM_BATCH_SIZE = 500
+# Rendered output is flushed to the client in chunks of about this many characters
+STREAM_CHUNK_SIZE = 16384
+
+DIGEST_INTRO = "Today's top stories about artificial intelligence and machine learning."
+NO_DESCRIPTION = "No description available."
+
+# Only what the exports render; content is never loaded
+EXPORT_COLUMNS = (Story.id, Story.title, Story.description, Story.url, Story.source,
+                  Story.interesting_score, Story.published_at)
+
 class DigestService:
     @staticmethod
     def generate_daily_digest(db: Session, min_score: float = 0.7, limit: int = 10) -> str:
         """Generate a markdown digest of top stories."""
-        stories = StoryService.get_stories(
+        stories = StoryService.get_cluster_representatives(
+            db=db,
+            min_score=min_score,
+            limit=limit
+        )
+        
+        return DigestService._create_markdown(stories)
+    
+    @staticmethod
+    async def generate_daily_digest_async(db: AsyncSession, min_score: float = 0.7, limit: int = 10) -> str:
+        """Async variant of generate_daily_digest."""
+        stories = await StoryService.get_cluster_representatives_async(
             db=db,
             min_score=min_score,
-            limit=limit,
-            skip=0
+            limit=limit
         )
         
         return DigestService._create_markdown(stories)
     
+    @staticmethod
+    def get_or_create_digest(db: Session,
+                             min_score: float = 0.7,
+                             limit: int = 10,
+                             digest_date: Optional[date] = None,
+                             stories: Optional[List[Story]] = None) -> Digest:
+        """Return the stored digest for (date, min_score, limit), rebuilding it only if its stories changed.
+
+        Callers that already selected the cluster representatives for these
+        parameters pass them as `stories`, so the digest is built from the same list.
+        """
+        digest_date = digest_date or date.today()
+        if stories is None:
+            stories = StoryService.get_cluster_representatives(db=db, min_score=min_score, limit=limit)
+        fingerprint = _story_fingerprint(stories)
+
+        digest = db.query(Digest).filter(
+            Digest.digest_date == digest_date,
+            Digest.min_score == min_score,
+            Digest.story_limit == limit
+        ).first()
+        if digest and digest.story_fingerprint == fingerprint:
+            return digest
+
+        if digest is None:
+            digest = Digest(digest_date=digest_date, min_score=min_score, story_limit=limit)
+            db.add(digest)
+        _fill_digest(digest, stories, fingerprint)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker materialized the same digest first
+            db.rollback()
+            return DigestService.get_or_create_digest(db, min_score, limit, digest_date, stories)
+        db.refresh(digest)
+        return digest
+
+    @staticmethod
+    async def get_or_create_digest_async(db: AsyncSession,
+                                         min_score: float = 0.7,
+                                         limit: int = 10,
+                                         digest_date: Optional[date] = None) -> Digest:
+        """Async variant of get_or_create_digest."""
+        digest_date = digest_date or date.today()
+        stories = await StoryService.get_cluster_representatives_async(db=db, min_score=min_score, limit=limit)
+        fingerprint = _story_fingerprint(stories)
+
+        result = await db.execute(select(Digest).filter(
+            Digest.digest_date == digest_date,
+            Digest.min_score == min_score,
+            Digest.story_limit == limit
+        ).limit(1))
+        digest = result.scalars().first()
+        if digest and digest.story_fingerprint == fingerprint:
+            return digest
+
+        if digest is None:
+            digest = Digest(digest_date=digest_date, min_score=min_score, story_limit=limit)
+            db.add(digest)
+        _fill_digest(digest, stories, fingerprint)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return await DigestService.get_or_create_digest_async(db, min_score, limit, digest_date)
+        await db.refresh(digest)
+        return digest
+
+    @staticmethod
+    def stream_archive(db: Session,
+                       since: datetime,
+                       min_score: float = 0.7,
+                       fmt: str = "markdown",
+                       until: Optional[datetime] = None) -> Iterator[str]:
+        """Render all stories published in [since, until) as a stream of text chunks.
+
+        Stories are read through a server-side cursor in STREAM_BATCH_SIZE batches and
+        rendered one at a time, so memory stays flat and the header is sent before the
+        first query completes.
+        """
+        renderer = get_renderer(fmt)
+        document = archive_document(since, until)
+        yield renderer.render_header(document)
+        result = db.execute(_archive_statement(since, until, min_score))
+        yield from _chunked(renderer.render_story(*story_contexts(idx, story, renderer.escape_html))
+                            for idx, story in enumerate(result, 1))
+        yield renderer.render_footer(document)
+
+    @staticmethod
+    async def stream_archive_async(db: AsyncSession,
+                                   since: datetime,
+                                   min_score: float = 0.7,
+                                   fmt: str = "markdown",
+                                   until: Optional[datetime] = None) -> AsyncIterator[str]:
+        """Async variant of stream_archive."""
+        renderer = get_renderer(fmt)
+        document = archive_document(since, until)
+        yield renderer.render_header(document)
+        result = await db.stream(_archive_statement(since, until, min_score))
+        parts, size, idx = [], 0, 0
+        async for story in result:
+            idx += 1
+            part = renderer.render_story(*story_contexts(idx, story, renderer.escape_html))
+            parts.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(parts)
+                parts, size = [], 0
+        if parts:
+            yield "".join(parts)
+        yield renderer.render_footer(document)
+
     @staticmethod
     def save_daily_digest(content: str, directory: str = "digests") -> str:
         """Save digest to a markdown file."""
@@ -38,47 +180,251 @@ class DigestService:
     @staticmethod
     def _create_markdown(stories: List[Story]) -> str:
         """Convert stories to markdown format."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Start with header
-        lines = [
-            f"# AI News Digest - {today}",
-            "",
-            "Today's top stories about artificial intelligence and machine learning.",
-            "",
-            "## Top Stories",
-            ""
-        ]
-        
-        # Add each story
-        for idx, story in enumerate(stories, 1):
-            # Format published date
-            pub_date = story.published_at.strftime("%Y-%m-%d %H:%M")
-            
-            # Add story details
-            lines.extend([
-                f"### {idx}. {story.title}",
-                "",
-                f"**Source:** {story.source}  ",
-                f"**Published:** {pub_date}  ",
-                f"**Interest Score:** {story.interesting_score:.2f}",
-                "",
-                f"{story.description or 'No description available.'}" if story.description else "",
-                "",
-                f"[Read more]({story.url})",
-                "",
-                "---",
-                ""
-            ])
-        
-        # Add footer
-        lines.extend([
-            "## About This Digest",
-            "",
-            "This digest is automatically generated based on story relevance and interest scores. ",
-            "Stories are selected based on their potential impact on business AI integration decisions.",
-            "",
-            f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        ])
-        
-        return "\n".join(lines)
\ No newline at end of file
+        return render_digest(stories, ["markdown"])["markdown"]
+
+
+def _story_fingerprint(stories: List[Story]) -> str:
+    """Identify the selected story set; changes when stories enter, leave or are rescored."""
+    key = ";".join(f"{story.id}:{story.interesting_score}" for story in stories)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def _fill_digest(digest: Digest, stories: List[Story], fingerprint: str) -> None:
+    """Render stories into a digest row."""
+    digest.content = DigestService._create_markdown(stories)
+    digest.story_count = len(stories)
+    digest.story_fingerprint = fingerprint
+    digest.generated_at = datetime.utcnow()
+
+def _archive_statement(since: datetime, until: Optional[datetime], min_score: float):
+    """Archive stories newest first, walking ix_stories_published_at_id; streamed in batches."""
+    stmt = select(*EXPORT_COLUMNS)\
+            .filter(Story.published_at >= since, Story.interesting_score >= min_score)\
+            .order_by(Story.published_at.desc(), Story.id.desc())
+    if until is not None:
+        stmt = stmt.filter(Story.published_at < until)
+    return stmt.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+
+def _chunked(parts: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Join small rendered parts into chunks of roughly `size` characters."""
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def _escaped(context: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: escape(value) if isinstance(value, str) else value for key, value in context.items()}
+
+
+class Template:
+    """A str.format-style template, parsed once and rendered by concatenation.
+
+    Supports `{field}` and `{field:spec}`; conversions (`!r`) are not supported.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if conversion:
+                raise ValueError(f"Template conversions are not supported: {source!r}")
+            self._parts.append((literal, field, spec or ""))
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out = []
+        for literal, field, spec in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(context[field], spec))
+        return "".join(out)
+
+
+class DigestRenderer:
+    """Renders a digest from header, per-story, empty and footer templates.
+
+    Header and footer see the document context (title, intro, rule, generated,
+    footer_note); story
+    templates see one story's context (idx, title, source, published, score,
+    description, url). With `escape_html`, string values are HTML-escaped first.
+    """
+
+    def __init__(self,
+                 name: str,
+                 media_type: str,
+                 extension: str,
+                 header: str = "",
+                 story: str = "",
+                 footer: str = "",
+                 empty: str = "",
+                 escape_html: bool = False):
+        self.name = name
+        self.media_type = media_type
+        self.extension = extension
+        self.escape_html = escape_html
+        self.header = Template(header)
+        self.story = Template(story)
+        self.footer = Template(footer)
+        self.empty = Template(empty)
+
+    def _document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return _escaped(document) if self.escape_html else document
+
+    def render_header(self, document: Dict[str, Any]) -> str:
+        return self.header.render(self._document(document))
+
+    def render_story(self, context: Dict[str, Any], html_context: Optional[Dict[str, Any]] = None) -> str:
+        return self.story.render(html_context if self.escape_html else context)
+
+    def render_empty(self, document: Dict[str, Any]) -> str:
+        return self.empty.render(self._document(document))
+
+    def render_footer(self, document: Dict[str, Any]) -> str:
+        return self.footer.render(self._document(document))
+
+
+class NdjsonRenderer(DigestRenderer):
+    """One JSON object per story and nothing else."""
+
+    def __init__(self):
+        super().__init__("ndjson", "application/x-ndjson", "ndjson")
+
+    def render_story(self, context: Dict[str, Any], html_context: Optional[Dict[str, Any]] = None) -> str:
+        return json.dumps({
+            "id": context["id"],
+            "title": context["title"],
+            "description": context["raw_description"],
+            "url": context["url"],
+            "source": context["source"],
+            "interesting_score": context["score"],
+            "published_at": context["published_at"],
+        }) + "\n"
+
+
+RENDERERS: Dict[str, DigestRenderer] = {}
+
+
+def register_renderer(renderer: DigestRenderer) -> DigestRenderer:
+    """Make a renderer available to render_digest, the exports and the email digest."""
+    RENDERERS[renderer.name] = renderer
+    return renderer
+
+
+def get_renderer(name: str) -> DigestRenderer:
+    try:
+        return RENDERERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown digest format: {name}") from None
+
+
+register_renderer(DigestRenderer(
+    "markdown", "text/markdown; charset=utf-8", "md",
+    header="# {title}\n\n{intro}\n\n## Top Stories\n\n",
+    story=("### {idx}. {title}\n\n"
+           "**Source:** {source}  \n"
+           "**Published:** {published}  \n"
+           "**Interest Score:** {score:.2f}\n\n"
+           "{description}\n\n"
+           "[Read more]({url})\n\n"
+           "---\n\n"),
+    footer=("## About This Digest\n\n"
+            "This digest is automatically generated based on story relevance and interest scores. \n"
+            "Stories are selected based on their potential impact on business AI integration decisions.\n\n"
+            "Generated on {generated}{footer_note}"),
+))
+
+register_renderer(DigestRenderer(
+    "html", "text/html; charset=utf-8", "html",
+    header=('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head>\n'
+            '<body style="margin:0;padding:0;background:#f4f4f5;">\n'
+            '<table role="presentation" width="100%" cellpadding="0" cellspacing="0"><tr><td align="center">\n'
+            '<table role="presentation" width="600" cellpadding="0" cellspacing="0" '
+            'style="background:#ffffff;font-family:Arial,sans-serif;color:#18181b;">\n'
+            '<tr><td style="padding:24px;"><h1 style="margin:0 0 8px;font-size:22px;">{title}</h1>'
+            '<p style="margin:0;color:#52525b;">{intro}</p></td></tr>\n'),
+    story=('<tr><td style="padding:16px 24px;border-top:1px solid #e4e4e7;">'
+           '<h2 style="margin:0 0 4px;font-size:17px;">'
+           '<a href="{url}" style="color:#1d4ed8;text-decoration:none;">{idx}. {title}</a></h2>'
+           '<p style="margin:0 0 8px;font-size:12px;color:#71717a;">'
+           '{source} &middot; {published} &middot; Interest score {score:.2f}</p>'
+           '<p style="margin:0;font-size:14px;line-height:1.5;">{description}</p></td></tr>\n'),
+    empty='<tr><td style="padding:16px 24px;border-top:1px solid #e4e4e7;">No stories today.</td></tr>\n',
+    footer=('<tr><td style="padding:24px;font-size:12px;color:#71717a;border-top:1px solid #e4e4e7;">'
+            'This digest is automatically generated based on story relevance and interest scores. '
+            'Generated on {generated}<br>{footer_note}</td></tr>\n'
+            '</table>\n</td></tr></table>\n</body></html>\n'),
+    escape_html=True,
+))
+
+register_renderer(DigestRenderer(
+    "text", "text/plain; charset=utf-8", "txt",
+    header="{title}\n{rule}\n\n{intro}\n\n",
+    story=("{idx}. {title}\n"
+           "   {source} | {published} | Interest score {score:.2f}\n"
+           "   {description}\n"
+           "   {url}\n\n"),
+    empty="No stories today.\n\n",
+    footer=("--\n"
+            "This digest is automatically generated based on story relevance and interest scores.\n"
+            "Generated on {generated}\n{footer_note}"),
+))
+
+register_renderer(NdjsonRenderer())
+
+
+def digest_document(title: Optional[str] = None, intro: str = DIGEST_INTRO, footer_note: str = "") -> Dict[str, Any]:
+    """Document-level context for a daily digest; the clock is read once per render."""
+    now = datetime.now()
+    title = title or f"AI News Digest - {now:%Y-%m-%d}"
+    return {
+        "title": title,
+        "intro": intro,
+        "rule": "=" * len(title),
+        "generated": f"{now:%Y-%m-%d %H:%M:%S}",
+        "footer_note": footer_note,
+    }
+
+
+def archive_document(since: datetime, until: Optional[datetime]) -> Dict[str, Any]:
+    start, end = f"{since:%Y-%m-%d}", f"{until or datetime.utcnow():%Y-%m-%d}"
+    return digest_document(f"AI News Archive - {start} to {end}", f"Stories published from {start} to {end}.")
+
+
+def story_contexts(idx: int, story, escape_html: bool = True):
+    """Template context for one story (a Story or a row with its columns), plain and HTML-escaped."""
+    context = {
+        "idx": idx,
+        "id": story.id,
+        "title": story.title or "",
+        "source": story.source or "",
+        "published": f"{story.published_at:%Y-%m-%d %H:%M}" if story.published_at else "",
+        "published_at": story.published_at.isoformat() if story.published_at else None,
+        "score": story.interesting_score or 0.0,
+        "description": story.description or NO_DESCRIPTION,
+        "raw_description": story.description,
+        "url": story.url or "",
+    }
+    return context, _escaped(context) if escape_html else None
+
+
+def render_digest(stories: Sequence, formats: Iterable[str] = ("markdown", "html", "text"),
+                  document: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Render stories in several formats from one pass over the list; returns {format: document}."""
+    renderers = [get_renderer(name) for name in formats]
+    document = document or digest_document()
+    needs_html = any(renderer.escape_html for renderer in renderers)
+    parts = {renderer.name: [renderer.render_header(document)] for renderer in renderers}
+
+    for idx, story in enumerate(stories, 1):
+        context, html_context = story_contexts(idx, story, needs_html)
+        for renderer in renderers:
+            parts[renderer.name].append(renderer.render_story(context, html_context))
+
+    for renderer in renderers:
+        if not stories:
+            parts[renderer.name].append(renderer.render_empty(document))
+        parts[renderer.name].append(renderer.render_footer(document))
+    return {name: "".join(rendered) for name, rendered in parts.items()}
@@ -0,0 +1,358 @@
+import os
+import queue
+import random
+import re
+import secrets
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import date, datetime
+from email.message import EmailMessage
+from html import escape
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.story import Story
+from models.subscriber import EmailSend, Subscriber
+from .digest_service import DigestService, digest_document, render_digest
+from .story_service import StoryService
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_RATE_PER_SECOND = 20.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_UNSUBSCRIBE_URL = "http://localhost:8000/unsubscribe?token={token}"
+# Send outcomes are committed every SEND_LOG_BATCH_SIZE sends or SEND_LOG_FLUSH_SECONDS,
+# whichever comes first, so a crashed run re-sends at most one batch on rerun
+SEND_LOG_BATCH_SIZE = 100
+SEND_LOG_FLUSH_SECONDS = 1.0
+
+# Markers left in the rendered digest and filled in per subscriber
+NAME_MARKER = "%%NAME%%"
+UNSUBSCRIBE_MARKER = "%%UNSUBSCRIBE_URL%%"
+MARKER_PATTERN = re.compile(f"({re.escape(NAME_MARKER)}|{re.escape(UNSUBSCRIBE_MARKER)})")
+
+EMAIL_INTRO = f"Hi {NAME_MARKER}, here are today's top stories about artificial intelligence and machine learning."
+EMAIL_FOOTER = f"You are receiving this because you subscribed to the AI News Digest. Unsubscribe: {UNSUBSCRIBE_MARKER}"
+
+
+def get_smtp_settings() -> Dict[str, Any]:
+    return {
+        "host": os.getenv("SMTP_HOST", "localhost"),
+        "port": int(os.getenv("SMTP_PORT", 25)),
+        "username": os.getenv("SMTP_USERNAME") or None,
+        "password": os.getenv("SMTP_PASSWORD") or None,
+        "starttls": os.getenv("SMTP_STARTTLS", "false").lower() == "true",
+        "size": int(os.getenv("SMTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        "timeout": float(os.getenv("SMTP_TIMEOUT_SECONDS", 30)),
+    }
+
+
+class SMTPConnectionPool:
+    """Up to `size` reusable SMTP connections, opened lazily.
+
+    Connections that fail with a disconnect or socket error are discarded and
+    reopened on next use; connections are returned to the pool after any other
+    error (smtplib resets the transaction on a refused message).
+    """
+
+    def __init__(self,
+                 host: str = "localhost",
+                 port: int = 25,
+                 size: int = DEFAULT_POOL_SIZE,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 starttls: bool = False,
+                 timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password or "")
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+        except socket.error as e:
+            # SMTPException subclasses OSError; only a dropped connection is unusable
+            if conn is not None and (isinstance(e, smtplib.SMTPServerDisconnected)
+                                     or not isinstance(e, smtplib.SMTPException)):
+                _close_quietly(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, socket.error):
+                _close_quietly(conn)
+
+
+def _close_quietly(conn: smtplib.SMTP) -> None:
+    try:
+        conn.close()
+    except socket.error:
+        pass
+
+
+class RateLimiter:
+    """Token bucket shared by the sending threads; a rate of 0 disables limiting."""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate = rate_per_second
+        self.burst = burst if burst is not None else max(1.0, rate_per_second)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now; callers past the bucket sleep off their debt in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a send failure is worth retrying: 4xx replies, disconnects and socket errors."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, socket.error)
+
+
+class PersonalizedBody:
+    """A rendered body split on its markers once, so each subscriber costs a join."""
+
+    def __init__(self, body: str, escape_html: bool = False):
+        self._parts = MARKER_PATTERN.split(body)
+        self.escape_html = escape_html
+
+    def render(self, values: Dict[str, str]) -> str:
+        if self.escape_html:
+            values = {marker: escape(value) for marker, value in values.items()}
+        parts = self._parts[:]
+        # Markers sit at the odd indexes of the split
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+
+class DigestEmail:
+    """A digest rendered once as text and HTML, turned into one message per subscriber."""
+
+    def __init__(self, subject: str, text: str, html: str, sender: str, unsubscribe_url: str = DEFAULT_UNSUBSCRIBE_URL):
+        self.subject = subject
+        self.sender = sender
+        self.unsubscribe_url = unsubscribe_url
+        self._text = PersonalizedBody(text)
+        self._html = PersonalizedBody(html, escape_html=True)
+
+    @classmethod
+    def render(cls, stories: Sequence, sender: str, unsubscribe_url: str = DEFAULT_UNSUBSCRIBE_URL) -> "DigestEmail":
+        document = digest_document(intro=EMAIL_INTRO, footer_note=EMAIL_FOOTER)
+        rendered = render_digest(stories, ("text", "html"), document)
+        return cls(document["title"], rendered["text"], rendered["html"], sender, unsubscribe_url)
+
+    def message_for(self, email: str, name: Optional[str], token: str) -> EmailMessage:
+        unsubscribe = self.unsubscribe_url.format(token=token)
+        values = {NAME_MARKER: name or "there", UNSUBSCRIBE_MARKER: unsubscribe}
+        message = EmailMessage()
+        message["Subject"] = self.subject
+        message["From"] = self.sender
+        message["To"] = email
+        message["List-Unsubscribe"] = f"<{unsubscribe}>"
+        message.set_content(self._text.render(values))
+        message.add_alternative(self._html.render(values), subtype="html")
+        return message
+
+
+class EmailService:
+    @staticmethod
+    def add_subscriber(db: Session, email: str, name: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(email=email, name=name, unsubscribe_token=secrets.token_hex(16))
+        db.add(subscriber)
+        db.commit()
+        db.refresh(subscriber)
+        return subscriber
+
+    @staticmethod
+    def send_digest(db: Session,
+                    pool: SMTPConnectionPool,
+                    sender: str,
+                    min_score: float = 0.7,
+                    limit: int = 10,
+                    digest_date: Optional[date] = None,
+                    rate_per_second: float = DEFAULT_RATE_PER_SECOND,
+                    max_retries: int = DEFAULT_MAX_RETRIES,
+                    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+                    unsubscribe_url: str = DEFAULT_UNSUBSCRIBE_URL) -> Dict[str, Any]:
+        """Send today's digest to every active subscriber not yet sent it.
+
+        The digest is rendered once; messages go out over `pool` from up to
+        `pool.size` threads, at most `rate_per_second` overall, retrying transient
+        failures up to `max_retries` times with jittered exponential backoff.
+        Outcomes are committed to email_sends in batches as sends complete, so a
+        rerun, even after a crash, only retries failed and new subscribers.
+        Returns a report with counts and sends per second.
+        """
+        stories = StoryService.get_cluster_representatives(db=db, min_score=min_score, limit=limit)
+        digest = DigestService.get_or_create_digest(db, min_score=min_score, limit=limit,
+                                                    digest_date=digest_date, stories=stories)
+        email = DigestEmail.render(stories, sender, unsubscribe_url)
+        # Sends run in worker threads while the session commits, so they only see plain values
+        digest_id, story_ids = digest.id, [story.id for story in stories]
+
+        already_sent = db.query(EmailSend.subscriber_id)\
+                         .filter(EmailSend.digest_id == digest_id, EmailSend.status == "sent")
+        recipients = db.query(Subscriber.id, Subscriber.email, Subscriber.name, Subscriber.unsubscribe_token)\
+                       .filter(Subscriber.active.is_(True), ~Subscriber.id.in_(already_sent))\
+                       .order_by(Subscriber.id).all()
+        skipped = db.query(Subscriber.id).filter(Subscriber.active.is_(True)).count() - len(recipients)
+
+        limiter = RateLimiter(rate_per_second)
+
+        def send(recipient) -> Dict[str, Any]:
+            subscriber_id, address, name, token = recipient
+            message = email.message_for(address, name, token)
+            status, error, attempt = _send_with_retry(pool, limiter, message, max_retries, backoff_seconds)
+            return {"digest_id": digest_id, "subscriber_id": subscriber_id, "status": status,
+                    "attempts": attempt, "error": error, "sent_at": datetime.utcnow()}
+
+        pending: List[Dict[str, Any]] = []
+        sent = failed = 0
+        marked = False
+        flushed_at = started = time.perf_counter()
+
+        def flush() -> None:
+            """Commit the outcomes completed so far; stories are marked used with the first send."""
+            nonlocal marked, flushed_at
+            _upsert_sends(db, pending)
+            if sent and not marked and story_ids:
+                db.query(Story).filter(Story.id.in_(story_ids))\
+                  .update({Story.used_in_email: True}, synchronize_session=False)
+                marked = True
+            db.commit()
+            pending.clear()
+            flushed_at = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            futures = [executor.submit(send, recipient) for recipient in recipients]
+            try:
+                for future in as_completed(futures):
+                    outcome = future.result()
+                    pending.append(outcome)
+                    if outcome["status"] == "sent":
+                        sent += 1
+                    else:
+                        failed += 1
+                    if (len(pending) >= SEND_LOG_BATCH_SIZE
+                            or time.perf_counter() - flushed_at >= SEND_LOG_FLUSH_SECONDS):
+                        flush()
+            except BaseException:
+                # Stop sending what could no longer be logged
+                for future in futures:
+                    future.cancel()
+                raise
+        if pending:
+            flush()
+        seconds = time.perf_counter() - started
+
+        report = {
+            "digest_id": digest_id,
+            "stories": len(story_ids),
+            "recipients": len(recipients),
+            "sent": sent,
+            "failed": failed,
+            "skipped": skipped,
+            "seconds": round(seconds, 3),
+            "sends_per_second": round(sent / seconds, 1) if seconds > 0 else 0.0,
+        }
+        print(f"Digest {digest_id}: sent {report['sent']}, failed {report['failed']}, "
+              f"skipped {report['skipped']} in {report['seconds']}s ({report['sends_per_second']} sends/s)")
+        return report
+
+
+def _send_with_retry(pool: SMTPConnectionPool,
+                     limiter: RateLimiter,
+                     message: EmailMessage,
+                     max_retries: int,
+                     backoff_seconds: float) -> Tuple[str, Optional[str], int]:
+    """(status, error, attempts) of delivering one message."""
+    attempt = 0
+    while True:
+        attempt += 1
+        limiter.acquire()
+        try:
+            with pool.connection() as conn:
+                conn.send_message(message)
+            return "sent", None, attempt
+        except (smtplib.SMTPException, socket.error) as e:
+            if attempt > max_retries or not is_transient(e):
+                return "failed", f"{type(e).__name__}: {e}"[:1000], attempt
+            time.sleep(backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+
+def _upsert_sends(db: Session, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(EmailSend).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmailSend.digest_id, EmailSend.subscriber_id],
+        set_={
+            "status": stmt.excluded.status,
+            "attempts": EmailSend.attempts + stmt.excluded.attempts,
+            "error": stmt.excluded.error,
+            "sent_at": stmt.excluded.sent_at,
+        }
+    )
+    db.execute(stmt)
@@ -0,0 +1,173 @@
+import math
+import re
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.story import Story
+from models.story_content import StoryContent, decompress_content
+from models.story_embedding import VECTOR_DTYPE, StoryEmbedding, pack_vector
+from .url_service import url_hash
+
+# Hashed feature space: 512 float16 dimensions is 1 KB per story. Fewer
+# dimensions make unrelated words collide often enough to blur short titles.
+EMBEDDING_DIM = 512
+# Article text past the lead adds cost more than signal
+MAX_CONTENT_CHARS = 2000
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset("a an and are as at be by for from has have in is it its of on or that the this "
+                      "to was were will with".split())
+
+# "Business AI adoption" topics a story is scored against. Each description is
+# embedded like a story and its vector is the topic centroid.
+TOPICS = {
+    "enterprise adoption": (
+        "enterprise companies adopt and deploy generative AI in production; businesses roll out AI "
+        "tools to employees; enterprise customers move AI pilots to deployment; AI adoption rates"
+    ),
+    "productivity and work": (
+        "AI productivity gains for workers and teams; automating workflows and business processes; "
+        "AI copilots and assistants at work; impact of automation on jobs, hiring and workforce skills"
+    ),
+    "small business": (
+        "small businesses and startups use AI to cut costs and grow revenue; affordable AI tools for "
+        "small business marketing, sales, customer service and operations"
+    ),
+    "strategy and returns": (
+        "return on investment of enterprise AI spending; AI strategy, budgets, costs and business value; "
+        "executives and CIOs plan AI transformation; company results from AI investments"
+    ),
+    "industry applications": (
+        "AI use cases in finance, banking, insurance, healthcare, retail, manufacturing, logistics and "
+        "legal industries; companies deploy machine learning models for customers"
+    ),
+    "governance and risk": (
+        "AI regulation and compliance for businesses; AI governance, data privacy, security and risk "
+        "management; companies adopt responsible AI policies"
+    ),
+}
+# Cosine similarity to the closest topic below which a story is unrelated (hash
+# collisions alone reach about this), and from which it is fully relevant
+RELEVANCE_FLOOR = 0.05
+RELEVANCE_SATURATION = 0.35
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def embedding_text(title: Optional[str], description: Optional[str], content: Optional[str] = None) -> str:
+    return " ".join(filter(None, (title, description, (content or "")[:MAX_CONTENT_CHARS])))
+
+
+def embed_texts(texts: Sequence[Optional[str]], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Embed texts as unit float16 rows of an (n, dim) matrix (all zeros for texts without words).
+
+    Words and word bigrams are hashed into `dim` signed buckets (the hashing
+    trick) with sublinear term frequencies. Nothing is fitted, so every process
+    embeds the same text to the same vector.
+    """
+    positions: List[int] = []
+    weights: List[float] = []
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for feature in tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature, count in counts.items():
+            hashed = zlib.crc32(feature.encode())
+            positions.append(row * dim + hashed % dim)
+            weights.append((1.0 + math.log(count)) * (1.0 if hashed & 0x80000000 else -1.0))
+
+    matrix = np.bincount(np.asarray(positions, dtype=np.int64), weights, minlength=len(texts) * dim)\
+               .astype(np.float64, copy=False)\
+               .reshape(len(texts), dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix.astype(VECTOR_DTYPE)
+
+
+@lru_cache(maxsize=1)
+def topic_centroids() -> np.ndarray:
+    """(topics, dim) float32 matrix of topic vectors."""
+    return embed_texts(list(TOPICS.values())).astype(np.float32)
+
+
+def relevance_scores(vectors: np.ndarray) -> np.ndarray:
+    """Relevance in [0, 1] of each embedded story: its best topic similarity, in one matrix multiply."""
+    if len(vectors) == 0:
+        return np.empty(0)
+    similarities = np.asarray(vectors, dtype=np.float32) @ topic_centroids().T
+    scores = (similarities.max(axis=1) - RELEVANCE_FLOOR) / (RELEVANCE_SATURATION - RELEVANCE_FLOOR)
+    return np.clip(scores, 0.0, 1.0).astype(np.float64)
+
+
+class EmbeddingService:
+    @staticmethod
+    def store_vectors(db: Session, story_ids: Sequence[int], vectors: np.ndarray) -> int:
+        """Upsert story vectors in one statement and return the row count."""
+        now = datetime.utcnow()
+        rows = [{"story_id": int(story_id), "vector": pack_vector(vector), "updated_at": now}
+                for story_id, vector in zip(story_ids, vectors)]
+        if not rows:
+            return 0
+        insert_fn = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert_fn(StoryEmbedding).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StoryEmbedding.story_id],
+            set_={"vector": stmt.excluded.vector, "updated_at": stmt.excluded.updated_at}
+        )
+        db.execute(stmt)
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def store_new_stories(db: Session, story_ids: Sequence[int], urls: Sequence[str], vectors: np.ndarray) -> int:
+        """Store vectors embedded before insert (one per URL) for the stories that were created."""
+        if not story_ids:
+            return 0
+        rows = {}
+        for key, vector in zip(map(url_hash, urls), vectors):
+            # bulk_upsert_stories keeps the first story per URL
+            if key is not None:
+                rows.setdefault(key, vector)
+        stored = db.query(Story.id, Story.url_hash).filter(Story.id.in_(list(story_ids))).all()
+        stored = [(story_id, key) for story_id, key in stored if key in rows]
+        return EmbeddingService.store_vectors(
+            db,
+            [story_id for story_id, _ in stored],
+            np.array([rows[key] for _, key in stored], dtype=VECTOR_DTYPE).reshape(-1, EMBEDDING_DIM)
+        )
+
+    @staticmethod
+    def embed_stories(db: Session, story_ids: Sequence[int]) -> np.ndarray:
+        """(Re-)embed stories from their title, description and article text, and store the vectors.
+
+        Returns the vectors in `story_ids` order (zero rows for unknown ids).
+        """
+        if not len(story_ids):
+            return np.zeros((0, EMBEDDING_DIM), dtype=VECTOR_DTYPE)
+        rows = db.query(Story.id, Story.title, Story.description, StoryContent.dictionary, StoryContent.body)\
+                 .outerjoin(StoryContent, StoryContent.story_id == Story.id)\
+                 .filter(Story.id.in_([int(story_id) for story_id in story_ids]))\
+                 .all()
+        texts = [
+            embedding_text(title, description,
+                           decompress_content(body, dictionary) if body is not None else None)
+            for _, title, description, dictionary, body in rows
+        ]
+        vectors = embed_texts(texts)
+        EmbeddingService.store_vectors(db, [row[0] for row in rows], vectors)
+
+        positions = {row[0]: i for i, row in enumerate(rows)}
+        ordered = np.zeros((len(story_ids), EMBEDDING_DIM), dtype=VECTOR_DTYPE)
+        for i, story_id in enumerate(story_ids):
+            if story_id in positions:
+                ordered[i] = vectors[positions[story_id]]
+        return ordered
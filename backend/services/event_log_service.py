@@ -0,0 +1,243 @@
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.engagement_rollup import EventLogOffset, StoryMetricsHourly
+from models.story import Story
+
+# Event type -> one-byte code stored in the log
+EVENT_TYPE_CODES = {"open": 0, "click": 1, "time_spent": 2, "feedback": 3}
+
+# Packed little-endian record: epoch ms, story id, type code, value (17 bytes)
+RECORD_DTYPE = np.dtype([("ts", "<i8"), ("story_id", "<i4"), ("type", "u1"), ("value", "<f4")])
+
+ROLLUP_COLUMNS = ("email_opens", "link_clicks", "time_spent", "feedback_sum", "feedback_count")
+
+SEGMENT_SUFFIX = ".events"
+DEFAULT_RETENTION_DAYS = 30
+MS_PER_HOUR = 3600 * 1000
+
+
+class EventLog:
+    """Append-only log of raw engagement events, one directory per UTC day.
+
+    Each process appends to its own segment file per day, so concurrent API workers
+    never interleave records. Records are fixed-width, so readers can resume from a
+    byte offset and ignore a partially written tail.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segment_id = f"{os.getpid()}-{int(time.time())}"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(events: Iterable[Dict], received_at: Optional[float] = None) -> bytes:
+        """Pack events into log records stamped with the receive time."""
+        events = list(events)
+        records = np.empty(len(events), dtype=RECORD_DTYPE)
+        records["ts"] = int((received_at if received_at is not None else time.time()) * 1000)
+        records["story_id"] = [event["story_id"] for event in events]
+        records["type"] = [EVENT_TYPE_CODES[event["type"]] for event in events]
+        records["value"] = [event.get("value", 1) for event in events]
+        return records.tobytes()
+
+    def segment_path(self, day: date) -> str:
+        return os.path.join(self.directory, day.isoformat(), f"{self._segment_id}{SEGMENT_SUFFIX}")
+
+    def append(self, records: bytes) -> None:
+        """Append packed records to today's segment for this process."""
+        if not records:
+            return
+        path = self.segment_path(datetime.utcnow().date())
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab") as segment:
+                segment.write(records)
+
+    def days(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def segments(self) -> List[str]:
+        """All segment paths, relative to the log directory, oldest day first."""
+        segments = []
+        for day in self.days():
+            for name in sorted(os.listdir(os.path.join(self.directory, day))):
+                if name.endswith(SEGMENT_SUFFIX):
+                    segments.append(os.path.join(day, name))
+        return segments
+
+    def read(self, segment: str, offset: int = 0) -> np.ndarray:
+        """Complete records of a segment from a byte offset on."""
+        path = os.path.join(self.directory, segment)
+        complete = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        if complete <= 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return np.frombuffer(f.read(complete), dtype=RECORD_DTYPE)
+
+
+class EventRollupService:
+    @staticmethod
+    def rollup(db: Session, log: EventLog) -> Dict[str, float]:
+        """Fold new log records into story_metrics_hourly.
+
+        Reads every segment from the offset stored in event_log_offsets and writes the
+        hourly increments and the new offsets in one transaction, so each record is
+        counted once even if a run fails halfway. Records for story ids that don't
+        exist are skipped, but their offsets still advance. Run a single rollup job at a time.
+        """
+        started = time.perf_counter()
+        offsets = dict(db.query(EventLogOffset.segment, EventLogOffset.offset))
+        chunks, new_offsets = [], {}
+        for segment in log.segments():
+            offset = offsets.get(segment, 0)
+            records = log.read(segment, offset)
+            if len(records):
+                chunks.append(records)
+                new_offsets[segment] = offset + records.nbytes
+
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD_DTYPE)
+        rows = hourly_rows(_known_story_records(db, records))
+        _upsert_hourly(db, rows)
+        _store_offsets(db, new_offsets)
+        db.commit()
+
+        stats = {
+            "events": len(records),
+            "rows": len(rows),
+            "seconds": time.perf_counter() - started,
+        }
+        print(f"Rolled up {stats['events']} events into {stats['rows']} hourly rows in {stats['seconds']:.3f}s")
+        return stats
+
+    @staticmethod
+    def story_totals(db: Session, column: str = "link_clicks", days: int = 7,
+                     limit: Optional[int] = None) -> Dict[int, float]:
+        """Per-story total of one rollup column over the last `days` days, largest first."""
+        since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+        total = func.sum(getattr(StoryMetricsHourly, column)).label("total")
+        query = db.query(StoryMetricsHourly.story_id, total)\
+                  .filter(StoryMetricsHourly.hour >= since)\
+                  .group_by(StoryMetricsHourly.story_id)\
+                  .order_by(total.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return {story_id: value for story_id, value in query}
+
+    @staticmethod
+    def prune(db: Session, log: EventLog, retention_days: int = DEFAULT_RETENTION_DAYS) -> int:
+        """Delete day directories older than the retention window once fully rolled up."""
+        cutoff = (datetime.utcnow().date() - timedelta(days=retention_days)).isoformat()
+        offsets = dict(db.query(EventLogOffset.segment, EventLogOffset.offset))
+        removed = 0
+        for day in log.days():
+            if day >= cutoff:
+                continue
+            segments = [segment for segment in log.segments() if segment.startswith(day + os.sep)]
+            if any(offsets.get(segment, 0) < os.path.getsize(os.path.join(log.directory, segment))
+                   for segment in segments):
+                continue
+            shutil.rmtree(os.path.join(log.directory, day))
+            if segments:
+                db.query(EventLogOffset).filter(EventLogOffset.segment.in_(segments))\
+                  .delete(synchronize_session=False)
+            removed += 1
+        db.commit()
+        return removed
+
+
+def hourly_rows(records: np.ndarray) -> List[Dict]:
+    """Aggregate raw records into one row per (story, hour)."""
+    if len(records) == 0:
+        return []
+    hours = records["ts"] // MS_PER_HOUR
+    keys = np.stack([records["story_id"].astype(np.int64), hours])
+    unique_keys, inverse = np.unique(keys, axis=1, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups = unique_keys.shape[1]
+    values = records["value"].astype(np.float64)
+    types = records["type"]
+
+    def total(code, weights=None):
+        mask = (types == code).astype(np.float64)
+        return np.bincount(inverse, weights=mask * weights if weights is not None else mask,
+                           minlength=groups)
+
+    columns = {
+        "email_opens": total(EVENT_TYPE_CODES["open"], values),
+        "link_clicks": total(EVENT_TYPE_CODES["click"], values),
+        "time_spent": total(EVENT_TYPE_CODES["time_spent"], values),
+        "feedback_sum": total(EVENT_TYPE_CODES["feedback"], values),
+        "feedback_count": total(EVENT_TYPE_CODES["feedback"]),
+    }
+    rows = []
+    for i in range(groups):
+        row = {
+            "story_id": int(unique_keys[0, i]),
+            "hour": datetime.utcfromtimestamp(int(unique_keys[1, i]) * 3600),
+        }
+        for column, totals in columns.items():
+            row[column] = float(totals[i]) if column in ("time_spent", "feedback_sum") else int(round(totals[i]))
+        rows.append(row)
+    return rows
+
+
+def _known_story_records(db: Session, records: np.ndarray) -> np.ndarray:
+    """Drop records whose story no longer exists (or never did) so the upsert keeps its foreign key."""
+    if len(records) == 0:
+        return records
+    story_ids = np.unique(records["story_id"]).tolist()
+    known = [story_id for story_id, in db.query(Story.id).filter(Story.id.in_(story_ids))]
+    mask = np.isin(records["story_id"], known)
+    if not mask.all():
+        print(f"Skipped {int((~mask).sum())} events for unknown stories")
+    return records[mask]
+
+
+def _insert_for(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def _upsert_hourly(db: Session, rows: List[Dict]) -> None:
+    if not rows:
+        return
+    stmt = _insert_for(db)(StoryMetricsHourly).values(rows)
+    updates = {column: getattr(StoryMetricsHourly, column) + getattr(stmt.excluded, column)
+               for column in ROLLUP_COLUMNS}
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StoryMetricsHourly.story_id, StoryMetricsHourly.hour],
+        set_=updates
+    )
+    db.execute(stmt)
+
+
+def _store_offsets(db: Session, offsets: Dict[str, int]) -> None:
+    if not offsets:
+        return
+    stmt = _insert_for(db)(EventLogOffset).values(
+        [{"segment": segment, "offset": offset} for segment, offset in offsets.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EventLogOffset.segment],
+        set_={"offset": stmt.excluded.offset, "updated_at": datetime.utcnow()}
+    )
+    db.execute(stmt)
+
+
+def get_event_log() -> Optional[EventLog]:
+    """The configured event log, or None when EVENT_LOG_DIR is set to an empty string."""
+    directory = os.getenv("EVENT_LOG_DIR", "event_log")
+    return EventLog(directory) if directory else None
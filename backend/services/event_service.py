@@ -0,0 +1,193 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal
+from .event_log_service import EventLog, get_event_log
+from .story_service import StoryService
+
+# Event type -> increment column it feeds
+EVENT_COLUMNS = {
+    "open": "email_opens",
+    "click": "link_clicks",
+    "time_spent": "time_spent",
+    "feedback": "feedback_sum",
+}
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_FLUSH_THRESHOLD = 5000
+DEFAULT_MAX_PENDING = 50000
+DEFAULT_MAX_LOG_BYTES = 64 * 1024 * 1024
+
+
+class EventBuffer:
+    """Write-behind buffer aggregating engagement events per story.
+
+    Memory is bounded by the number of distinct stories pending (not events): each
+    story holds one small dict of running totals. A background task flushes them as
+    one bulk increment every `flush_interval` seconds, or sooner once
+    `flush_threshold` stories are pending. Past `max_pending` stories, add() refuses
+    new events so callers can shed load.
+
+    With an `event_log`, the raw events are also kept as packed records (bounded by
+    `max_log_bytes`) and appended to the log on each flush, for the hourly rollups.
+    """
+
+    def __init__(self,
+                 session_factory=SessionLocal,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 event_log: Optional[EventLog] = None,
+                 max_log_bytes: int = DEFAULT_MAX_LOG_BYTES):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_pending = max_pending
+        self.event_log = event_log
+        self.max_log_bytes = max_log_bytes
+        self._pending: Dict[int, Dict[str, float]] = {}
+        self._records: List[bytes] = []
+        self._records_size = 0
+        self._lock = threading.Lock()
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.events_accepted = 0
+        self.events_flushed = 0
+
+    def add(self, events: Iterable[Dict]) -> bool:
+        """Aggregate events into the buffer; returns False if the buffer is full."""
+        records = None
+        if self.event_log is not None:
+            events = list(events)
+            records = EventLog.encode(events, time.time())
+
+        with self._lock:
+            if len(self._pending) >= self.max_pending or self._records_size >= self.max_log_bytes:
+                return False
+            if records:
+                self._records.append(records)
+                self._records_size += len(records)
+            accepted = 0
+            for event in events:
+                totals = self._pending.get(event["story_id"])
+                if totals is None:
+                    totals = self._pending[event["story_id"]] = {}
+                column = EVENT_COLUMNS[event["type"]]
+                totals[column] = totals.get(column, 0) + event.get("value", 1)
+                if column == "feedback_sum":
+                    totals["feedback_count"] = totals.get("feedback_count", 0) + 1
+                totals["events"] = totals.get("events", 0) + 1
+                accepted += 1
+            self.events_accepted += accepted
+            pending = len(self._pending)
+
+        if pending >= self.flush_threshold and self._flush_requested is not None:
+            self._flush_requested.set()
+        return True
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _drain(self) -> Dict[int, Dict[str, float]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _drain_records(self) -> bytes:
+        with self._lock:
+            records, self._records, self._records_size = self._records, [], 0
+        return b"".join(records)
+
+    def _restore_records(self, records: bytes) -> None:
+        with self._lock:
+            self._records.insert(0, records)
+            self._records_size += len(records)
+
+    def _restore(self, pending: Dict[int, Dict[str, float]]) -> None:
+        """Merge totals from a failed flush back in, within the memory bound."""
+        with self._lock:
+            for story_id, totals in pending.items():
+                current = self._pending.get(story_id)
+                if current is None:
+                    if len(self._pending) >= self.max_pending:
+                        continue
+                    self._pending[story_id] = totals
+                else:
+                    for column, value in totals.items():
+                        current[column] = current.get(column, 0) + value
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write all pending totals as one bulk increment; returns stories written."""
+        if self.event_log is not None:
+            records = self._drain_records()
+            try:
+                self.event_log.append(records)
+            except Exception:
+                self._restore_records(records)
+                raise
+
+        pending = self._drain()
+        if not pending:
+            return 0
+
+        session = db or self.session_factory()
+        try:
+            written = StoryService.increment_story_metrics_bulk(session, pending)
+        except Exception:
+            session.rollback()
+            self._restore(pending)
+            raise
+        finally:
+            if db is None:
+                session.close()
+        self.events_flushed += sum(totals.get("events", 0) for totals in pending.values())
+        return written
+
+    async def run(self) -> None:
+        """Flush on the interval or when the threshold is hit, off the event loop."""
+        self._flush_requested = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"ERROR flushing engagement events: {str(e)}")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_stories": self.pending_count(),
+            "events_accepted": self.events_accepted,
+            "events_flushed": self.events_flushed,
+            "log_bytes_pending": self._records_size,
+        }
+
+
+event_buffer = EventBuffer(
+    flush_interval=float(os.getenv("EVENT_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)),
+    flush_threshold=int(os.getenv("EVENT_FLUSH_THRESHOLD", DEFAULT_FLUSH_THRESHOLD)),
+    max_pending=int(os.getenv("EVENT_BUFFER_MAX_PENDING", DEFAULT_MAX_PENDING)),
+    event_log=get_event_log()
+)
@@ -0,0 +1,365 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import and_, bindparam, exists, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.content_job import ContentJob
+from models.story import Story
+from models.story_content import StoryContent
+from .connector_service import USER_AGENT
+from .embedding_service import EmbeddingService
+from .story_service import StoryService
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_PROCESSES = min(4, os.cpu_count() or 1)
+DEFAULT_TIMEOUT_SECONDS = 20.0
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+# Seconds before a transiently failed job may be claimed again (doubled per attempt)
+RETRY_DELAY_SECONDS = 300
+# Pages are read up to this size; the rest is ignored
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+MAX_CONTENT_CHARS = 100000
+# Outside <article>/<main>, shorter blocks are assumed to be boilerplate
+MIN_PARAGRAPH_CHARS = 40
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form",
+             "button", "iframe", "select"}
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+             "track", "wbr"}
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text blocks, noting whether each sits inside <article> or <main>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[Tuple[str, str]] = []  # (scope, text)
+        self._skip = 0
+        self._article = 0
+        self._main = 0
+        self._current: Optional[List[str]] = None
+
+    def _flush(self) -> None:
+        if self._current is not None:
+            text = " ".join("".join(self._current).split())
+            if text:
+                scope = "article" if self._article else "main" if self._main else "page"
+                self.blocks.append((scope, text))
+            self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br" and self._current is not None:
+                self._current.append(" ")
+        elif tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == "article":
+            self._article += 1
+        elif tag == "main":
+            self._main += 1
+        elif tag in BLOCK_TAGS and not self._skip:
+            self._flush()
+            self._current = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+        elif tag == "article":
+            self._flush()
+            self._article = max(0, self._article - 1)
+        elif tag == "main":
+            self._flush()
+            self._main = max(0, self._main - 1)
+
+    def handle_data(self, data):
+        if not self._skip and self._current is not None:
+            self._current.append(data)
+
+
+def extract_text(html: str) -> Optional[str]:
+    """Main text of an article page, one paragraph per line, or None if none was found.
+
+    Prefers the blocks inside <article>, then <main>; otherwise keeps the page's
+    paragraphs long enough to be prose. Navigation, headers, footers, asides,
+    forms and scripts are dropped. Runs in worker processes, so it must stay a
+    module-level function of plain values.
+    """
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except AssertionError:
+        # HTMLParser gives up on some badly broken markup; keep what was read
+        pass
+    parser._flush()
+
+    for scope in ("article", "main"):
+        blocks = [text for block_scope, text in parser.blocks if block_scope == scope]
+        if blocks:
+            break
+    else:
+        blocks = [text for _, text in parser.blocks if len(text) >= MIN_PARAGRAPH_CHARS]
+    if not blocks:
+        return None
+    return "\n\n".join(blocks)[:MAX_CONTENT_CHARS]
+
+
+class FetchError(Exception):
+    def __init__(self, message: str, retry: bool):
+        super().__init__(message)
+        self.retry = retry
+
+
+async def fetch_pages(urls: Sequence[str],
+                      concurrency: int = DEFAULT_CONCURRENCY,
+                      per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                      timeout: float = DEFAULT_TIMEOUT_SECONDS) -> List[Any]:
+    """Download HTML pages concurrently; each result is the page text or a FetchError.
+
+    At most `concurrency` requests are in flight and `per_host_limit` against any
+    one host. Bodies are read up to MAX_PAGE_BYTES. Errors never escape: network
+    errors are retryable FetchErrors, anything else a permanent one.
+    """
+    host_slots: Dict[str, asyncio.Semaphore] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits,
+                                 timeout=timeout,
+                                 follow_redirects=True,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        async def fetch(url: str):
+            if not url:
+                return FetchError("Story has no URL", retry=False)
+            slots = host_slots.setdefault(urlsplit(url).hostname or "", asyncio.Semaphore(per_host_limit))
+            async with slots:
+                try:
+                    return await asyncio.wait_for(_fetch_page(client, url), timeout)
+                except FetchError as e:
+                    return e
+                except httpx.InvalidURL as e:
+                    return FetchError(f"InvalidURL: {e}", retry=False)
+                except (httpx.HTTPError, asyncio.TimeoutError, socket.error) as e:
+                    return FetchError(f"{type(e).__name__}: {e}", retry=True)
+                except Exception as e:
+                    # e.g. LookupError for a bogus charset: fetching again will not help, and
+                    # letting it escape would fail the whole batch and leave its leases to expire
+                    return FetchError(f"{type(e).__name__}: {e}", retry=False)
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+async def _fetch_page(client: httpx.AsyncClient, url: str) -> str:
+    async with client.stream("GET", url) as response:
+        if response.status_code >= 400:
+            # Rate limits, timeouts and server errors may clear up; other client errors will not
+            retry = response.status_code in (408, 429) or response.status_code >= 500
+            raise FetchError(f"HTTP {response.status_code}", retry=retry)
+        content_type = response.headers.get("Content-Type", "text/html")
+        if "html" not in content_type:
+            raise FetchError(f"Not an HTML page: {content_type}", retry=False)
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) >= MAX_PAGE_BYTES:
+                break
+        return bytes(body[:MAX_PAGE_BYTES]).decode(response.encoding or "utf-8", errors="replace")
+
+
+class ExtractionService:
+    @staticmethod
+    def enqueue(db: Session, story_ids: Sequence[int]) -> None:
+        """Queue stories for extraction (already queued ones are left alone)."""
+        if not story_ids:
+            return
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        db.execute(
+            insert(ContentJob)
+            .values([{"story_id": story_id, "status": "pending", "attempts": 0} for story_id in story_ids])
+            .on_conflict_do_nothing()
+        )
+        db.commit()
+
+    @staticmethod
+    def enqueue_missing(db: Session) -> int:
+        """Queue every story without content that has no job yet; returns how many were queued."""
+        query = select(Story.id).where(
+            ~exists().where(StoryContent.story_id == Story.id),
+            ~exists().where(ContentJob.story_id == Story.id)
+        )
+        story_ids = db.execute(query).scalars().all()
+        ExtractionService.enqueue(db, story_ids)
+        return len(story_ids)
+
+    @staticmethod
+    def claim(db: Session,
+              worker: str,
+              limit: int = DEFAULT_BATCH_SIZE,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS,
+              max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> List[Tuple[int, str]]:
+        """Claim up to `limit` pending jobs for `worker` and return their (story_id, url).
+
+        On Postgres the candidate rows are locked with FOR UPDATE SKIP LOCKED, so
+        concurrent workers pass over each other's rows instead of waiting. The
+        claim itself is a lease: a job whose worker dies is claimable again once
+        `lease_seconds` have passed. Every claim counts as an attempt, so a job
+        that keeps killing its worker is failed after `max_attempts` claims.
+        """
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=lease_seconds)
+        lease_free = or_(ContentJob.lease_until.is_(None), ContentJob.lease_until < now)
+        claimable = and_(ContentJob.status == "pending", lease_free, ContentJob.attempts < max_attempts)
+
+        db.execute(
+            update(ContentJob)
+            .where(ContentJob.status == "pending", lease_free, ContentJob.attempts >= max_attempts)
+            .values(status="failed", worker=None, lease_until=None, updated_at=now,
+                    error="Lease expired on the last attempt")
+            .execution_options(synchronize_session=False)
+        )
+
+        candidates = db.execute(
+            select(ContentJob.story_id)
+            .where(claimable)
+            .order_by(ContentJob.story_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not candidates:
+            db.commit()
+            return []
+
+        # Re-checking `claimable` keeps the claim exclusive where SKIP LOCKED is unavailable (SQLite)
+        db.execute(
+            update(ContentJob)
+            .where(ContentJob.story_id.in_(candidates), claimable)
+            .values(worker=worker, lease_until=lease_until, attempts=ContentJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = db.execute(
+            select(ContentJob.story_id, Story.url)
+            .join(Story, Story.id == ContentJob.story_id)
+            .where(ContentJob.story_id.in_(candidates),
+                   ContentJob.worker == worker,
+                   ContentJob.lease_until == lease_until)
+            .order_by(ContentJob.story_id)
+        ).all()
+        db.commit()
+        return [(story_id, url) for story_id, url in claimed]
+
+    @staticmethod
+    def complete(db: Session,
+                 contents: Dict[int, str],
+                 failures: Dict[int, FetchError],
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        """Store extracted content and settle the claimed jobs in a few statements.
+
+        Transient failures go back to pending with a growing delay until
+        `max_attempts` is reached; other failures are final.
+        """
+        if contents:
+            StoryService.bulk_update_content(db, list(contents), list(contents.values()))
+            # Re-embed with the article text, which says more about the topic than the headline
+            EmbeddingService.embed_stories(db, list(contents))
+
+        now = datetime.utcnow()
+        attempts = dict(db.query(ContentJob.story_id, ContentJob.attempts)
+                          .filter(ContentJob.story_id.in_(list(failures))).all()) if failures else {}
+        rows = [{"b_id": story_id, "b_status": "done", "b_lease": None, "b_error": None}
+                for story_id in contents]
+        for story_id, error in failures.items():
+            tries = attempts.get(story_id, max_attempts)
+            if error.retry and tries < max_attempts:
+                rows.append({"b_id": story_id, "b_status": "pending",
+                             "b_lease": now + timedelta(seconds=RETRY_DELAY_SECONDS * 2 ** (tries - 1)),
+                             "b_error": str(error)})
+            else:
+                rows.append({"b_id": story_id, "b_status": "failed", "b_lease": None, "b_error": str(error)})
+        if rows:
+            table = ContentJob.__table__
+            db.execute(
+                update(table)
+                .where(table.c.story_id == bindparam("b_id"))
+                .values(status=bindparam("b_status"), lease_until=bindparam("b_lease"),
+                        error=bindparam("b_error"), worker=None, updated_at=now),
+                rows
+            )
+        db.commit()
+
+    @staticmethod
+    def run_batch(db: Session,
+                  worker: str,
+                  executor: Optional[Executor] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  concurrency: int = DEFAULT_CONCURRENCY,
+                  per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                  timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                  lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                  max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Dict[str, Any]:
+        """Claim a batch, fetch its pages concurrently, extract text in `executor` and store it.
+
+        `executor` should be a process pool (parsing is CPU-bound); without one,
+        pages are parsed in this process. Returns counts for the batch.
+        """
+        started = time.perf_counter()
+        jobs = ExtractionService.claim(db, worker, batch_size, lease_seconds, max_attempts)
+        report = {"claimed": len(jobs), "extracted": 0, "failed": 0, "fetch_seconds": 0.0, "parse_seconds": 0.0}
+        if not jobs:
+            return report
+
+        pages = asyncio.run(fetch_pages([url for _, url in jobs], concurrency, per_host_limit, timeout))
+        report["fetch_seconds"] = time.perf_counter() - started
+
+        failures = {story_id: page for (story_id, _), page in zip(jobs, pages) if isinstance(page, FetchError)}
+        fetched = [(story_id, page) for (story_id, _), page in zip(jobs, pages) if not isinstance(page, FetchError)]
+        parse_started = time.perf_counter()
+        htmls = [page for _, page in fetched]
+        if executor is not None:
+            # A few pages per task keeps pickling overhead low without starving any process
+            texts = list(executor.map(extract_text, htmls, chunksize=max(1, len(htmls) // (2 * DEFAULT_PROCESSES))))
+        else:
+            texts = [extract_text(html) for html in htmls]
+        report["parse_seconds"] = time.perf_counter() - parse_started
+
+        contents = {}
+        for (story_id, _), text in zip(fetched, texts):
+            if text:
+                contents[story_id] = text
+            else:
+                failures[story_id] = FetchError("No article text found", retry=False)
+        ExtractionService.complete(db, contents, failures, max_attempts)
+
+        report["extracted"] = len(contents)
+        report["failed"] = len(failures)
+        return report
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def get_extraction_settings() -> Dict[str, Any]:
+    return {
+        "batch_size": int(os.getenv("EXTRACTION_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        "concurrency": int(os.getenv("EXTRACTION_CONCURRENCY", DEFAULT_CONCURRENCY)),
+        "per_host_limit": int(os.getenv("EXTRACTION_PER_HOST_LIMIT", DEFAULT_PER_HOST_LIMIT)),
+        "timeout": float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)),
+        "lease_seconds": float(os.getenv("EXTRACTION_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+        "max_attempts": int(os.getenv("EXTRACTION_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+    }
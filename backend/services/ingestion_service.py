@@ -0,0 +1,185 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from newsapi import NewsApiClient
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal
+from .connector_service import (DEFAULT_NEWSAPI_MAX_PAGES, NEWSAPI_DATE_FORMAT, Connector, FetchScheduler,
+                                NewsAPIConnector, feed_connectors, get_scheduler_settings, newsapi_params)
+from .dedup_service import DedupService
+from .embedding_service import EmbeddingService, embed_texts, embedding_text
+from .extraction_service import ExtractionService
+from .scoring_service import ScoringService
+from .source_stats_service import source_stats_cache
+from .story_service import StoryService
+from .sync_state_service import SyncStateService
+
+DEFAULT_QUERY = 'artificial intelligence OR machine learning'
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_INTERVAL_SECONDS = 900
+
+
+class IngestionService:
+    @staticmethod
+    def get_client() -> NewsApiClient:
+        """Build a NewsAPI client from the environment."""
+        api_key = os.getenv("NEWS_API_KEY")
+        if not api_key:
+            raise ValueError("NEWS_API_KEY not found in environment variables")
+        return NewsApiClient(api_key=api_key)
+
+    @staticmethod
+    def fetch_articles(client: Any,
+                       query: str = DEFAULT_QUERY,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Fetch AI-related articles from NewsAPI (or any client exposing get_everything)."""
+        news = client.get_everything(**newsapi_params(query, page_size))
+        return news.get('articles', [])
+
+    @staticmethod
+    def ingest_articles(db: Session, articles: List[Dict[str, Any]]) -> int:
+        """Store new articles as stories in one bulk upsert and return how many were created.
+
+        The batch is embedded once, for relevance scoring and to store with the
+        new stories. Stories are categorized in the upsert's transaction, then
+        assigned near-duplicate clusters and queued for full-text extraction.
+        """
+        stories = [article_to_story(article) for article in articles
+                   if article.get('url') and article.get('title')]
+        vectors = embed_texts([embedding_text(story["title"], story["description"]) for story in stories])
+        source_stats_cache.ensure_fresh(db)
+        scores = ScoringService.score_story_dicts(stories, vectors)
+        for story, score in zip(stories, scores):
+            story["interesting_score"] = float(score)
+        new_ids = StoryService.bulk_upsert_stories(db, stories)
+        EmbeddingService.store_new_stories(db, new_ids, [story["url"] for story in stories], vectors)
+        DedupService.assign_clusters(db, new_ids)
+        ExtractionService.enqueue(db, new_ids)
+        return len(new_ids)
+
+    @staticmethod
+    def get_connectors(client: Optional[Any] = None,
+                       query: str = DEFAULT_QUERY,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> List[Connector]:
+        """NewsAPI (given a client or NEWS_API_KEY) plus the feeds configured in the environment."""
+        settings = get_ingestion_settings()
+        connectors: List[Connector] = []
+        api_key = os.getenv("NEWS_API_KEY")
+        if client is not None or api_key:
+            connectors.append(NewsAPIConnector(query, page_size, api_key=api_key, client=client,
+                                               max_pages=settings["newsapi_max_pages"]))
+        connectors += feed_connectors(settings["feeds"], settings["podcast_feeds"], settings["feeds_file"])
+        if not connectors:
+            raise ValueError("No ingestion sources configured: set NEWS_API_KEY or INGESTION_FEEDS")
+        return connectors
+
+    @staticmethod
+    def fetch_all(connectors: List[Connector],
+                  states: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Fetch every source concurrently (see FetchScheduler.fetch_all); raises only if all of them failed."""
+        result = asyncio.run(FetchScheduler(connectors, **get_scheduler_settings()).fetch_all(states))
+        for source, error in result["errors"].items():
+            print(f"ERROR fetching {source}: {error}")
+        if result["errors"] and len(result["errors"]) == result["sources"]:
+            raise RuntimeError(f"All {result['sources']} sources failed")
+        print(f"Received {len(result['articles'])} new articles from "
+              f"{result['sources'] - len(result['errors'])} sources in {result['seconds']:.2f}s "
+              f"({result['not_modified']} not modified, {result['bytes']} bytes, "
+              f"{result['parse_seconds'] * 1000:.1f} ms parsing)")
+        return result
+
+    @staticmethod
+    def run_ingestion(db: Session,
+                      client: Optional[Any] = None,
+                      query: str = DEFAULT_QUERY,
+                      page_size: int = DEFAULT_PAGE_SIZE,
+                      connectors: Optional[List[Connector]] = None) -> int:
+        """Run a single fetch-and-store cycle over all sources.
+
+        Each source resumes from its stored sync state, so only new items are
+        requested; the updated state is saved after the articles are stored.
+        Must not be called from a running event loop (the API runs it in a thread).
+        """
+        if connectors is None:
+            connectors = IngestionService.get_connectors(client, query=query, page_size=page_size)
+        states = SyncStateService.load(db, [connector.key for connector in connectors])
+        result = IngestionService.fetch_all(connectors, states)
+        created = IngestionService.ingest_articles(db, result["articles"])
+        SyncStateService.save(db, result["states"])
+        print(f"Stored {created} new stories")
+        return created
+
+    @staticmethod
+    def run_ingestion_cycle(client: Optional[Any] = None,
+                            query: str = DEFAULT_QUERY,
+                            page_size: int = DEFAULT_PAGE_SIZE,
+                            session_factory=SessionLocal) -> int:
+        """Run one ingestion cycle in its own session."""
+        db = session_factory()
+        try:
+            return IngestionService.run_ingestion(db, client=client, query=query, page_size=page_size)
+        finally:
+            db.close()
+
+
+async def run_ingestion_loop(interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+                             client: Optional[Any] = None,
+                             query: str = DEFAULT_QUERY,
+                             page_size: int = DEFAULT_PAGE_SIZE,
+                             session_factory=SessionLocal) -> None:
+    """Ingest articles every interval without blocking the event loop."""
+    while True:
+        try:
+            await asyncio.to_thread(
+                IngestionService.run_ingestion_cycle,
+                client,
+                query,
+                page_size,
+                session_factory
+            )
+        except Exception as e:
+            print(f"ERROR in ingestion loop: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+
+def get_ingestion_settings() -> Dict[str, Any]:
+    """Read ingestion settings from the environment."""
+    return {
+        "enabled": os.getenv("INGESTION_ENABLED", "false").lower() in ("1", "true", "yes"),
+        "interval_seconds": float(os.getenv("INGESTION_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS)),
+        "query": os.getenv("INGESTION_QUERY", DEFAULT_QUERY),
+        "page_size": int(os.getenv("INGESTION_PAGE_SIZE", DEFAULT_PAGE_SIZE)),
+        "newsapi_max_pages": int(os.getenv("INGESTION_NEWSAPI_MAX_PAGES", DEFAULT_NEWSAPI_MAX_PAGES)),
+        "feeds": _split_list(os.getenv("INGESTION_FEEDS", "")),
+        "podcast_feeds": _split_list(os.getenv("INGESTION_PODCAST_FEEDS", "")),
+        "feeds_file": os.getenv("INGESTION_FEEDS_FILE") or None,
+    }
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def article_to_story(article: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a NewsAPI-shaped article onto story columns (scored separately, in batch)."""
+    published_at = parse_published_at(article.get('publishedAt'))
+    return {
+        "title": article['title'],
+        "description": article.get('description'),
+        "url": article['url'],
+        "source": (article.get('source') or {}).get('name') or 'Unknown',
+        "published_at": published_at,
+    }
+
+
+def parse_published_at(value: Optional[str]) -> datetime:
+    """Parse a NewsAPI publishedAt timestamp, defaulting to now."""
+    if not value:
+        return datetime.utcnow()
+    try:
+        return datetime.strptime(value, NEWSAPI_DATE_FORMAT)
+    except ValueError:
+        return datetime.utcnow()
@@ -0,0 +1,197 @@
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from models.rescore_run import RescoreRun
+from models.source_stats import SourceStats
+from models.story import Story, StoryMetrics
+from models.story_embedding import StoryEmbedding, unpack_vectors
+from .embedding_service import EMBEDDING_DIM, EmbeddingService, embed_texts, embedding_text, relevance_scores
+from .source_stats_service import source_stats_cache
+from .story_service import (
+    FRESHNESS_WINDOW_HOURS,
+    StoryService,
+    get_historical_engagement,
+    get_podcast_engagement,
+    get_source_credibility,
+    weighted_average,
+)
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+class ScoringService:
+    @staticmethod
+    def score_batch(story_ids: Sequence[Optional[int]],
+                    sources: Sequence[str],
+                    published_at: Sequence[Optional[datetime]],
+                    vectors: Optional[np.ndarray] = None,
+                    now: Optional[datetime] = None) -> np.ndarray:
+        """Score a batch of stories column-wise and return an array of interesting scores.
+
+        `vectors` are the stories' embeddings (see services/embedding_service.py);
+        without them content relevance is 0.
+        """
+        count = len(sources)
+        if count == 0:
+            return np.empty(0)
+        if vectors is None:
+            vectors = np.zeros((count, EMBEDDING_DIM), dtype=np.float16)
+
+        columns = [
+            content_relevance_scores(vectors),
+            per_source_scores(sources, get_historical_engagement),
+            freshness_scores(published_at, now),
+            per_source_scores(sources, get_source_credibility),
+            podcast_engagement_scores(story_ids),
+        ]
+        return weighted_average(columns)
+
+    @staticmethod
+    def score_story_dicts(stories: List[Dict[str, Any]],
+                          vectors: Optional[np.ndarray] = None,
+                          now: Optional[datetime] = None) -> np.ndarray:
+        """Score not-yet-stored stories given as column dicts (as built at ingest).
+
+        Stories are embedded here unless their `vectors` are passed in. Callers
+        holding a session should call source_stats_cache.ensure_fresh(db) first.
+        """
+        if vectors is None:
+            vectors = embed_texts([embedding_text(story.get("title"), story.get("description"), story.get("content"))
+                                   for story in stories])
+        return ScoringService.score_batch(
+            [story.get("id") for story in stories],
+            [story.get("source") for story in stories],
+            [story.get("published_at") for story in stories],
+            vectors,
+            now=now
+        )
+
+    @staticmethod
+    def rescore_stories(db: Session,
+                        story_ids: Optional[Sequence[int]] = None,
+                        batch_size: int = DEFAULT_BATCH_SIZE,
+                        criteria=None) -> Dict[str, float]:
+        """Recompute and store scores for the given stories (all stories by default).
+
+        Walks the table in id order, scoring each batch in NumPy and writing it back
+        with StoryService.bulk_update_scores. Relevance comes from the stored
+        embeddings; stories without one (stored before embeddings existed) are
+        embedded on the way. `criteria` is an optional SQL filter on stories, used
+        by incremental runs. Returns rows scanned/updated and wall time.
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        source_stats_cache.ensure_fresh(db)
+        scanned = updated = 0
+        last_id = 0
+        while True:
+            query = db.query(Story.id, Story.source, Story.published_at, Story.interesting_score,
+                             StoryEmbedding.vector)\
+                    .outerjoin(StoryEmbedding, StoryEmbedding.story_id == Story.id)\
+                    .filter(Story.id > last_id)
+            if story_ids is not None:
+                query = query.filter(Story.id.in_(story_ids))
+            if criteria is not None:
+                query = query.filter(criteria)
+            rows = query.order_by(Story.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            ids, sources, published, current, stored = zip(*rows)
+            vectors = stored_vectors(db, ids, stored)
+            scores = ScoringService.score_batch(ids, sources, published, vectors, now=now)
+            current = np.array([np.nan if score is None else score for score in current], dtype=np.float64)
+            changed = ~np.isclose(scores, current)
+
+            scanned += len(rows)
+            updated += StoryService.bulk_update_scores(
+                db,
+                np.asarray(ids)[changed].tolist(),
+                scores[changed].tolist()
+            )
+            last_id = ids[-1]
+
+        return {
+            "scanned": scanned,
+            "updated": updated,
+            "seconds": time.perf_counter() - started,
+        }
+
+    @staticmethod
+    def rescore_incremental(db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> RescoreRun:
+        """Rescore only stories whose score can have changed since the last run, and log the run.
+
+        The watermark is the previous run's start time. Candidates are stories still inside
+        (or just leaving) the freshness window, plus stories whose metrics or whose source's
+        aggregates (engagement and credibility) were updated after the watermark. The first
+        run rescores everything.
+        """
+        started_at = datetime.utcnow()
+        last_run = db.query(RescoreRun).order_by(RescoreRun.started_at.desc()).first()
+        watermark = last_run.started_at if last_run else None
+
+        criteria = None
+        if watermark is not None:
+            window_start = watermark - timedelta(hours=FRESHNESS_WINDOW_HOURS)
+            touched = select(StoryMetrics.story_id).where(StoryMetrics.updated_at > watermark)
+            touched_sources = select(SourceStats.source).where(SourceStats.updated_at > watermark)
+            criteria = or_(Story.published_at >= window_start, Story.id.in_(touched),
+                           Story.source.in_(touched_sources))
+
+        stats = ScoringService.rescore_stories(db, batch_size=batch_size, criteria=criteria)
+        run = RescoreRun(
+            started_at=started_at,
+            watermark=watermark,
+            rows_scanned=stats["scanned"],
+            rows_updated=stats["updated"],
+            seconds=stats["seconds"]
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        print(f"Rescored stories: scanned {run.rows_scanned}, updated {run.rows_updated} in {run.seconds:.3f}s")
+        return run
+
+
+def per_source_scores(sources: Sequence[str], lookup) -> np.ndarray:
+    """Resolve a per-source factor once per distinct source and broadcast it to the batch."""
+    unique_sources, inverse = np.unique(np.asarray(sources, dtype=object).astype(str), return_inverse=True)
+    resolved = np.fromiter((lookup(source) for source in unique_sources), dtype=np.float64, count=len(unique_sources))
+    return resolved[inverse]
+
+
+def freshness_scores(published_at: Sequence[Optional[datetime]], now: Optional[datetime] = None) -> np.ndarray:
+    """Vectorized calculate_freshness_score; missing timestamps score 0."""
+    now = np.datetime64(now or datetime.utcnow(), "us")
+    timestamps = np.array(published_at, dtype="datetime64[us]")
+    hours_old = (now - timestamps) / np.timedelta64(1, "h")
+    scores = np.clip(1 - hours_old / FRESHNESS_WINDOW_HOURS, 0.0, 1.0)
+    return np.nan_to_num(scores, nan=0.0)
+
+
+def content_relevance_scores(vectors: np.ndarray) -> np.ndarray:
+    """Content relevance column for a batch of embeddings (one matrix multiply)."""
+    return relevance_scores(vectors)
+
+
+def stored_vectors(db: Session, story_ids: Sequence[int], stored: Sequence[Optional[bytes]]) -> np.ndarray:
+    """Embeddings of a batch from their stored bytes, embedding (and storing) the missing ones."""
+    vectors = np.zeros((len(stored), EMBEDDING_DIM), dtype=np.float16)
+    present = [i for i, vector in enumerate(stored) if vector is not None]
+    missing = [i for i, vector in enumerate(stored) if vector is None]
+    if present:
+        vectors[present] = unpack_vectors([stored[i] for i in present], EMBEDDING_DIM)
+    if missing:
+        vectors[missing] = EmbeddingService.embed_stories(db, [story_ids[i] for i in missing])
+    return vectors
+
+
+def podcast_engagement_scores(story_ids: Sequence[Optional[int]]) -> np.ndarray:
+    """Podcast engagement column for a batch."""
+    return np.fromiter((get_podcast_engagement(story_id) for story_id in story_ids),
+                       dtype=np.float64, count=len(story_ids))
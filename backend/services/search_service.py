@@ -0,0 +1,181 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+
+from models.story import Story
+from .story_service import LIST_COLUMNS
+
+# Text search configuration of the generated stories.search_vector column (see migrations)
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR = literal_column("stories.search_vector")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Title matches count this many times a description match, like the tsvector's A/B weights
+TITLE_WEIGHT = 2.5
+# Words too common to narrow a search, dropped from both documents and queries
+STOPWORDS = frozenset("a an and are as at be by for from has in is it its of on or that the to was were will with".split())
+DEFAULT_REBUILD_SECONDS = 3600
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """In-memory inverted index over story titles and descriptions.
+
+    Used where Postgres full-text search is unavailable (SQLite in tests and
+    local runs). Stories are loaded incrementally by id, so each search first picks
+    up rows inserted since the last one; the whole index is rebuilt every
+    `rebuild_seconds` or when used against a different database. Queries match
+    stories containing every term, ranked by TF-IDF with title terms boosted.
+    """
+
+    def __init__(self, rebuild_seconds: float = DEFAULT_REBUILD_SECONDS):
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings: Dict[str, Dict[int, float]] = {}
+            self._documents = 0
+            self._max_id = 0
+            self._bind = None
+            self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return self._documents
+
+    def pending_statement(self, bind):
+        """Query for stories not yet indexed (all of them if the index must be rebuilt)."""
+        if (self._bind is not bind
+                or self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.rebuild_seconds):
+            self.clear()
+            self._bind = bind
+            self._loaded_at = time.monotonic()
+        return select(Story.id, Story.title, Story.description)\
+               .where(Story.id > self._max_id)\
+               .order_by(Story.id)
+
+    def add_rows(self, rows: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> None:
+        with self._lock:
+            for story_id, title, description in rows:
+                if story_id <= self._max_id:
+                    # Already loaded by a concurrent search
+                    continue
+                weights = Counter()
+                for token in tokenize(title):
+                    weights[token] += TITLE_WEIGHT
+                for token in tokenize(description):
+                    weights[token] += 1
+                for token, weight in weights.items():
+                    self._postings.setdefault(token, {})[story_id] = weight
+                self._documents += 1
+                self._max_id = max(self._max_id, story_id)
+
+    def search(self, query: str, skip: int = 0, limit: int = 10) -> List[int]:
+        """Ids of stories matching every query term, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        postings = [self._postings.get(term, {}) for term in terms]
+        postings.sort(key=len)
+        if not postings[0]:
+            return []
+
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                return []
+
+        idfs = [math.log(1 + self._documents / len(posting)) for posting in postings]
+        scored = (
+            (sum(posting[story_id] * idf for posting, idf in zip(postings, idfs)), story_id)
+            for story_id in matches
+        )
+        ranked = heapq.nlargest(skip + limit, scored)
+        return [story_id for _, story_id in ranked[skip:]]
+
+
+class SearchService:
+    @staticmethod
+    def search_stories(db: Session, q: str, skip: int = 0, limit: int = 10) -> List[Story]:
+        """Stories matching a full-text query, best match first."""
+        if _full_text_available(db):
+            return db.execute(_search_statement(q, skip, limit)).scalars().all()
+
+        index = search_index
+        index.add_rows(db.execute(index.pending_statement(db.get_bind())).all())
+        ids = index.search(q, skip, limit)
+        if not ids:
+            return []
+        stories = db.execute(select(Story).options(load_only(*LIST_COLUMNS)).where(Story.id.in_(ids))).scalars().all()
+        return _in_order(stories, ids)
+
+    @staticmethod
+    async def search_stories_async(db: AsyncSession, q: str, skip: int = 0, limit: int = 10) -> List[Story]:
+        """Async variant of search_stories."""
+        if await db.run_sync(_full_text_available):
+            result = await db.execute(_search_statement(q, skip, limit))
+            return result.scalars().all()
+
+        index = search_index
+        result = await db.execute(index.pending_statement(db.bind))
+        index.add_rows(result.all())
+        ids = index.search(q, skip, limit)
+        if not ids:
+            return []
+        result = await db.execute(select(Story).options(load_only(*LIST_COLUMNS)).where(Story.id.in_(ids)))
+        return _in_order(result.scalars().all(), ids)
+
+
+# Engine -> whether stories.search_vector exists there
+_full_text_support = {}
+
+
+def _full_text_available(db: Session) -> bool:
+    """Whether the database has the migrated search_vector column (Postgres only).
+
+    Databases built with create_all (tests, local SQLite) lack it and fall back to
+    the in-memory index.
+    """
+    bind = db.get_bind()
+    if bind not in _full_text_support:
+        _full_text_support[bind] = bind.dialect.name == "postgresql" and any(
+            column["name"] == "search_vector" for column in inspect(db.connection()).get_columns("stories")
+        )
+    return _full_text_support[bind]
+
+
+def _search_statement(q: str, skip: int, limit: int):
+    """Ranked match against the GIN-indexed search_vector column (Postgres only)."""
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(SEARCH_VECTOR, query)
+    return select(Story)\
+           .options(load_only(*LIST_COLUMNS))\
+           .where(SEARCH_VECTOR.op("@@")(query))\
+           .order_by(rank.desc(), Story.id.desc())\
+           .offset(skip)\
+           .limit(limit)
+
+
+def _in_order(stories: List[Story], ids: List[int]) -> List[Story]:
+    by_id = {story.id: story for story in stories}
+    return [by_id[story_id] for story_id in ids if story_id in by_id]
+
+
+search_index = InvertedIndex(
+    rebuild_seconds=float(os.getenv("SEARCH_INDEX_REBUILD_SECONDS", DEFAULT_REBUILD_SECONDS))
+)
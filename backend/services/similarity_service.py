@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+
+from models.story import Story
+from models.story_embedding import VECTOR_DTYPE, StoryEmbedding, unpack_vectors
+from .embedding_service import EMBEDDING_DIM
+from .story_service import LIST_COLUMNS
+
+DEFAULT_TABLES = 8
+DEFAULT_BITS = 12
+DEFAULT_REBUILD_SECONDS = 3600
+# Up to this many stories, ranking all of them is as fast as probing buckets, and exact
+DEFAULT_EXACT_ROWS = 10000
+# Neighbours fetched per requested story, so dropping near-duplicates still fills the page
+OVERFETCH = 2
+
+
+class SimilarityIndex:
+    """Approximate nearest-neighbour index over story embeddings (random-hyperplane LSH).
+
+    Each vector gets `tables` hash codes of `bits` bits, one bit per side of a
+    random hyperplane; similar vectors tend to share codes. A lookup gathers
+    the stories in the query's bucket, and in the buckets one bit away, of every
+    table, then ranks those candidates by exact cosine similarity. Buckets are
+    kept as per-table sorted code arrays, searched with np.searchsorted. Indexes
+    of at most `exact_rows` stories skip the buckets and rank every story.
+
+    Like the in-memory search index, stories are loaded incrementally by id;
+    the whole index is rebuilt every `rebuild_seconds` (picking up re-embedded
+    stories) or when used against a different database.
+    """
+
+    def __init__(self,
+                 tables: int = DEFAULT_TABLES,
+                 bits: int = DEFAULT_BITS,
+                 rebuild_seconds: float = DEFAULT_REBUILD_SECONDS,
+                 exact_rows: int = DEFAULT_EXACT_ROWS,
+                 dim: int = EMBEDDING_DIM):
+        self.tables = tables
+        self.bits = bits
+        self.rebuild_seconds = rebuild_seconds
+        self.exact_rows = exact_rows
+        self.dim = dim
+        rng = np.random.default_rng(2)
+        self._planes = rng.standard_normal((dim, tables * bits)).astype(np.float32)
+        self._bit_values = 1 << np.arange(bits, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids = np.empty(0, dtype=np.int64)
+            self._vectors = np.empty((0, self.dim), dtype=VECTOR_DTYPE)
+            self._codes = np.empty((0, self.tables), dtype=np.int64)
+            self._orders: List[np.ndarray] = []
+            self._sorted_codes: List[np.ndarray] = []
+            self._max_id = 0
+            self._bind = None
+            self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def pending_statement(self, bind):
+        """Query for embeddings not yet indexed (all of them if the index must be rebuilt)."""
+        if (self._bind is not bind
+                or self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.rebuild_seconds):
+            self.clear()
+            self._bind = bind
+            self._loaded_at = time.monotonic()
+        return select(StoryEmbedding.story_id, StoryEmbedding.vector)\
+               .where(StoryEmbedding.story_id > self._max_id)\
+               .order_by(StoryEmbedding.story_id)
+
+    def hash_codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, tables) bucket codes of a batch of vectors, from one matrix multiply."""
+        sides = (np.asarray(vectors, dtype=np.float32) @ self._planes) > 0
+        return sides.reshape(len(vectors), self.tables, self.bits) @ self._bit_values
+
+    def add_rows(self, rows: Iterable[Tuple[int, bytes]]) -> None:
+        with self._lock:
+            # Rows already loaded by a concurrent lookup are skipped
+            rows = [(story_id, vector) for story_id, vector in rows if story_id > self._max_id]
+            if not rows:
+                return
+            ids = np.fromiter((story_id for story_id, _ in rows), dtype=np.int64, count=len(rows))
+            vectors = unpack_vectors([vector for _, vector in rows], self.dim)
+            self._ids = np.concatenate([self._ids, ids])
+            self._vectors = np.concatenate([self._vectors, vectors])
+            self._codes = np.concatenate([self._codes, self.hash_codes(vectors)])
+            self._orders = [np.argsort(self._codes[:, table], kind="stable") for table in range(self.tables)]
+            self._sorted_codes = [self._codes[order, table] for table, order in enumerate(self._orders)]
+            self._max_id = int(ids[-1])
+
+    def similar(self, story_id: int, limit: int = 10) -> Optional[List[Tuple[int, float]]]:
+        """(story id, cosine similarity) of the nearest indexed stories, closest first.
+
+        None if the story is not in the index (it has no embedding).
+        """
+        with self._lock:
+            ids, vectors, codes = self._ids, self._vectors, self._codes
+            orders, sorted_codes = self._orders, self._sorted_codes
+        position = int(np.searchsorted(ids, story_id))
+        if position == len(ids) or ids[position] != story_id:
+            return None
+
+        if len(ids) <= self.exact_rows:
+            candidates = np.arange(len(ids))
+        else:
+            # The query's own bucket and every bucket one bit away, in each table
+            probes = codes[position][:, None] ^ np.concatenate(([0], self._bit_values))[None, :]
+            candidates = []
+            for order, table_codes, table_probes in zip(orders, sorted_codes, probes):
+                starts = np.searchsorted(table_codes, table_probes, side="left")
+                ends = np.searchsorted(table_codes, table_probes, side="right")
+                candidates.extend(order[start:end] for start, end in zip(starts, ends) if end > start)
+            candidates = np.unique(np.concatenate(candidates))
+        candidates = candidates[candidates != position]
+        if len(candidates) == 0:
+            return []
+
+        similarities = vectors[candidates].astype(np.float32) @ vectors[position].astype(np.float32)
+        if len(candidates) > limit:
+            best = np.argpartition(-similarities, limit)[:limit]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-similarities[best], kind="stable")]
+        return [(int(ids[candidates[i]]), float(similarities[i])) for i in best]
+
+
+class SimilarityService:
+    @staticmethod
+    def similar_stories(db: Session, story_id: int, limit: int = 10) -> Optional[List[Story]]:
+        """Stories most similar to a story, closest first; None if the story has no embedding.
+
+        Near-duplicates of the story (its cluster) are left out.
+        """
+        index = similarity_index
+        index.add_rows(db.execute(index.pending_statement(db.get_bind())).all())
+        neighbours = index.similar(story_id, limit * OVERFETCH)
+        if neighbours is None:
+            return None
+        ids = [neighbour for neighbour, _ in neighbours]
+        stories = db.execute(_stories_statement(story_id, ids)).scalars().all()
+        return _without_duplicates(stories, story_id, ids, limit)
+
+    @staticmethod
+    async def similar_stories_async(db: AsyncSession, story_id: int, limit: int = 10) -> Optional[List[Story]]:
+        """Async variant of similar_stories."""
+        index = similarity_index
+        result = await db.execute(index.pending_statement(db.bind))
+        index.add_rows(result.all())
+        neighbours = index.similar(story_id, limit * OVERFETCH)
+        if neighbours is None:
+            return None
+        ids = [neighbour for neighbour, _ in neighbours]
+        result = await db.execute(_stories_statement(story_id, ids))
+        return _without_duplicates(result.scalars().all(), story_id, ids, limit)
+
+
+def _stories_statement(story_id: int, ids: List[int]):
+    return select(Story).options(load_only(*LIST_COLUMNS)).where(Story.id.in_(ids + [story_id]))
+
+
+def _without_duplicates(stories: List[Story], story_id: int, ids: List[int], limit: int) -> List[Story]:
+    """Neighbours in `ids` order, minus the ones clustered with the story itself."""
+    by_id = {story.id: story for story in stories}
+    story = by_id.pop(story_id, None)
+    cluster_id = story.cluster_id if story is not None else None
+    similar = [by_id[neighbour] for neighbour in ids
+               if neighbour in by_id and (cluster_id is None or by_id[neighbour].cluster_id != cluster_id)]
+    return similar[:limit]
+
+
+similarity_index = SimilarityIndex(
+    rebuild_seconds=float(os.getenv("SIMILARITY_INDEX_REBUILD_SECONDS", DEFAULT_REBUILD_SECONDS))
+)
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.source_stats import SourceStats
+
+STAT_COLUMNS = ("story_count", "email_opens", "link_clicks", "time_spent", "feedback_total", "feedback_count")
+
+# Scores used for sources with no engagement data yet
+DEFAULT_ENGAGEMENT = 0.6
+DEFAULT_CREDIBILITY = 0.85
+# Pseudo-observations pulling sparse sources towards the defaults
+ENGAGEMENT_PRIOR_OPENS = 20
+CREDIBILITY_PRIOR_RATINGS = 5
+FEEDBACK_SCALE = 5.0
+
+
+class SourceStatsService:
+    @staticmethod
+    def increment(db: Session, deltas: Dict[str, Dict[str, float]]) -> None:
+        """Add per-source deltas to source_stats in one upsert, inside the caller's transaction."""
+        rows = []
+        for source, delta in deltas.items():
+            if source is None or not any(delta.values()):
+                continue
+            row = {column: delta.get(column, 0) for column in STAT_COLUMNS}
+            row["source"] = source
+            rows.append(row)
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(SourceStats).values(rows)
+        updates = {column: getattr(SourceStats, column) + getattr(stmt.excluded, column)
+                   for column in STAT_COLUMNS}
+        updates["updated_at"] = datetime.utcnow()
+        stmt = stmt.on_conflict_do_update(index_elements=[SourceStats.source], set_=updates)
+        db.execute(stmt)
+        source_stats_cache.invalidate()
+
+    @staticmethod
+    def metrics_delta(old: Dict[str, float], new: Dict[str, float]) -> Dict[str, float]:
+        """Translate a change of one story's absolute metrics into source_stats deltas."""
+        old_feedback = old.get("feedback_score") or 0
+        new_feedback = new.get("feedback_score") or 0
+        return {
+            "email_opens": (new.get("email_opens") or 0) - (old.get("email_opens") or 0),
+            "link_clicks": (new.get("link_clicks") or 0) - (old.get("link_clicks") or 0),
+            "time_spent": (new.get("time_spent") or 0) - (old.get("time_spent") or 0),
+            "feedback_total": new_feedback - old_feedback,
+            "feedback_count": int(bool(new_feedback)) - int(bool(old_feedback)),
+        }
+
+
+def merge_deltas(*deltas: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Sum several {source: {column: delta}} maps."""
+    merged = defaultdict(lambda: defaultdict(float))
+    for source_deltas in deltas:
+        for source, delta in source_deltas.items():
+            for column, value in delta.items():
+                merged[source][column] += value
+    return merged
+
+
+class SourceStatsCache:
+    """In-memory (engagement, credibility) per source, reloaded from source_stats when stale."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Reload the whole (small) table if the cache is missing or expired."""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return
+        scores = {stats.source: source_scores(stats) for stats in db.query(SourceStats)}
+        with self._lock:
+            self._scores = scores
+            self._loaded_at = time.monotonic()
+
+    def engagement(self, source: str) -> float:
+        return self._scores.get(source, (DEFAULT_ENGAGEMENT, DEFAULT_CREDIBILITY))[0]
+
+    def credibility(self, source: str) -> float:
+        return self._scores.get(source, (DEFAULT_ENGAGEMENT, DEFAULT_CREDIBILITY))[1]
+
+
+def source_scores(stats: SourceStats) -> Tuple[float, float]:
+    """Smoothed click-through rate and normalized average feedback for a source."""
+    engagement = (stats.link_clicks + ENGAGEMENT_PRIOR_OPENS * DEFAULT_ENGAGEMENT) / \
+                 (stats.email_opens + ENGAGEMENT_PRIOR_OPENS)
+    credibility = (stats.feedback_total / FEEDBACK_SCALE + CREDIBILITY_PRIOR_RATINGS * DEFAULT_CREDIBILITY) / \
+                  (stats.feedback_count + CREDIBILITY_PRIOR_RATINGS)
+    return min(1.0, max(0.0, engagement)), min(1.0, max(0.0, credibility))
+
+
+source_stats_cache = SourceStatsCache(ttl_seconds=float(os.getenv("SOURCE_STATS_CACHE_TTL_SECONDS", 300)))
@@ -1,5 +1,11 @@
+import base64
+import json
 from datetime import datetime
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import Float, Integer, bindparam, case, column, insert, select, tuple_, update, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 import sys
 import os
 
@@ -7,7 +13,42 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from models.story import Story, StoryMetrics
-from typing import List, Optional
+from models.story_category import StoryCategory
+from models.story_content import CURRENT_DICTIONARY, StoryContent, compress_content
+from .cache_service import response_cache
+from .category_service import CATEGORIES, CategoryService
+from .embedding_service import embed_texts, relevance_scores
+from .source_stats_service import SourceStatsService, merge_deltas, source_stats_cache
+from .url_service import url_hash
+from typing import Any, Dict, List, Optional
+
+STORY_COLUMNS = ("title", "description", "url", "source", "interesting_score", "published_at")
+
+METRIC_COLUMNS = ("email_opens", "link_clicks", "time_spent", "feedback_score")
+INCREMENT_COLUMNS = ("email_opens", "link_clicks", "time_spent", "feedback_sum", "feedback_count")
+
+# Interesting score factors, in the order passed to weighted_average
+SCORE_FACTORS = ("content", "engagement", "freshness", "credibility", "podcast")
+FRESHNESS_WINDOW_HOURS = 72
+
+def _load_score_weights() -> List[float]:
+    """Read SCORE_WEIGHTS (e.g. "content=2,freshness=1.5"); unspecified factors weigh 1."""
+    weights = dict.fromkeys(SCORE_FACTORS, 1.0)
+    for item in filter(None, os.getenv("SCORE_WEIGHTS", "").split(",")):
+        name, _, value = item.partition("=")
+        if name.strip() not in weights:
+            raise ValueError(f"Unknown score factor in SCORE_WEIGHTS: {name}")
+        weights[name.strip()] = float(value)
+    return [weights[name] for name in SCORE_FACTORS]
+
+SCORE_WEIGHTS = _load_score_weights()
+
+# Rows per UPDATE ... FROM (VALUES ...) statement in bulk_update_scores/bulk_update_clusters
+SCORE_UPDATE_CHUNK = 10000
+
+# Columns listings load: what NewsItem renders, plus cluster_id for digests. The rest stay deferred.
+LIST_COLUMNS = (Story.id, Story.title, Story.description, Story.url, Story.source,
+                Story.interesting_score, Story.published_at, Story.created_at, Story.cluster_id)
 
 class StoryService:
     @staticmethod
@@ -18,37 +59,146 @@ class StoryService:
                     source: str,
                     interesting_score: float,
                     published_at: datetime) -> Story:
-        """Create a new story in the database."""
+        """Create a new story in the database; an undated story is dated now."""
         story = Story(
             title=title,
             description=description,
             url=url,
+            url_hash=url_hash(url),
             source=source,
             interesting_score=interesting_score,
-            published_at=published_at
+            published_at=published_at or datetime.utcnow()
         )
         db.add(story)
         db.commit()
         db.refresh(story)
+        response_cache.invalidate()
         return story
 
+    @staticmethod
+    def bulk_upsert_stories(db: Session, stories: List[Dict[str, Any]]) -> List[int]:
+        """Insert a batch of stories, skipping known URLs, with their metrics and categories in one transaction.
+
+        URLs are compared by url_hash, so tracking parameters, scheme and AMP variants
+        of a stored article are skipped too, as are stories whose URL can't be parsed. Returns the ids of the newly created
+        stories. The number of round trips is constant in the batch size.
+        """
+        # Undated stories are dated at ingest, so stories and story_categories sort alike
+        ingested_at = datetime.utcnow()
+        rows = {}
+        for story in stories:
+            key = url_hash(story.get("url"))
+            if key is not None and key not in rows:
+                rows[key] = {column: story.get(column) for column in STORY_COLUMNS}
+                rows[key]["url_hash"] = key
+                rows[key]["published_at"] = rows[key]["published_at"] or ingested_at
+        if not rows:
+            return []
+
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(Story)\
+                    .values(list(rows.values()))\
+                    .on_conflict_do_nothing()\
+                    .returning(Story.id, Story.source, Story.url_hash)
+            created = db.execute(stmt).all()
+        else:
+            # No RETURNING on this dialect: probe the batch, insert the rest, read back ids.
+            hashes = list(rows.keys())
+            existing = {key for (key,) in db.query(Story.url_hash).filter(Story.url_hash.in_(hashes))}
+            new_rows = [row for key, row in rows.items() if key not in existing]
+            created = []
+            if new_rows:
+                db.execute(insert(Story), new_rows)
+                created = db.query(Story.id, Story.source, Story.url_hash)\
+                        .filter(Story.url_hash.in_([row["url_hash"] for row in new_rows])).all()
+
+        new_ids = [story_id for story_id, _, _ in created]
+        if new_ids:
+            db.execute(insert(StoryMetrics), [{"story_id": story_id} for story_id in new_ids])
+            story_counts = {}
+            for _, source, _ in created:
+                story_counts.setdefault(source, {"story_count": 0})["story_count"] += 1
+            SourceStatsService.increment(db, story_counts)
+            CategoryService.add_categories(db, [
+                (story_id, rows[key]["title"], rows[key]["description"], rows[key]["published_at"])
+                for story_id, _, key in created
+            ])
+        db.commit()
+        if new_ids:
+            response_cache.invalidate()
+        return new_ids
+
     @staticmethod
     def get_stories(db: Session,
                    skip: int = 0,
                    limit: int = 10,
-                   min_score: float = 0.0) -> List[Story]:
-        """Get stories from the database with optional filtering."""
-        return db.query(Story)\
-                .filter(Story.interesting_score >= min_score)\
-                .order_by(Story.published_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
+                   min_score: float = 0.0,
+                   cursor: Optional[str] = None,
+                   category: Optional[str] = None) -> "StoryPage":
+        """Get stories from the database with optional filtering.
+
+        Pass the cursor of the previous page (StoryPage.cursor) to page by keyset;
+        `skip` is kept for compatibility and is ignored when a cursor is given.
+        `category` (one of category_service.CATEGORIES) limits the listing to
+        stories in that category; unknown categories raise ValueError.
+        """
+        return StoryPage(db.execute(_stories_statement(skip, limit, min_score, cursor, category)).all())
+
+    @staticmethod
+    async def get_stories_async(db: AsyncSession,
+                                skip: int = 0,
+                                limit: int = 10,
+                                min_score: float = 0.0,
+                                cursor: Optional[str] = None,
+                                category: Optional[str] = None) -> "StoryPage":
+        """Async variant of get_stories."""
+        result = await db.execute(_stories_statement(skip, limit, min_score, cursor, category))
+        return StoryPage(result.all())
+
+    @staticmethod
+    def get_cluster_representatives(db: Session, limit: int = 10, min_score: float = 0.0) -> List[Story]:
+        """Newest qualifying stories, one per near-duplicate cluster.
+
+        Pages through get_stories by cursor until `limit` clusters are seen; each
+        cluster is represented by its highest-scoring member among those pages.
+        """
+        picker = _ClusterPicker(limit)
+        cursor = None
+        while True:
+            batch = StoryService.get_stories(db, limit=picker.batch_size, min_score=min_score, cursor=cursor)
+            if picker.add(batch):
+                return picker.stories()
+            cursor = batch.cursor
+
+    @staticmethod
+    async def get_cluster_representatives_async(db: AsyncSession,
+                                                limit: int = 10,
+                                                min_score: float = 0.0) -> List[Story]:
+        """Async variant of get_cluster_representatives."""
+        picker = _ClusterPicker(limit)
+        cursor = None
+        while True:
+            batch = await StoryService.get_stories_async(db, limit=picker.batch_size, min_score=min_score, cursor=cursor)
+            if picker.add(batch):
+                return picker.stories()
+            cursor = batch.cursor
 
     @staticmethod
     def get_story_by_url(db: Session, url: str) -> Optional[Story]:
-        """Get a story by its URL to avoid duplicates."""
-        return db.query(Story).filter(Story.url == url).first()
+        """Get a story by its URL (or any canonically equal variant) to avoid duplicates."""
+        key = url_hash(url)
+        if key is None:
+            return None
+        return db.query(Story).filter(Story.url_hash == key).first()
+
+    @staticmethod
+    async def get_story_by_url_async(db: AsyncSession, url: str) -> Optional[Story]:
+        """Async variant of get_story_by_url."""
+        key = url_hash(url)
+        if key is None:
+            return None
+        result = await db.execute(select(Story).filter(Story.url_hash == key).limit(1))
+        return result.scalars().first()
 
     @staticmethod
     def update_story_score(db: Session, story_id: int, new_score: float) -> Optional[Story]:
@@ -58,13 +208,63 @@ class StoryService:
             story.interesting_score = new_score
             db.commit()
             db.refresh(story)
+            response_cache.invalidate()
         return story
 
+    @staticmethod
+    def bulk_update_scores(db: Session, story_ids: List[int], scores: List[float]) -> int:
+        """Write many interesting scores back in one UPDATE per chunk and return the row count."""
+        rows = [(int(story_id), float(score)) for story_id, score in zip(story_ids, scores)]
+        return _bulk_update_column(db, "interesting_score", Float, rows)
+
+    @staticmethod
+    def bulk_update_clusters(db: Session, story_ids: List[int], cluster_ids: List[int]) -> int:
+        """Store near-duplicate cluster ids for many stories and return the row count."""
+        rows = [(int(story_id), int(cluster_id)) for story_id, cluster_id in zip(story_ids, cluster_ids)]
+        return _bulk_update_column(db, "cluster_id", Integer, rows)
+
+    @staticmethod
+    def bulk_update_content(db: Session, story_ids: List[int], contents: List[str]) -> int:
+        """Store compressed article text for many stories in one upsert and return the row count."""
+        rows = [{
+            "story_id": int(story_id),
+            "dictionary": CURRENT_DICTIONARY,
+            "length": len(content),
+            "body": compress_content(content),
+            "updated_at": datetime.utcnow(),
+        } for story_id, content in zip(story_ids, contents)]
+        if not rows:
+            return 0
+        insert_fn = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert_fn(StoryContent).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StoryContent.story_id],
+            set_={column: getattr(stmt.excluded, column) for column in ("dictionary", "length", "body", "updated_at")}
+        )
+        db.execute(stmt)
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def get_story_content(db: Session, story_id: int) -> Optional[str]:
+        """Decompressed article text of one story, or None if none was extracted."""
+        row = db.query(StoryContent).filter(StoryContent.story_id == story_id).first()
+        return row.text if row else None
+
+    @staticmethod
+    async def get_story_content_async(db: AsyncSession, story_id: int) -> Optional[str]:
+        """Async variant of get_story_content."""
+        result = await db.execute(select(StoryContent).filter(StoryContent.story_id == story_id).limit(1))
+        row = result.scalars().first()
+        return row.text if row else None
+
     @staticmethod
     def create_story_metrics(db: Session, story_id: int) -> StoryMetrics:
         """Initialize metrics for a story."""
         metrics = StoryMetrics(story_id=story_id)
         db.add(metrics)
+        source = db.query(Story.source).filter(Story.id == story_id).scalar()
+        SourceStatsService.increment(db, {source: {"story_count": 1}})
         db.commit()
         db.refresh(metrics)
         return metrics
@@ -76,10 +276,11 @@ class StoryService:
                            link_clicks: Optional[int] = None,
                            time_spent: Optional[float] = None,
                            feedback_score: Optional[float] = None) -> Optional[StoryMetrics]:
-        """Update metrics for a story."""
+        """Update metrics for a story, keeping its source's source_stats totals in step."""
         metrics = db.query(StoryMetrics).filter(StoryMetrics.story_id == story_id).first()
         
         if metrics:
+            old = {column: getattr(metrics, column) for column in METRIC_COLUMNS}
             if email_opens is not None:
                 metrics.email_opens = email_opens
             if link_clicks is not None:
@@ -89,11 +290,73 @@ class StoryService:
             if feedback_score is not None:
                 metrics.feedback_score = feedback_score
             
+            new = {column: getattr(metrics, column) for column in METRIC_COLUMNS}
+            SourceStatsService.increment(db, {metrics.story.source: SourceStatsService.metrics_delta(old, new)})
             db.commit()
             db.refresh(metrics)
             
         return metrics
 
+    @staticmethod
+    def increment_story_metrics_bulk(db: Session, increments: Dict[int, Dict[str, float]]) -> int:
+        """Atomically add aggregated engagement to many stories' metrics in one upsert.
+
+        `increments` maps story_id to amounts for email_opens, link_clicks, time_spent,
+        feedback_sum and feedback_count; feedback is folded into the running average
+        feedback_score. Unknown story ids are dropped. Returns the number of stories updated.
+        """
+        if not increments:
+            return 0
+        sources = dict(db.query(Story.id, Story.source).filter(Story.id.in_(list(increments))).all())
+        rows = []
+        story_deltas = []
+        for story_id, amounts in increments.items():
+            if story_id not in sources:
+                continue
+            row = {column: amounts.get(column, 0) for column in INCREMENT_COLUMNS}
+            feedback_count = row["feedback_count"]
+            rows.append({
+                "story_id": story_id,
+                "email_opens": int(row["email_opens"]),
+                "link_clicks": int(row["link_clicks"]),
+                "time_spent": float(row["time_spent"]),
+                "feedback_score": row["feedback_sum"] / feedback_count if feedback_count else 0.0,
+                "feedback_count": int(feedback_count),
+            })
+            story_deltas.append({sources[story_id]: {
+                "email_opens": row["email_opens"],
+                "link_clicks": row["link_clicks"],
+                "time_spent": row["time_spent"],
+                "feedback_total": row["feedback_sum"],
+                "feedback_count": feedback_count,
+            }})
+        if not rows:
+            return 0
+
+        insert_fn = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert_fn(StoryMetrics).values(rows)
+        new_count = StoryMetrics.feedback_count + stmt.excluded.feedback_count
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StoryMetrics.story_id],
+            set_={
+                "email_opens": StoryMetrics.email_opens + stmt.excluded.email_opens,
+                "link_clicks": StoryMetrics.link_clicks + stmt.excluded.link_clicks,
+                "time_spent": StoryMetrics.time_spent + stmt.excluded.time_spent,
+                "feedback_score": case(
+                    (new_count > 0,
+                     (StoryMetrics.feedback_score * StoryMetrics.feedback_count
+                      + stmt.excluded.feedback_score * stmt.excluded.feedback_count) / new_count),
+                    else_=StoryMetrics.feedback_score
+                ),
+                "feedback_count": new_count,
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        db.execute(stmt)
+        SourceStatsService.increment(db, merge_deltas(*story_deltas))
+        db.commit()
+        return len(rows)
+
     @staticmethod
     def calculate_interesting_score(story: Story) -> float:
         """Calculate story interest score based on multiple factors."""
@@ -104,34 +367,144 @@ class StoryService:
         podcast_engagement_score = get_podcast_engagement(story.id)  # New factor
         return weighted_average([content_score, engagement_score, freshness_score, source_credibility_score, podcast_engagement_score])
 
+class StoryPage(list):
+    """One page of a story listing, with the keyset cursor of its last story.
+
+    The cursor is built from the column the listing sorts on (story_categories.published_at
+    for a category listing), so the next page starts exactly where this one ended.
+    """
+
+    def __init__(self, rows=()):
+        rows = list(rows)
+        super().__init__(story for story, _ in rows)
+        self.cursor = None
+        if rows and rows[-1][1] is not None:
+            story, published_at = rows[-1]
+            self.cursor = encode_cursor(published_at, story.id)
+
+class _ClusterPicker:
+    """Collects the best-scoring story per cluster from newest-first pages."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # Over-fetch so a page of near-duplicates rarely needs a second round trip
+        self.batch_size = max(limit * 3, 1)
+        self._best: Dict[int, Story] = {}
+
+    def add(self, batch: List[Story]) -> bool:
+        """Fold in one page; True once no more pages are needed."""
+        for story in batch:
+            key = story.cluster_id or story.id
+            current = self._best.get(key)
+            if current is None:
+                if len(self._best) < self.limit:
+                    self._best[key] = story
+            elif (story.interesting_score or 0) > (current.interesting_score or 0):
+                self._best[key] = story
+        return len(self._best) >= self.limit or len(batch) < self.batch_size
+
+    def stories(self) -> List[Story]:
+        return sorted(self._best.values(), key=lambda story: (story.published_at, story.id), reverse=True)
+
+def _bulk_update_column(db: Session, name: str, sql_type, rows: List[tuple]) -> int:
+    """Set one stories column from (id, value) rows in one UPDATE per chunk, then commit."""
+    if not rows:
+        return 0
+
+    if db.get_bind().dialect.name == "postgresql":
+        for start in range(0, len(rows), SCORE_UPDATE_CHUNK):
+            new_values = values(
+                column("id", Integer), column("value", sql_type), name="new_values"
+            ).data(rows[start:start + SCORE_UPDATE_CHUNK])
+            db.execute(
+                update(Story)
+                .where(Story.id == new_values.c.id)
+                .values({name: new_values.c.value})
+                .execution_options(synchronize_session=False)
+            )
+    else:
+        db.execute(
+            update(Story.__table__)
+            .where(Story.__table__.c.id == bindparam("b_id"))
+            .values({name: bindparam("b_value")}),
+            [{"b_id": story_id, "b_value": value} for story_id, value in rows]
+        )
+    db.commit()
+    response_cache.invalidate()
+    return len(rows)
+
+def _stories_statement(skip: int, limit: int, min_score: float, cursor: Optional[str],
+                       category: Optional[str] = None):
+    """Build the story listing query shared by the sync and async read paths.
+
+    A category listing walks ix_story_categories_category_published_at (which
+    copies published_at) and joins each entry to its story by primary key. Rows are
+    (story, sort key); StoryPage turns them into stories and the next cursor.
+    """
+    published_at_column, id_column = Story.published_at, Story.id
+    if category is not None:
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown category: {category}")
+        published_at_column, id_column = StoryCategory.published_at, StoryCategory.story_id
+    stmt = select(Story, published_at_column)\
+            .options(load_only(*LIST_COLUMNS))\
+            .filter(Story.interesting_score >= min_score)
+    if category is not None:
+        stmt = stmt.join(StoryCategory, StoryCategory.story_id == Story.id)\
+                   .filter(StoryCategory.category == category)
+    stmt = stmt.order_by(published_at_column.desc(), id_column.desc())
+    if cursor:
+        published_at, story_id = decode_cursor(cursor)
+        stmt = stmt.filter(tuple_(published_at_column, id_column) < tuple_(published_at, story_id))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def encode_cursor(published_at: datetime, story_id: int) -> str:
+    """Encode a (published_at, id) listing position as an opaque cursor."""
+    payload = json.dumps([published_at.isoformat(), story_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published_at, story_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(published_at), int(story_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 def get_podcast_engagement(story_id: int) -> float:
     """Fetch podcast engagement data for a story."""
     # Placeholder logic for fetching podcast engagement data
     # This should be replaced with actual logic to fetch data from the podcast analytics system
     return 0.8  # Example score
 
-def weighted_average(scores: List[float]) -> float:
-    """Calculate the weighted average of the given scores."""
-    # Placeholder logic for weighted average calculation
-    # This should be replaced with actual logic for weighted average
-    return sum(scores) / len(scores)
+def weighted_average(scores: List[Any], weights: Optional[List[float]] = None):
+    """Calculate the weighted average of the given scores.
+
+    Scores are in SCORE_FACTORS order and may be floats or equal-length NumPy
+    columns (one per factor), in which case an array of per-story scores is returned.
+    """
+    weights = SCORE_WEIGHTS if weights is None else weights
+    result = np.average(np.asarray(scores, dtype=np.float64), axis=0, weights=weights)
+    return float(result) if np.ndim(result) == 0 else result
 
 def analyze_content_relevance(content: str) -> float:
-    """Analyze the content relevance of a story."""
-    # Placeholder logic for content relevance analysis
-    return 0.7
+    """Relevance of a text to the business AI adoption topics (see services/embedding_service.py)."""
+    return float(relevance_scores(embed_texts([content]))[0])
 
 def get_historical_engagement(source: str) -> float:
-    """Get historical engagement for a source."""
-    # Placeholder logic for historical engagement
-    return 0.6
+    """Get historical engagement for a source from the cached source_stats aggregate."""
+    return source_stats_cache.engagement(source)
 
 def calculate_freshness_score(published_at: datetime) -> float:
-    """Calculate the freshness score of a story."""
-    # Placeholder logic for freshness score calculation
-    return 0.9
+    """Calculate the freshness score of a story (linear decay over FRESHNESS_WINDOW_HOURS)."""
+    if published_at is None:
+        return 0.0
+    hours_old = (datetime.utcnow() - published_at).total_seconds() / 3600
+    return max(0.0, min(1.0, 1 - (hours_old / FRESHNESS_WINDOW_HOURS)))
 
 def get_source_credibility(source: str) -> float:
-    """Get the credibility score of a source."""
-    # Placeholder logic for source credibility
-    return 0.85
\ No newline at end of file
+    """Get the credibility score of a source from the cached source_stats aggregate."""
+    return source_stats_cache.credibility(source)
\ No newline at end of file
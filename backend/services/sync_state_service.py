@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.sync_state import SourceSyncState
+
+STATE_FIELDS = ("watermark", "cursor", "etag", "last_modified")
+
+
+class SyncStateService:
+    @staticmethod
+    def load(db: Session, sources: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored sync state of the given sources, {source: {watermark, cursor, etag, last_modified}}."""
+        sources = list(sources)
+        if not sources:
+            return {}
+        rows = db.query(SourceSyncState).filter(SourceSyncState.source.in_(sources)).all()
+        return {row.source: {field: getattr(row, field) for field in STATE_FIELDS} for row in rows}
+
+    @staticmethod
+    def save(db: Session, states: Dict[str, Dict[str, Any]]) -> None:
+        """Upsert sources' sync state in one statement and commit."""
+        if not states:
+            return
+        now = datetime.utcnow()
+        rows = [dict({field: state.get(field) for field in STATE_FIELDS},
+                     source=source, fetched_at=now, updated_at=now)
+                for source, state in states.items()]
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(SourceSyncState).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SourceSyncState.source],
+            set_={column: getattr(stmt.excluded, column)
+                  for column in STATE_FIELDS + ("fetched_at", "updated_at")}
+        )
+        db.execute(stmt)
+        db.commit()
@@ -0,0 +1,69 @@
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "cmpid", "ncid", "ocid", "sr_share", "guccounter",
+}
+TRACKING_PREFIXES = ("utm_",)
+# Query parameters that select an AMP rendering of the same page: ?amp, ?amp=1, ?outputType=amp
+AMP_PARAMS = {"amp": None, "outputtype": "amp"}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+AMP_PATH = re.compile(r"(/amp/?$|^/amp(?=/)|\.amp$|\.amp(?=\.html$))", re.IGNORECASE)
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Normalize a URL so variants of the same article compare equal.
+
+    Lower-cases the host, drops "www." and default ports, treats http and https
+    alike, strips the fragment, tracking parameters (utm_*, fbclid, ...) and AMP
+    markers (/amp paths, ?amp=1, ?outputType=amp), sorts the remaining query and
+    removes a trailing slash. Hosts are otherwise kept as they are: an "amp."
+    subdomain can be a different site. The result identifies the article; it
+    is not meant to be fetched. Returns None for a URL that can't be parsed
+    (a bad port or an unclosed IPv6 bracket).
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    path = AMP_PATH.sub("", parts.path) or "/"
+    path = re.sub(r"/{2,}", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_noise_param(key, value)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def url_hash(url: Optional[str]) -> Optional[int]:
+    """Fixed-width dedup key: the canonical URL's 64-bit BLAKE2b digest as a signed integer.
+
+    None for a missing or malformed URL.
+    """
+    canonical = canonicalize_url(url) if url else None
+    if canonical is None:
+        return None
+    digest = hashlib.blake2b(canonical.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _is_noise_param(key: str, value: str) -> bool:
+    key = key.lower()
+    if key in AMP_PARAMS:
+        return AMP_PARAMS[key] in (None, value.lower())
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
@@ -0,0 +1,107 @@
+import pytest
+import asyncio
+import os
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from models.database import Base, get_db
+from services.cache_service import response_cache
+from services.story_service import StoryService
+
+# The async layer is exercised against SQLite through aiosqlite
+TEST_DB_PATH = "test_async.db"
+SYNC_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
+
+@pytest.fixture
+def sync_session():
+    """Create tables and a sync session for test data setup."""
+    engine = create_engine(SYNC_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    response_cache.clear()
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        os.remove(TEST_DB_PATH)
+
+@pytest.fixture
+def async_client(sync_session):
+    """Test client whose handlers receive AsyncSessions."""
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    AsyncTestingSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_async_db():
+        db = AsyncTestingSessionLocal()
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_async_db
+    try:
+        yield TestClient(app)
+    finally:
+        if previous_override:
+            app.dependency_overrides[get_db] = previous_override
+        else:
+            app.dependency_overrides.pop(get_db, None)
+
+def create_stories(db, count):
+    for i in range(count):
+        StoryService.create_story(
+            db=db,
+            title=f"Test Story {i}",
+            description=f"Description {i}",
+            url=f"https://test{i}.com",
+            source="Test Source",
+            interesting_score=0.5 + (i * 0.1),
+            published_at=datetime.utcnow() - timedelta(hours=i)
+        )
+
+def test_get_stories_async_matches_sync(sync_session):
+    """Async reads return the same stories as the sync ones."""
+    create_stories(sync_session, 5)
+
+    async def read():
+        engine = create_async_engine(ASYNC_DATABASE_URL)
+        try:
+            async with AsyncSession(engine) as db:
+                stories = await StoryService.get_stories_async(db, limit=3, min_score=0.6)
+                story = await StoryService.get_story_by_url_async(db, "https://test2.com")
+                return [s.url for s in stories], story.title
+        finally:
+            await engine.dispose()
+
+    urls, title = asyncio.run(read())
+    expected = [s.url for s in StoryService.get_stories(sync_session, limit=3, min_score=0.6)]
+    assert urls == expected
+    assert title == "Test Story 2"
+
+def test_api_reads_through_async_session(async_client, sync_session):
+    """Handlers run their queries on an AsyncSession when one is injected."""
+    create_stories(sync_session, 5)
+
+    response = async_client.get("/api/news?min_score=0.7")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+    response = async_client.get("/api/digest/generate?min_score=0.7")
+    assert response.status_code == 200
+    assert response.json()["story_count"] == 3
+
+def test_export_streams_through_async_session(async_client, sync_session):
+    """The digest export streams from an AsyncSession cursor too."""
+    create_stories(sync_session, 5)
+
+    response = async_client.get("/api/digest/export?format=ndjson&min_score=0.7")
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
@@ -0,0 +1,47 @@
+import time
+from services.cache_service import LRUCacheBackend, ResponseCache
+
+def test_lru_evicts_least_recently_used():
+    """Oldest untouched entry is evicted past max_entries."""
+    backend = LRUCacheBackend(max_entries=2, ttl_seconds=60)
+    backend.set("a", (b"a", '"a"', {}))
+    backend.set("b", (b"b", '"b"', {}))
+    backend.get("a")
+    backend.set("c", (b"c", '"c"', {}))
+
+    assert backend.get("a") is not None
+    assert backend.get("b") is None
+    assert backend.get("c") is not None
+
+def test_entries_expire_after_ttl():
+    """Entries are dropped once their TTL passes."""
+    backend = LRUCacheBackend(ttl_seconds=0.01)
+    backend.set("a", (b"a", '"a"', {}))
+    time.sleep(0.02)
+    assert backend.get("a") is None
+
+def test_invalidate_bumps_version():
+    """A version bump hides everything cached before it."""
+    cache = ResponseCache(LRUCacheBackend())
+    key, cached = cache.get("news")
+    assert cached is None
+    body, etag, headers = cache.set(key, b"[]", {"X-Next-Cursor": "abc"})
+
+    assert cache.get("news") == (key, (body, etag, headers))
+    cache.invalidate()
+    assert cache.get("news")[1] is None
+
+def test_invalidate_during_query_discards_response():
+    """A response built across an invalidate() is stored under the old version, not served."""
+    cache = ResponseCache(LRUCacheBackend())
+    key, _ = cache.get("news")
+    cache.invalidate()
+    cache.set(key, b"[stale]")
+    assert cache.get("news")[1] is None
+
+def test_etag_depends_on_body():
+    """Identical bodies share an ETag; different bodies do not."""
+    cache = ResponseCache(LRUCacheBackend(), enabled=False)
+    assert cache.set("a", b"[1]")[1] == cache.set("b", b"[1]")[1]
+    assert cache.set("a", b"[1]")[1] != cache.set("a", b"[2]")[1]
+    assert cache.get("a")[1] is None
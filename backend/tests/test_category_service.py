@@ -0,0 +1,113 @@
+import pytest
+from datetime import datetime, timedelta
+from models.story import Story
+from models.story_category import StoryCategory
+from services.category_service import CATEGORIES, CategoryService, KeywordAutomaton
+from services.ingestion_service import IngestionService
+from services.story_service import StoryService
+
+def test_automaton_matches_overlapping_phrases():
+    """Phrases are matched on whole words, including ones ending inside a longer partial match."""
+    automaton = KeywordAutomaton({"x": ["a b c"], "y": ["b c d"], "z": ["c"]})
+    assert automaton.names(automaton.match("A b c d")) == ["x", "y", "z"]
+    assert automaton.names(automaton.match("a a b c")) == ["x", "z"]
+    assert automaton.names(automaton.match("a b, d")) == []
+    assert automaton.names(automaton.match("abc cd")) == []
+    assert automaton.match(None) == 0
+
+def test_categorize():
+    assert CategoryService.categorize([
+        "Chipmaker raises $2B in Series B funding",
+        "Small businesses adopt AI assistants for customer service",
+        "Lawsuit over copyright in large language models",
+        "Football club wins championship",
+    ]) == [["funding", "hardware"], ["business", "products"], ["policy", "models"], []]
+
+def test_ingest_assigns_categories(db_session):
+    IngestionService.ingest_articles(db_session, [{
+        "source": {"id": None, "name": "Test Source"},
+        "title": title,
+        "description": None,
+        "url": f"https://example.com/{i}",
+        "publishedAt": "2026-10-18T08:00:00Z",
+    } for i, title in enumerate(["Nvidia unveils new GPU", "Weather update"])])
+    rows = db_session.query(Story.title, StoryCategory.category, StoryCategory.published_at)\
+                     .join(StoryCategory, StoryCategory.story_id == Story.id)\
+                     .order_by(StoryCategory.category).all()
+    assert [(title, category) for title, category, _ in rows] == [
+        ("Nvidia unveils new GPU", "hardware"), ("Nvidia unveils new GPU", "products")
+    ]
+    assert rows[0][2] == datetime(2026, 10, 18, 8)
+
+def test_upsert_categorizes_undated_stories_at_ingest_time(db_session):
+    """Categories are written with the stories; a story without a date is dated and filed at ingest time."""
+    before = datetime.utcnow()
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": "Nvidia unveils new GPU", "url": "https://example.com/gpu", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": None,
+    }])
+    published_at = db_session.query(Story.published_at).scalar()
+    assert before <= published_at <= datetime.utcnow()
+    rows = db_session.query(StoryCategory.category, StoryCategory.published_at)\
+                     .order_by(StoryCategory.category).all()
+    assert rows == [("hardware", published_at), ("products", published_at)]
+
+    # Stories left undated by older code are recategorized at their stored ingest time
+    db_session.query(Story).update({Story.published_at: None})
+    db_session.commit()
+    CategoryService.categorize_all(db_session)
+    created_at = db_session.query(Story.created_at).scalar()
+    assert [published_at for (published_at,) in db_session.query(StoryCategory.published_at)] == [created_at] * 2
+
+def test_category_pages_follow_the_category_date(db_session):
+    """Category cursors come from story_categories.published_at, even where it differs from the story's."""
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": f"Nvidia GPU story {i}", "url": f"https://example.com/gpu/{i}", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": None,
+    } for i in range(5)])
+    db_session.query(Story).update({Story.published_at: None})
+    db_session.commit()
+    CategoryService.categorize_all(db_session)
+
+    titles, cursor = [], None
+    for _ in range(5):
+        page = StoryService.get_stories(db_session, limit=2, category="hardware", cursor=cursor)
+        titles += [story.title for story in page]
+        cursor = page.cursor
+        if len(page) < 2:
+            break
+    assert sorted(titles) == [f"Nvidia GPU story {i}" for i in range(5)]
+
+def test_get_stories_by_category(db_session):
+    """Category listings page newest first by cursor, like the unfiltered listing."""
+    now = datetime.utcnow()
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": f"Robotics story {i}" if i % 2 else f"Other story {i}",
+        "url": f"https://example.com/{i}", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": now - timedelta(hours=i),
+    } for i in range(10)])
+    assert CategoryService.categorize_all(db_session, batch_size=3)["assigned"] == 5
+
+    first = StoryService.get_stories(db_session, limit=3, category="robotics")
+    assert [story.title for story in first] == ["Robotics story 1", "Robotics story 3", "Robotics story 5"]
+    rest = StoryService.get_stories(db_session, limit=3, category="robotics", cursor=first.cursor)
+    assert [story.title for story in rest] == ["Robotics story 7", "Robotics story 9"]
+    assert StoryService.get_stories(db_session, category="robotics", min_score=0.6) == []
+    with pytest.raises(ValueError):
+        StoryService.get_stories(db_session, category="gardening")
+
+    counts = {row["category"]: row["stories"] for row in CategoryService.get_category_counts(db_session)}
+    assert list(counts) == list(CATEGORIES)
+    assert counts["robotics"] == 5 and counts["policy"] == 0
+
+def test_categorize_all_replaces_categories(db_session):
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": "Robot startup raises funding", "url": "https://example.com/r", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": datetime.utcnow(),
+    }])
+    CategoryService.categorize_all(db_session)
+    story = db_session.query(Story).one()
+    story.title = "Robot startup"
+    db_session.commit()
+    CategoryService.categorize_all(db_session)
+    assert [category for (category,) in db_session.query(StoryCategory.category)] == ["robotics"]
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import os
+import pytest
+import shutil
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from models.story import Story
+from models.sync_state import SourceSyncState
+from services.connector_service import (FeedConnector, FetchScheduler, NewsAPIConnector, PodcastConnector,
+                                        feed_connectors, parse_feed)
+from services.ingestion_service import IngestionService
+from services.sync_state_service import SyncStateService
+
+FEEDS_DIR = Path(__file__).parent / "fixtures" / "feeds"
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture feeds, optionally slowly and with ETags, recording peak concurrency."""
+
+    delay = 0.0
+    etags = False
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    etag = None
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(cls.delay)
+            # Any /feeds/<n>/<file> path serves <file>, so one fixture can stand in for many feeds
+            self.path = "/" + self.path.rsplit("/", 1)[-1]
+            path = Path(self.directory) / self.path.lstrip("/")
+            if cls.etags and path.is_file():
+                self.etag = '"%s"' % hashlib.md5(path.read_bytes()).hexdigest()
+                if self.headers.get("If-None-Match") == self.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def end_headers(self):
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def feed_server(tmp_path):
+    """Serve a copy of tests/fixtures/feeds on a local port; yields a function building feed URLs."""
+    directory = tmp_path / "feeds"
+    shutil.copytree(FEEDS_DIR, directory)
+    handler = type("Handler", (FixtureHandler,), {"active": 0, "peak": 0, "lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=str(directory)))
+    # Timed-out clients hang up mid-response; that is expected here
+    server.handle_error = lambda request, client_address: None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def url(name, feed=0):
+        return f"http://127.0.0.1:{server.server_port}/feeds/{feed}/{name}"
+    url.handler = handler
+    url.directory = directory
+
+    try:
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class FakeNewsApiClient:
+    def __init__(self, articles):
+        self.articles = articles
+        self.calls = []
+
+    def get_everything(self, **kwargs):
+        self.calls.append(kwargs)
+        page, page_size = kwargs.get("page", 1), kwargs["page_size"]
+        return {"status": "ok", "totalResults": len(self.articles),
+                "articles": self.articles[(page - 1) * page_size:page * page_size]}
+
+def newsapi_article(i, published_at):
+    return {"source": {"id": None, "name": "Wire"}, "title": f"Wire story {i}", "description": None,
+            "url": f"https://wire.example.com/{i}", "publishedAt": published_at}
+
+def test_parse_rss():
+    """RSS items are normalized: HTML stripped, dates in UTC, guid permalinks used as links."""
+    articles = parse_feed((FEEDS_DIR / "rss.xml").read_bytes())
+    assert [article["source"]["name"] for article in articles] == ["Example AI Blog"] * 3
+    first, second, third = articles
+    assert first["description"] == "The model outperforms larger rivals on code generation."
+    assert first["publishedAt"] == "2026-10-17T12:30:00Z"
+    assert second["url"] == "https://blog.example.com/2026/10/accelerator-output"
+    assert second["description"] == "Supply of data center GPUs is expected to ease next year."
+    assert third["url"] is None
+
+def test_parse_atom():
+    articles = parse_feed((FEEDS_DIR / "atom.xml").read_bytes())
+    assert [article["title"] for article in articles] == ["Agents that plan & act in the browser",
+                                                          "Scaling laws for robotics data"]
+    assert articles[0]["url"] == "https://lab.example.org/posts/browser-agents"
+    assert articles[0]["publishedAt"] == "2026-10-17T12:15:00Z"
+    assert articles[1]["publishedAt"] == "2026-10-15T18:00:00Z"
+    assert articles[1]["description"] == "More demonstrations beat bigger models."
+
+def test_parse_podcast():
+    """Podcast episodes use the iTunes summary and fall back to the enclosure URL."""
+    (episode,) = parse_feed((FEEDS_DIR / "podcast.xml").read_bytes(), podcast=True)
+    assert episode["source"]["name"] == "The AI Adoption Podcast"
+    assert episode["url"] == "https://cdn.podcast.example.net/episodes/42.mp3"
+    assert episode["description"].startswith("We talk to three founders")
+
+def test_feed_connectors_from_file(tmp_path):
+    feeds_file = tmp_path / "feeds.txt"
+    feeds_file.write_text("# sources\nhttps://a.example.com/rss\n\npodcast https://b.example.com/feed\n")
+    connectors = feed_connectors(["https://c.example.com/atom"], feeds_file=str(feeds_file))
+    assert [repr(connector) for connector in connectors] == [
+        "feed:https://c.example.com/atom", "feed:https://a.example.com/rss", "podcast:https://b.example.com/feed"
+    ]
+
+def test_scheduler_reports_failing_sources(feed_server):
+    """A missing feed is reported without dropping the others."""
+    connectors = [FeedConnector(feed_server("rss.xml")), FeedConnector(feed_server("missing.xml")),
+                  PodcastConnector(feed_server("podcast.xml"))]
+    result = asyncio.run(FetchScheduler(connectors).fetch_all())
+    assert len(result["articles"]) == 4
+    assert list(result["errors"]) == [repr(connectors[1])]
+    assert "404" in result["errors"][repr(connectors[1])]
+
+def test_scheduler_fetches_concurrently_within_host_limit(feed_server):
+    """Slow feeds on one host are fetched in parallel, never more than the per-host limit at once."""
+    feed_server.handler.delay = 0.05
+    connectors = [FeedConnector(feed_server("atom.xml", feed=i)) for i in range(60)]
+    result = asyncio.run(FetchScheduler(connectors, per_host_limit=20).fetch_all())
+
+    assert not result["errors"]
+    assert len(result["articles"]) == 120
+    assert 1 < feed_server.handler.peak <= 20
+
+def test_scheduler_times_out_slow_sources(feed_server):
+    feed_server.handler.delay = 0.5
+    result = asyncio.run(FetchScheduler([FeedConnector(feed_server("rss.xml"))], timeout=0.1).fetch_all())
+    assert result["articles"] == []
+    assert len(result["errors"]) == 1
+
+def test_run_ingestion_merges_all_sources(db_session, feed_server):
+    """NewsAPI and feed articles land in one bulk upsert; incomplete items are skipped."""
+    newsapi = NewsAPIConnector("ai", 10, client=FakeNewsApiClient([{
+        "source": {"id": None, "name": "Wire"},
+        "title": "Open model tops coding benchmarks",
+        "description": "Wire copy.",
+        # Same article as the RSS item, minus the tracking parameter
+        "url": "https://blog.example.com/2026/10/open-model-coding",
+        "publishedAt": "2026-10-17T12:00:00Z",
+    }]))
+    connectors = [newsapi, FeedConnector(feed_server("rss.xml")), FeedConnector(feed_server("atom.xml")),
+                  PodcastConnector(feed_server("podcast.xml"))]
+
+    created = IngestionService.run_ingestion(db_session, connectors=connectors)
+    assert created == 5
+    assert {story.source for story in db_session.query(Story)} == {
+        "Wire", "Example AI Blog", "Research Lab Updates", "The AI Adoption Podcast"
+    }
+    assert IngestionService.run_ingestion(db_session, connectors=connectors) == 0
+
+def test_run_ingestion_requires_a_source(monkeypatch):
+    monkeypatch.delenv("NEWS_API_KEY", raising=False)
+    monkeypatch.delenv("INGESTION_FEEDS", raising=False)
+    monkeypatch.delenv("INGESTION_PODCAST_FEEDS", raising=False)
+    monkeypatch.delenv("INGESTION_FEEDS_FILE", raising=False)
+    with pytest.raises(ValueError):
+        IngestionService.get_connectors()
+
+def test_unchanged_feeds_short_circuit_on_304(db_session, feed_server):
+    """A second cycle sends the stored ETag / Last-Modified and downloads nothing."""
+    feed_server.handler.etags = True
+    connectors = [FeedConnector(feed_server("rss.xml")), FeedConnector(feed_server("atom.xml"))]
+    assert IngestionService.run_ingestion(db_session, connectors=connectors) == 4
+
+    states = {state.source: state for state in db_session.query(SourceSyncState)}
+    assert set(states) == {connector.key for connector in connectors}
+    assert all(state.etag and state.last_modified and state.watermark for state in states.values())
+
+    result = IngestionService.fetch_all(connectors, {key: {"etag": state.etag, "last_modified": state.last_modified}
+                                                     for key, state in states.items()})
+    assert result["not_modified"] == 2
+    assert result["bytes"] == 0
+    assert result["articles"] == []
+
+def test_changed_feed_yields_only_items_past_the_watermark(db_session, feed_server):
+    """When a feed changes, items at or before the stored watermark are not re-parsed."""
+    connector = FeedConnector(feed_server("rss.xml"))
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 2
+    watermark = db_session.query(SourceSyncState.watermark).scalar()
+    assert watermark.isoformat() == "2026-10-17T12:30:00"
+
+    path = feed_server.directory / "rss.xml"
+    path.write_text(path.read_text().replace("<item>", """<item>
+      <title>Lab releases robotics foundation model</title>
+      <link>https://blog.example.com/2026/10/robotics-model</link>
+      <pubDate>Sun, 18 Oct 2026 08:00:00 GMT</pubDate>
+    </item>
+    <item>""", 1))
+    # Last-Modified has one-second resolution
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+
+    result = IngestionService.fetch_all([connector], SyncStateService.load(db_session, [connector.key]))
+    # The undated item is kept (it cannot be placed), the two older ones are skipped
+    assert [article["title"] for article in result["articles"]] == [
+        "Lab releases robotics foundation model", "Item without a link is skipped at ingest"
+    ]
+    assert result["states"][connector.key]["watermark"].isoformat() == "2026-10-18T08:00:00"
+
+def test_newsapi_asks_only_for_new_articles(db_session):
+    """NewsAPI is queried with from= the watermark; the article at the bound is not re-ingested."""
+    client = FakeNewsApiClient([newsapi_article(1, "2026-10-17T10:00:00Z"),
+                                newsapi_article(2, "2026-10-17T12:00:00Z")])
+    connector = NewsAPIConnector("ai", 10, client=client)
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 2
+    assert "from_param" not in client.calls[0]
+
+    # NewsAPI's from= is inclusive: the newest article comes back with the new one
+    client.articles = [newsapi_article(3, "2026-10-17T13:00:00Z"), newsapi_article(2, "2026-10-17T12:00:00Z")]
+    result = IngestionService.fetch_all([connector], SyncStateService.load(db_session, [connector.key]))
+    assert client.calls[1]["from_param"] == "2026-10-17T12:00:00Z"
+    assert [article["url"] for article in result["articles"]] == ["https://wire.example.com/3"]
+
+def newer_articles(count):
+    """`count` articles after 10:00, newest first, followed by the one at 10:00 (from= is inclusive)."""
+    return ([newsapi_article(i, f"2026-10-17T{10 + i}:00:00Z") for i in range(count, 0, -1)]
+            + [newsapi_article(0, "2026-10-17T10:00:00Z")])
+
+def test_newsapi_pages_back_to_the_watermark(db_session):
+    """When more than a page is new, pages are fetched until one reaches the watermark."""
+    client = FakeNewsApiClient([newsapi_article(0, "2026-10-17T10:00:00Z")])
+    connector = NewsAPIConnector("ai", 2, client=client)
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 1
+
+    client.articles = newer_articles(5)
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 5
+    assert [call["page"] for call in client.calls[1:]] == [1, 2, 3]
+    state = SyncStateService.load(db_session, [connector.key])[connector.key]
+    assert state["watermark"].isoformat() == "2026-10-17T15:00:00"
+
+def test_newsapi_keeps_watermark_when_pages_run_out(db_session):
+    """Stopping at max_pages keeps the watermark, so the articles not reached are fetched next cycle."""
+    client = FakeNewsApiClient([newsapi_article(0, "2026-10-17T10:00:00Z")])
+    connector = NewsAPIConnector("ai", 2, client=client, max_pages=2)
+    IngestionService.run_ingestion(db_session, connectors=[connector])
+
+    client.articles = newer_articles(5)
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 4
+    state = SyncStateService.load(db_session, [connector.key])[connector.key]
+    assert state["watermark"].isoformat() == "2026-10-17T10:00:00"
+
+    connector.max_pages = 5
+    assert IngestionService.run_ingestion(db_session, connectors=[connector]) == 1
+    assert db_session.query(Story).count() == 6
+    state = SyncStateService.load(db_session, [connector.key])[connector.key]
+    assert state["watermark"].isoformat() == "2026-10-17T15:00:00"
@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta
+from models.story import Story
+from services.dedup_service import DedupService, NearDuplicateIndex, story_text
+from services.digest_service import DigestService
+from services.ingestion_service import IngestionService
+from services.story_service import StoryService
+
+WIRE_TITLE = "OpenAI unveils new reasoning model that outperforms rivals on math benchmarks"
+WIRE_DESCRIPTION = ("The company said the model, trained with reinforcement learning, "
+                    "scores higher than competing systems on graduate-level math and coding tests.")
+
+def make_article(i, title, description, hours_old=1):
+    published_at = datetime.utcnow() - timedelta(hours=hours_old)
+    return {
+        "source": {"id": None, "name": f"Source {i}"},
+        "title": title,
+        "description": description,
+        "url": f"https://example{i}.com/story",
+        "publishedAt": published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+def test_index_clusters_near_duplicates():
+    """Syndicated copies with small edits share a cluster; unrelated stories do not."""
+    index = NearDuplicateIndex()
+    assert index.add(1, story_text(WIRE_TITLE, WIRE_DESCRIPTION)) == 1
+    assert index.add(2, story_text(WIRE_TITLE + " - Reuters", WIRE_DESCRIPTION)) == 1
+    assert index.add(3, story_text(WIRE_TITLE.upper(), WIRE_DESCRIPTION.replace("said", "says"))) == 1
+    assert index.add(4, story_text("Nvidia reports record data center revenue",
+                                   "Quarterly sales beat expectations on AI chip demand.")) == 4
+    assert index.add(5, story_text("Test Story 1", None)) == 5
+    assert index.add(6, story_text("Test Story 2", None)) == 6
+    assert index.add(7, "") == 7
+    assert len(index) == 6
+
+def test_ingest_assigns_clusters_and_rebuilds(db_session):
+    """Ingest stores cluster ids; a rebuilt index keeps clustering against stored stories."""
+    index = NearDuplicateIndex()
+    IngestionService.ingest_articles(db_session, [
+        make_article(1, WIRE_TITLE, WIRE_DESCRIPTION),
+        make_article(2, WIRE_TITLE + " | TechNews", WIRE_DESCRIPTION),
+        make_article(3, "Nvidia reports record data center revenue", "Quarterly sales beat expectations."),
+    ])
+    stories = db_session.query(Story).order_by(Story.id).all()
+    assert [story.cluster_id for story in stories] == [stories[0].id, stories[0].id, stories[2].id]
+
+    index.rebuild(db_session)
+    assert len(index) == 3
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": WIRE_TITLE, "description": WIRE_DESCRIPTION + " Shares rose.",
+        "url": "https://example4.com/story", "source": "Source 4",
+        "interesting_score": 0.5, "published_at": datetime.utcnow(),
+    }])
+    new_id = db_session.query(Story.id).filter(Story.url == "https://example4.com/story").scalar()
+    assert DedupService.assign_clusters(db_session, [new_id], index) == {new_id: stories[0].id}
+
+def test_digest_picks_one_story_per_cluster(db_session):
+    """The digest shows the best-scoring member of each cluster and still fills its limit."""
+    for i, (title, score, cluster) in enumerate([
+        ("Wire story copy A", 0.75, 1),
+        ("Wire story copy B", 0.95, 1),
+        ("Wire story copy C", 0.85, 1),
+        ("Other story", 0.8, None),
+        ("Third story", 0.9, None),
+    ], 1):
+        story = StoryService.create_story(
+            db=db_session,
+            title=title,
+            description=None,
+            url=f"https://test{i}.com",
+            source="Test Source",
+            interesting_score=score,
+            published_at=datetime.utcnow() - timedelta(minutes=i)
+        )
+        story.cluster_id = cluster
+    db_session.commit()
+
+    stories = StoryService.get_cluster_representatives(db_session, limit=3, min_score=0.7)
+    assert [story.title for story in stories] == ["Wire story copy B", "Other story", "Third story"]
+
+    markdown = DigestService.generate_daily_digest(db_session, min_score=0.7, limit=3)
+    assert "Wire story copy B" in markdown
+    assert "Wire story copy A" not in markdown
+    assert "Wire story copy C" not in markdown
@@ -0,0 +1,174 @@
+import email
+import pytest
+import smtplib
+import socket
+import time
+from datetime import datetime, timedelta
+from aiosmtpd.controller import Controller
+from models.story import Story
+from models.subscriber import EmailSend
+from services import email_service
+from services.email_service import (DigestEmail, EmailService, RateLimiter, SMTPConnectionPool,
+                                    is_transient)
+from services.story_service import StoryService
+
+class SinkHandler:
+    """Collects delivered messages; refuses the first `fail_first` with a transient 451."""
+
+    def __init__(self, fail_first=0, reject=()):
+        self.messages = []
+        self.fail_first = fail_first
+        self.reject = set(reject)
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_first:
+            self.fail_first -= 1
+            return "451 Try again later"
+        self.messages.append(email.message_from_bytes(envelope.content))
+        return "250 Message accepted"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_sink():
+    """Factory starting local SMTP sinks; returns (handler, pool) and stops both afterwards."""
+    servers = []
+
+    def start(**kwargs):
+        handler = SinkHandler(**kwargs)
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        pool = SMTPConnectionPool("127.0.0.1", controller.port, size=4, timeout=5)
+        servers.append((controller, pool))
+        return handler, pool
+
+    try:
+        yield start
+    finally:
+        for controller, pool in servers:
+            pool.close()
+            controller.stop()
+
+def seed(db_session, subscribers=3):
+    for i in range(1, 4):
+        StoryService.create_story(
+            db=db_session,
+            title=f"Story {i} <b>bold</b>",
+            description=f"Description {i}",
+            url=f"https://test{i}.com",
+            source="Test Source",
+            interesting_score=0.9 - i / 100,
+            published_at=datetime.utcnow() - timedelta(hours=i)
+        )
+    EmailService.add_subscriber(db_session, "no-name@example.com")
+    for i in range(1, subscribers):
+        EmailService.add_subscriber(db_session, f"reader{i}@example.com", name=f"Reader <{i}>")
+
+def parts(message):
+    return {part.get_content_type(): part.get_payload(decode=True).decode()
+            for part in message.walk() if not part.is_multipart()}
+
+def test_send_digest_personalizes_and_logs(db_session, smtp_sink):
+    """Every subscriber gets one personalized message; sends are logged and stories marked."""
+    handler, pool = smtp_sink()
+    seed(db_session, subscribers=3)
+
+    report = EmailService.send_digest(db_session, pool, "digest@example.com", rate_per_second=0)
+    assert report["recipients"] == 3
+    assert report["sent"] == 3
+    assert report["failed"] == 0
+    assert report["sends_per_second"] > 0
+    assert pool.connections_opened <= pool.size
+
+    by_recipient = {message["To"]: message for message in handler.messages}
+    assert set(by_recipient) == {"no-name@example.com", "reader1@example.com", "reader2@example.com"}
+    body = parts(by_recipient["reader1@example.com"])
+    assert "Hi Reader <1>," in body["text/plain"]
+    assert "Hi Reader &lt;1&gt;," in body["text/html"]
+    assert "Story 1 &lt;b&gt;bold&lt;/b&gt;" in body["text/html"]
+    assert "Hi there," in parts(by_recipient["no-name@example.com"])["text/plain"]
+
+    tokens = {message["List-Unsubscribe"] for message in handler.messages}
+    assert len(tokens) == 3
+    assert all("%%" not in text for message in handler.messages for text in parts(message).values())
+
+    assert db_session.query(EmailSend).filter(EmailSend.status == "sent").count() == 3
+    assert db_session.query(Story).filter(Story.used_in_email.is_(True)).count() == 3
+
+def test_rerun_skips_subscribers_already_sent(db_session, smtp_sink):
+    """A second run only mails new subscribers."""
+    handler, pool = smtp_sink()
+    seed(db_session, subscribers=2)
+    EmailService.send_digest(db_session, pool, "digest@example.com", rate_per_second=0)
+    EmailService.add_subscriber(db_session, "late@example.com")
+
+    report = EmailService.send_digest(db_session, pool, "digest@example.com", rate_per_second=0)
+    assert report["recipients"] == 1
+    assert report["skipped"] == 2
+    assert [message["To"] for message in handler.messages[2:]] == ["late@example.com"]
+
+def test_outcomes_are_committed_as_sends_complete(db_session, smtp_sink, monkeypatch):
+    """A run that dies midway keeps the sends already logged, so a rerun does not repeat them."""
+    handler, pool = smtp_sink()
+    seed(db_session, subscribers=6)
+    upsert_sends = email_service._upsert_sends
+    batches = []
+
+    def failing_upsert(db, rows):
+        batches.append(len(rows))
+        if len(batches) == 3:
+            raise RuntimeError("database went away")
+        upsert_sends(db, rows)
+
+    monkeypatch.setattr(email_service, "SEND_LOG_BATCH_SIZE", 1)
+    monkeypatch.setattr(email_service, "_upsert_sends", failing_upsert)
+    with pytest.raises(RuntimeError):
+        EmailService.send_digest(db_session, pool, "digest@example.com", rate_per_second=0)
+    db_session.rollback()
+    assert db_session.query(EmailSend).filter(EmailSend.status == "sent").count() == 2
+    assert db_session.query(Story).filter(Story.used_in_email.is_(True)).count() == 3
+
+    monkeypatch.setattr(email_service, "_upsert_sends", upsert_sends)
+    report = EmailService.send_digest(db_session, pool, "digest@example.com", rate_per_second=0)
+    assert report["skipped"] == 2
+    assert report["recipients"] == 4
+    assert db_session.query(EmailSend).filter(EmailSend.status == "sent").count() == 6
+
+def test_transient_failures_are_retried(db_session, smtp_sink):
+    """451 replies are retried with backoff; a permanent 550 fails without retries."""
+    handler, pool = smtp_sink(fail_first=2, reject={"reader1@example.com"})
+    seed(db_session, subscribers=2)
+
+    report = EmailService.send_digest(db_session, pool, "digest@example.com",
+                                      rate_per_second=0, backoff_seconds=0.01)
+    assert report["sent"] == 1
+    assert report["failed"] == 1
+    sends = {send.subscriber_id: send for send in db_session.query(EmailSend).all()}
+    failed = [send for send in sends.values() if send.status == "failed"]
+    assert len(failed) == 1
+    assert failed[0].attempts == 1
+    assert "550" in failed[0].error
+    assert [send.attempts for send in sends.values() if send.status == "sent"] == [3]
+
+def test_is_transient():
+    assert is_transient(ConnectionResetError())
+    assert is_transient(smtplib.SMTPServerDisconnected())
+    assert is_transient(smtplib.SMTPDataError(451, b"later"))
+    assert not is_transient(smtplib.SMTPDataError(554, b"rejected"))
+
+def test_rate_limiter_bounds_throughput():
+    """After the initial burst, acquires are spaced at the configured rate."""
+    limiter = RateLimiter(rate_per_second=100, burst=1)
+    started = time.perf_counter()
+    for _ in range(21):
+        limiter.acquire()
+    assert time.perf_counter() - started >= 0.19
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from datetime import datetime
+from models.story import Story
+from models.story_embedding import StoryEmbedding, pack_vector, unpack_vectors
+from services.embedding_service import EMBEDDING_DIM, EmbeddingService, embed_texts, relevance_scores
+from services.ingestion_service import IngestionService
+from services.scoring_service import ScoringService
+from services.similarity_service import SimilarityIndex, SimilarityService, similarity_index
+from services.story_service import StoryService
+
+@pytest.fixture(autouse=True)
+def clear_similarity_index():
+    similarity_index.clear()
+
+def article(i, title, description=None):
+    return {"source": {"id": None, "name": "Test Source"}, "title": title, "description": description,
+            "url": f"https://example.com/{i}", "publishedAt": "2026-10-18T08:00:00Z"}
+
+def test_embeddings_are_unit_float16_rows():
+    vectors = embed_texts(["Small businesses adopt AI tools", "Small businesses adopt AI tools", "", None])
+    assert vectors.shape == (4, EMBEDDING_DIM)
+    assert vectors.dtype == np.float16
+    assert np.linalg.norm(vectors[0].astype(np.float32)) == pytest.approx(1.0, abs=1e-3)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert not vectors[2:].any()
+    assert np.array_equal(unpack_vectors([pack_vector(vector) for vector in vectors], EMBEDDING_DIM), vectors)
+
+def test_relevance_favours_business_adoption():
+    """Stories about companies putting AI to work outrank general AI and unrelated news."""
+    scores = relevance_scores(embed_texts([
+        "Survey: two thirds of small businesses now use AI tools for marketing and customer service",
+        "Banks see early returns from AI investments as CIOs expand budgets",
+        "Nvidia unveils next-generation GPU architecture",
+        "Football club wins championship after dramatic final",
+        "",
+    ]))
+    assert scores[0] == 1.0
+    assert scores[1] > 0.5
+    assert scores[2] < 0.5
+    assert scores[3] < 0.5
+    assert scores[4] == 0.0
+
+def test_ingest_stores_embeddings(db_session):
+    """New stories are embedded once at ingest; relevance feeds their scores."""
+    created = IngestionService.ingest_articles(db_session, [
+        article(1, "Small businesses adopt AI tools for customer service"),
+        article(2, "Football club wins championship"),
+        dict(article(3, "Same URL as the first"), url="https://example.com/1?utm_source=feed"),
+    ])
+    assert created == 2
+
+    stories = {story.title: story for story in db_session.query(Story)}
+    rows = dict(db_session.query(StoryEmbedding.story_id, StoryEmbedding.vector))
+    assert set(rows) == {story.id for story in stories.values()}
+    business = stories["Small businesses adopt AI tools for customer service"]
+    football = stories["Football club wins championship"]
+    assert np.array_equal(unpack_vectors([rows[business.id]], EMBEDDING_DIM)[0],
+                          embed_texts(["Small businesses adopt AI tools for customer service"])[0])
+    assert business.interesting_score > football.interesting_score
+
+def test_rescore_embeds_stories_without_vectors(db_session):
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": f"Enterprise AI adoption story {i}", "url": f"https://example.com/{i}", "source": "Test Source",
+        "interesting_score": 0.0, "published_at": datetime.utcnow(),
+    } for i in range(3)])
+    assert db_session.query(StoryEmbedding).count() == 0
+
+    assert ScoringService.rescore_stories(db_session)["updated"] == 3
+    assert db_session.query(StoryEmbedding).count() == 3
+    # Stored float16 vectors reproduce the scores exactly
+    assert ScoringService.rescore_stories(db_session)["updated"] == 0
+
+def test_embed_stories_uses_article_text(db_session):
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": "Quarterly update", "url": "https://example.com/q", "source": "Test Source",
+        "interesting_score": 0.0, "published_at": datetime.utcnow(),
+    }])
+    story_id = db_session.query(Story.id).scalar()
+    before = relevance_scores(EmbeddingService.embed_stories(db_session, [story_id]))[0]
+    StoryService.bulk_update_content(db_session, [story_id], [
+        "Small businesses use AI tools to cut costs and grow revenue in marketing, sales and customer service."
+    ])
+    after = relevance_scores(EmbeddingService.embed_stories(db_session, [story_id, story_id + 1]))
+    assert after[0] > before
+    assert after[1] == 0.0
+
+def test_lsh_recall_against_exact_search():
+    """The index finds most of the true nearest neighbours while ranking only a fraction of the rows."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((200, EMBEDDING_DIM))
+    vectors = centers[rng.integers(0, 200, 5000)] + 0.5 * rng.standard_normal((5000, EMBEDDING_DIM))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = SimilarityIndex(exact_rows=0)
+    index.add_rows((i + 1, pack_vector(vector)) for i, vector in enumerate(vectors))
+
+    exact = vectors.astype(np.float16).astype(np.float32)
+    hits = 0
+    for query in range(0, 5000, 50):
+        similarities = exact @ exact[query]
+        similarities[query] = -np.inf
+        expected = set(np.argsort(-similarities)[:10] + 1)
+        found = index.similar(query + 1, 10)
+        assert [score for _, score in found] == sorted((score for _, score in found), reverse=True)
+        hits += len(expected & {story_id for story_id, _ in found})
+    assert hits / 1000 > 0.9
+    assert index.similar(5001) is None
+
+def test_similar_stories_skip_near_duplicates(db_session):
+    IngestionService.ingest_articles(db_session, [
+        article(1, "Small businesses adopt AI tools for customer service and marketing"),
+        article(2, "Small businesses adopt AI tools for customer service and marketing, survey finds"),
+        article(3, "Retailers adopt AI tools for customer service"),
+        article(4, "Football club wins championship"),
+    ])
+    ids = {story.url.rsplit("/", 1)[-1]: story.id for story in db_session.query(Story)}
+    similar = SimilarityService.similar_stories(db_session, ids["1"], limit=2)
+    # Story 2 shares story 1's near-duplicate cluster
+    assert [story.url for story in similar][0] == "https://example.com/3"
+    assert "https://example.com/2" not in [story.url for story in similar]
+    assert SimilarityService.similar_stories(db_session, ids["4"] + 1) is None
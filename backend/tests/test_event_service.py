@@ -0,0 +1,187 @@
+import pytest
+import os
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+
+from main import app
+from models.source_stats import SourceStats
+from models.engagement_rollup import StoryMetricsHourly
+from models.story import StoryMetrics
+from services.event_log_service import EventLog, EventRollupService
+from services.event_service import EventBuffer, event_buffer
+from services.story_service import StoryService
+
+def create_story(db, i, with_metrics=True):
+    story = StoryService.create_story(
+        db=db,
+        title=f"Story {i}",
+        description=None,
+        url=f"https://test{i}.com",
+        source="Test Source",
+        interesting_score=0.8,
+        published_at=datetime.utcnow()
+    )
+    if with_metrics:
+        StoryService.create_story_metrics(db, story.id)
+    return story
+
+def test_buffer_aggregates_per_story():
+    """Events collapse into one set of totals per story."""
+    buffer = EventBuffer()
+    buffer.add([
+        {"story_id": 1, "type": "open"},
+        {"story_id": 1, "type": "open"},
+        {"story_id": 1, "type": "click"},
+        {"story_id": 2, "type": "time_spent", "value": 30.0},
+        {"story_id": 2, "type": "feedback", "value": 4.0},
+    ])
+
+    assert buffer.pending_count() == 2
+    assert buffer.stats()["events_accepted"] == 5
+
+def test_buffer_is_bounded():
+    """Past max_pending stories the buffer refuses new events."""
+    buffer = EventBuffer(max_pending=2)
+    assert buffer.add([{"story_id": 1, "type": "open"}, {"story_id": 2, "type": "open"}])
+    assert not buffer.add([{"story_id": 3, "type": "open"}])
+    assert buffer.pending_count() == 2
+
+def test_flush_applies_atomic_increments(db_session, session_factory):
+    """Flushing adds to existing counters, creates missing metrics rows and skips unknown stories."""
+    tracked = create_story(db_session, 1)
+    untracked = create_story(db_session, 2, with_metrics=False)
+    StoryService.update_story_metrics(db_session, tracked.id, email_opens=10, feedback_score=5.0)
+    db_session.query(StoryMetrics).filter(StoryMetrics.story_id == tracked.id).update({"feedback_count": 1})
+    db_session.commit()
+
+    buffer = EventBuffer(session_factory=session_factory)
+    buffer.add([{"story_id": tracked.id, "type": "open"} for _ in range(5)])
+    buffer.add([
+        {"story_id": tracked.id, "type": "feedback", "value": 3.0},
+        {"story_id": untracked.id, "type": "click"},
+        {"story_id": untracked.id, "type": "time_spent", "value": 12.5},
+        {"story_id": 999999, "type": "click"},
+    ])
+
+    assert buffer.flush() == 2
+    assert buffer.pending_count() == 0
+
+    db_session.expire_all()
+    metrics = db_session.query(StoryMetrics).filter(StoryMetrics.story_id == tracked.id).one()
+    assert metrics.email_opens == 15
+    assert metrics.feedback_count == 2
+    assert metrics.feedback_score == pytest.approx(4.0)
+
+    metrics = db_session.query(StoryMetrics).filter(StoryMetrics.story_id == untracked.id).one()
+    assert metrics.link_clicks == 1
+    assert metrics.time_spent == pytest.approx(12.5)
+
+    stats = db_session.query(SourceStats).filter(SourceStats.source == "Test Source").one()
+    assert stats.email_opens == 15
+    assert stats.link_clicks == 1
+
+def test_flush_appends_raw_events_to_log(tmp_path, db_session, session_factory):
+    """With an event log, flushing writes every raw event to today's segment."""
+    story = create_story(db_session, 1)
+    log = EventLog(str(tmp_path))
+    buffer = EventBuffer(session_factory=session_factory, event_log=log)
+    buffer.add([{"story_id": story.id, "type": "click"} for _ in range(3)])
+    buffer.add([{"story_id": story.id, "type": "feedback", "value": 4.0}])
+    buffer.flush()
+
+    segments = log.segments()
+    assert len(segments) == 1
+    assert segments[0].startswith(datetime.utcnow().date().isoformat())
+    records = log.read(segments[0])
+    assert len(records) == 4
+    assert list(records["story_id"]) == [story.id] * 4
+    assert records["value"][-1] == pytest.approx(4.0)
+    assert buffer.stats()["log_bytes_pending"] == 0
+
+def test_rollup_builds_hourly_aggregates_once(tmp_path, db_session):
+    """Rolling up folds each record into its story/hour exactly once, across runs."""
+    first, second = create_story(db_session, 1), create_story(db_session, 2)
+    log = EventLog(str(tmp_path))
+    now = datetime.utcnow().timestamp()
+    log.append(EventLog.encode([{"story_id": first.id, "type": "click"}] * 3, now))
+    log.append(EventLog.encode([{"story_id": first.id, "type": "click"}], now - 3600))
+    log.append(EventLog.encode([
+        {"story_id": second.id, "type": "click"},
+        {"story_id": second.id, "type": "open"},
+        {"story_id": second.id, "type": "feedback", "value": 5.0},
+    ], now))
+    # A torn write at the tail is left for the next run
+    path = os.path.join(str(tmp_path), log.segments()[0])
+    complete = EventLog.encode([{"story_id": second.id, "type": "click"}], now)
+    with open(path, "ab") as segment:
+        segment.write(complete[:5])
+
+    stats = EventRollupService.rollup(db_session, log)
+    assert stats == {"events": 7, "rows": 3, "seconds": pytest.approx(stats["seconds"])}
+    assert EventRollupService.rollup(db_session, log)["events"] == 0
+
+    with open(path, "ab") as segment:
+        segment.write(complete[5:])
+    assert EventRollupService.rollup(db_session, log)["events"] == 1
+
+    assert db_session.query(StoryMetricsHourly).count() == 3
+    second_hour = db_session.query(StoryMetricsHourly).filter(StoryMetricsHourly.story_id == second.id).one()
+    assert second_hour.link_clicks == 2
+    assert second_hour.email_opens == 1
+    assert second_hour.feedback_count == 1
+    assert second_hour.feedback_sum == pytest.approx(5.0)
+
+    assert EventRollupService.story_totals(db_session, "link_clicks", days=7) == {first.id: 4, second.id: 2}
+
+def test_rollup_skips_unknown_stories_and_advances(tmp_path, db_session):
+    """Events for a story id that doesn't exist are dropped instead of failing every run."""
+    story = create_story(db_session, 1)
+    log = EventLog(str(tmp_path))
+    log.append(EventLog.encode([
+        {"story_id": 999999, "type": "click"},
+        {"story_id": story.id, "type": "click"},
+    ]))
+
+    assert EventRollupService.rollup(db_session, log)["events"] == 2
+    assert EventRollupService.rollup(db_session, log)["events"] == 0
+    rows = db_session.query(StoryMetricsHourly).all()
+    assert [(row.story_id, row.link_clicks) for row in rows] == [(story.id, 1)]
+
+def test_prune_drops_rolled_up_days_past_retention(tmp_path, db_session):
+    """Old day directories are deleted only once every segment in them is rolled up."""
+    story = create_story(db_session, 1)
+    log = EventLog(str(tmp_path))
+    old_day = datetime.utcnow() - timedelta(days=40)
+    old_segment = log.segment_path(old_day.date())
+    os.makedirs(os.path.dirname(old_segment))
+    with open(old_segment, "wb") as segment:
+        segment.write(EventLog.encode([{"story_id": story.id, "type": "open"}], old_day.timestamp()))
+
+    assert EventRollupService.prune(db_session, log, retention_days=30) == 0
+    EventRollupService.rollup(db_session, log)
+    assert EventRollupService.prune(db_session, log, retention_days=30) == 1
+    assert log.days() == []
+    assert db_session.query(StoryMetricsHourly).count() == 1
+
+def test_events_endpoint_accepts_single_and_batch():
+    """The endpoint buffers single events and batches and rejects bad types."""
+    client = TestClient(app)
+    before = event_buffer.stats()["events_accepted"]
+
+    response = client.post("/api/events", json={"story_id": 1, "type": "open"})
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1}
+
+    response = client.post("/api/events", json=[
+        {"story_id": 1, "type": "click"},
+        {"story_id": 2, "type": "time_spent", "value": 42},
+    ])
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2}
+    assert event_buffer.stats()["events_accepted"] == before + 3
+
+    response = client.post("/api/events", json={"story_id": 1, "type": "share"})
+    assert response.status_code == 422
+
+    event_buffer._drain()
+    event_buffer._drain_records()
@@ -0,0 +1,178 @@
+import pytest
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from models.content_job import ContentJob
+from models.story import Story
+from services import extraction_service
+from services.extraction_service import ExtractionService, extract_text
+from services.ingestion_service import IngestionService
+from services.story_service import StoryService
+
+PAGES_DIR = Path(__file__).parent / "fixtures" / "pages"
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def page_server():
+    """Serve tests/fixtures/pages on a local port; yields the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(PAGES_DIR)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def queue_pages(db_session, base_url, pages):
+    articles = [{
+        "source": {"id": None, "name": "Test Source"},
+        "title": f"Story {i}",
+        "description": None,
+        "url": f"{base_url}/{page}",
+        "publishedAt": datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+    } for i, page in enumerate(pages)]
+    IngestionService.ingest_articles(db_session, articles)
+    return {story.url.rsplit("/", 1)[-1]: story.id for story in db_session.query(Story)}
+
+def test_extract_text_prefers_article():
+    text = extract_text((PAGES_DIR / "article.html").read_text())
+    assert text.split("\n\n") == [
+        "New open-source language model tops coding benchmarks",
+        "The model, released on Friday under a permissive license, outperforms larger "
+        "proprietary rivals on code generation & repair tasks.",
+        "Researchers attribute the gains to curated training data rather than scale.",
+        "Weights are available today.",
+        "A hosted API follows next month.",
+    ]
+
+def test_extract_text_fallbacks():
+    """Without <article>, <main> is used; without either, only prose-length paragraphs are kept."""
+    assert extract_text((PAGES_DIR / "main.html").read_text()).split("\n\n") == [
+        "Chipmaker doubles AI accelerator output",
+        "Supply of data center GPUs is expected to ease next year as new fabs come online.",
+        "Analysts said prices could fall by a fifth.",
+    ]
+    assert extract_text((PAGES_DIR / "plain.html").read_text()).split("\n\n") == [
+        "Robotics startups raised a record amount of venture funding in the third quarter.",
+        "Investors are betting that foundation models will make general-purpose robots practical.",
+    ]
+    assert extract_text((PAGES_DIR / "empty.html").read_text()) is None
+
+def test_ingest_queues_new_stories(db_session, page_server):
+    ids = queue_pages(db_session, page_server, ["article.html", "main.html"])
+    jobs = db_session.query(ContentJob).order_by(ContentJob.story_id).all()
+    assert [(job.story_id, job.status) for job in jobs] == [(ids["article.html"], "pending"),
+                                                            (ids["main.html"], "pending")]
+
+def test_claims_do_not_overlap(db_session, session_factory, page_server):
+    """Two workers claiming at once get disjoint batches; claimed jobs are not handed out again."""
+    queue_pages(db_session, page_server, [f"page-{i}.html" for i in range(10)])
+    other = session_factory()
+    try:
+        first = ExtractionService.claim(db_session, "worker-a", limit=4)
+        second = ExtractionService.claim(other, "worker-b", limit=4)
+        third = ExtractionService.claim(db_session, "worker-a", limit=4)
+    finally:
+        other.close()
+    ids = [story_id for story_id, _ in first + second + third]
+    assert len(first) == 4 and len(second) == 4 and len(third) == 2
+    assert len(set(ids)) == 10
+    assert ExtractionService.claim(db_session, "worker-c") == []
+
+def test_expired_leases_are_reclaimed(db_session, page_server):
+    queue_pages(db_session, page_server, ["article.html"])
+    assert len(ExtractionService.claim(db_session, "crashed", lease_seconds=-1)) == 1
+    assert len(ExtractionService.claim(db_session, "worker")) == 1
+
+def test_reclaims_count_against_max_attempts(db_session, page_server):
+    """A job whose workers keep dying is failed once its claims reach max_attempts."""
+    ids = queue_pages(db_session, page_server, ["article.html"])
+    assert len(ExtractionService.claim(db_session, "crashed", lease_seconds=-1, max_attempts=2)) == 1
+    assert len(ExtractionService.claim(db_session, "crashed", lease_seconds=-1, max_attempts=2)) == 1
+    assert ExtractionService.claim(db_session, "worker", max_attempts=2) == []
+
+    db_session.expire_all()
+    job = db_session.get(ContentJob, ids["article.html"])
+    assert (job.status, job.attempts, job.worker) == ("failed", 2, None)
+
+def test_unexpected_fetch_errors_fail_only_their_page(db_session, page_server, monkeypatch):
+    """An error fetch_pages does not know (here a bad charset) fails that job for good, not the batch."""
+    fetch_page = extraction_service._fetch_page
+
+    async def failing_fetch_page(client, url):
+        if url.endswith("bad-charset.html"):
+            raise LookupError("unknown encoding: x-bogus")
+        return await fetch_page(client, url)
+
+    monkeypatch.setattr(extraction_service, "_fetch_page", failing_fetch_page)
+    ids = queue_pages(db_session, page_server, ["article.html", "bad-charset.html"])
+    report = ExtractionService.run_batch(db_session, "worker")
+    assert (report["extracted"], report["failed"]) == (1, 1)
+
+    db_session.expire_all()
+    job = db_session.get(ContentJob, ids["bad-charset.html"])
+    assert job.status == "failed"
+    assert job.error.startswith("LookupError")
+
+def test_run_batch_extracts_in_process_pool(db_session, page_server):
+    """Pages are fetched, parsed in worker processes and written back; failures are recorded."""
+    ids = queue_pages(db_session, page_server,
+                      ["article.html", "main.html", "plain.html", "empty.html", "missing.html", "notes.txt"])
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        report = ExtractionService.run_batch(db_session, "worker", executor=executor, batch_size=10)
+    assert report["claimed"] == 6
+    assert report["extracted"] == 3
+    assert report["failed"] == 3
+
+    db_session.expire_all()
+    content = {name: db_session.get(Story, story_id).content for name, story_id in ids.items()}
+    assert content["article.html"].startswith("New open-source language model")
+    assert content["main.html"].startswith("Chipmaker doubles")
+    assert content["plain.html"].startswith("Robotics startups")
+    assert content["empty.html"] is None
+
+    jobs = {job.story_id: job for job in db_session.query(ContentJob)}
+    assert {name: jobs[story_id].status for name, story_id in ids.items()} == {
+        "article.html": "done", "main.html": "done", "plain.html": "done",
+        "empty.html": "failed", "missing.html": "failed", "notes.txt": "failed",
+    }
+    assert jobs[ids["missing.html"]].error == "HTTP 404"
+    assert ExtractionService.run_batch(db_session, "worker")["claimed"] == 0
+
+def test_transient_failures_are_retried_later(db_session):
+    """Unreachable pages go back to the queue with a delay until attempts run out."""
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": "Unreachable", "url": "http://127.0.0.1:9/story", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": datetime.utcnow(),
+    }])
+    story_id = db_session.query(Story.id).scalar()
+    ExtractionService.enqueue(db_session, [story_id])
+
+    report = ExtractionService.run_batch(db_session, "worker", max_attempts=2, timeout=2)
+    assert report["failed"] == 1
+    job = db_session.query(ContentJob).one()
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert job.lease_until > datetime.utcnow()
+
+    job.lease_until = None
+    db_session.commit()
+    ExtractionService.run_batch(db_session, "worker", max_attempts=2, timeout=2)
+    db_session.expire_all()
+    job = db_session.query(ContentJob).one()
+    assert (job.status, job.attempts) == ("failed", 2)
+
+def test_enqueue_missing(db_session):
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": f"Old story {i}", "url": f"https://example.com/{i}", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": datetime.utcnow(),
+    } for i in range(3)])
+    assert ExtractionService.enqueue_missing(db_session) == 3
+    assert ExtractionService.enqueue_missing(db_session) == 0
@@ -0,0 +1,129 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models.story import Story, StoryMetrics
+from services.ingestion_service import IngestionService, run_ingestion_loop, article_to_story
+from services.story_service import StoryService
+
+class FakeNewsApiClient:
+    """Local stand-in for NewsApiClient that serves canned articles."""
+
+    def __init__(self, articles):
+        self.articles = articles
+        self.calls = []
+
+    def get_everything(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"status": "ok", "totalResults": len(self.articles), "articles": self.articles}
+
+def make_article(i, hours_old=1):
+    published_at = datetime.utcnow() - timedelta(hours=hours_old)
+    return {
+        "source": {"id": None, "name": f"Source {i}"},
+        "title": f"Article {i}",
+        "description": f"Description {i}",
+        "url": f"https://example.com/article-{i}",
+        "publishedAt": published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+def test_run_ingestion_stores_articles(db_session):
+    """Articles from the client are stored with metrics."""
+    client = FakeNewsApiClient([make_article(i) for i in range(3)])
+
+    created = IngestionService.run_ingestion(db_session, client=client, page_size=3)
+
+    assert created == 3
+    assert db_session.query(Story).count() == 3
+    assert all(0 < story.interesting_score <= 1 for story in db_session.query(Story))
+    assert db_session.query(StoryMetrics).count() == 3
+    assert client.calls[0]["page_size"] == 3
+
+def test_run_ingestion_skips_duplicates_and_incomplete(db_session):
+    """Re-ingesting the same page creates nothing; articles without url/title are skipped."""
+    articles = [make_article(i) for i in range(2)]
+    articles.append({"title": None, "url": None, "source": {"name": "Broken"}})
+    client = FakeNewsApiClient(articles)
+
+    assert IngestionService.run_ingestion(db_session, client=client) == 2
+    assert IngestionService.run_ingestion(db_session, client=client) == 0
+    assert db_session.query(Story).count() == 2
+
+def test_bulk_upsert_stories(db_session):
+    """Bulk upsert skips stored and in-batch duplicate URLs and creates metrics for new stories."""
+    first_ids = StoryService.bulk_upsert_stories(db_session, [article_to_story(make_article(0))])
+
+    batch = [article_to_story(make_article(i)) for i in range(3)]
+    batch.append(article_to_story(make_article(1)))
+    new_ids = StoryService.bulk_upsert_stories(db_session, batch)
+
+    assert len(first_ids) == 1
+    assert len(new_ids) == 2
+    assert first_ids[0] not in new_ids
+    assert db_session.query(Story).count() == 3
+    assert {m.story_id for m in db_session.query(StoryMetrics)} == set(first_ids + new_ids)
+
+def test_bulk_upsert_skips_url_variants(db_session):
+    """Tracking-parameter and AMP variants of a stored URL are duplicates, within and across batches."""
+    first = article_to_story(make_article(1))
+    variant = dict(article_to_story(make_article(2)), url=first["url"] + "?utm_source=newsletter")
+    assert len(StoryService.bulk_upsert_stories(db_session, [first, variant])) == 1
+
+    amp = dict(article_to_story(make_article(3)), url=first["url"].replace("https://", "http://www.") + "/amp")
+    assert StoryService.bulk_upsert_stories(db_session, [amp]) == []
+    assert db_session.query(Story).count() == 1
+    assert StoryService.get_story_by_url(db_session, amp["url"]).url == first["url"]
+
+def test_bulk_upsert_skips_malformed_urls(db_session):
+    """A URL that can't be parsed skips that article, not the whole batch."""
+    batch = [article_to_story(make_article(i)) for i in range(3)]
+    batch.append(dict(article_to_story(make_article(3)), url="http://bad.com:abc/x"))
+
+    assert len(StoryService.bulk_upsert_stories(db_session, batch)) == 3
+    assert db_session.query(Story).count() == 3
+    assert StoryService.get_story_by_url(db_session, "http://bad.com:abc/x") is None
+
+def test_bulk_upsert_round_trips_are_constant(db_session):
+    """Ingesting 100 articles costs a fixed number of statements, not one per article."""
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        batch = [article_to_story(make_article(i)) for i in range(100)]
+        assert len(StoryService.bulk_upsert_stories(db_session, batch)) == 100
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) <= 5
+
+def test_ingestion_loop_runs_in_background(session_factory):
+    """The asyncio loop ingests on its own session without blocking."""
+    client = FakeNewsApiClient([make_article(0)])
+
+    def stored_count():
+        db = session_factory()
+        try:
+            return db.query(Story).count()
+        finally:
+            db.close()
+
+    async def run_briefly():
+        task = asyncio.create_task(run_ingestion_loop(
+            interval_seconds=60,
+            client=client,
+            session_factory=session_factory
+        ))
+        for _ in range(500):
+            if stored_count():
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run_briefly())
+
+    assert stored_count() == 1
+    assert len(client.calls) == 1
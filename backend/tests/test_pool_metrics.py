@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+
+from main import app
+from models.pool_metrics import InstrumentedQueuePool, PoolMetrics, instrument_engine
+
+@pytest.fixture
+def engine(tmp_path):
+    """Small instrumented pool so exhaustion is easy to trigger."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    instrument_engine(engine, PoolMetrics("test"))
+    yield engine
+    engine.dispose()
+
+def test_checkout_and_in_use_counts(engine):
+    """Checkouts are counted and in-use reflects held connections."""
+    metrics = engine.pool.metrics
+    with engine.connect():
+        assert metrics.snapshot()["in_use"] == 1
+    stats = metrics.snapshot()
+    assert stats["checkouts"] == 1
+    assert stats["in_use"] == 0
+    assert stats["pool_size"] == 1
+
+def test_timeouts_are_counted(engine):
+    """Pool exhaustion is recorded as a timeout."""
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert engine.pool.metrics.snapshot()["timeouts"] == 1
+
+def test_metrics_survive_dispose(engine):
+    """Recreated pools keep reporting into the same metrics."""
+    metrics = engine.pool.metrics
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert engine.pool.metrics is metrics
+    assert metrics.snapshot()["checkouts"] == 1
+
+def test_session_hooks():
+    """Session hold times are forwarded to registered hooks."""
+    metrics = PoolMetrics("test")
+    durations = []
+    metrics.add_session_hook(durations.append)
+    metrics.record_session(0.25)
+    assert durations == [0.25]
+    assert metrics.snapshot()["avg_session_ms"] == pytest.approx(250)
+
+def test_metrics_endpoint():
+    """The metrics endpoint exposes pool settings and counters."""
+    response = TestClient(app).get("/api/metrics")
+    assert response.status_code == 200
+    pools = response.json()["pools"]
+    assert "pid" in pools
+    assert pools["settings"]["pool_size"] >= 1
+    assert "checkouts" in pools["database"]
+    assert "in_use" in pools["database"]
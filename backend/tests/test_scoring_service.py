@@ -0,0 +1,121 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from models.rescore_run import RescoreRun
+from models.story import Story, StoryMetrics
+from services.scoring_service import ScoringService, freshness_scores, per_source_scores
+from services.source_stats_service import SourceStatsService
+from services.story_service import StoryService, calculate_freshness_score, weighted_average
+
+def test_freshness_scores_match_scalar():
+    """Vectorized freshness matches calculate_freshness_score, with None scoring 0."""
+    now = datetime.utcnow()
+    published = [now, now - timedelta(hours=36), now - timedelta(hours=100), None]
+
+    scores = freshness_scores(published, now=now)
+
+    assert scores == pytest.approx([1.0, 0.5, 0.0, 0.0])
+    assert scores[1] == pytest.approx(calculate_freshness_score(published[1]), abs=1e-3)
+
+def test_per_source_lookup_once_per_source():
+    """Per-source factors are resolved once per distinct source in the batch."""
+    calls = []
+
+    def lookup(source):
+        calls.append(source)
+        return {"A": 0.1, "B": 0.9}[source]
+
+    scores = per_source_scores(["A", "B", "A", "A", "B"], lookup)
+
+    assert sorted(calls) == ["A", "B"]
+    assert scores.tolist() == [0.1, 0.9, 0.1, 0.1, 0.9]
+
+def test_weighted_average_columns_and_weights():
+    """Weighted average works on scalars and on factor columns."""
+    assert weighted_average([1.0, 0.0], weights=[3, 1]) == pytest.approx(0.75)
+
+    columns = [np.array([1.0, 0.0]), np.array([0.0, 1.0])]
+    assert weighted_average(columns, weights=[1, 3]).tolist() == pytest.approx([0.25, 0.75])
+
+def test_score_batch_matches_per_story_pipeline():
+    """Batch scores equal calculate_interesting_score for each story."""
+    now = datetime.utcnow()
+    stories = [
+        Story(id=i, source=f"Source {i % 2}", published_at=now - timedelta(hours=i * 10))
+        for i in range(1, 5)
+    ]
+
+    with patch("services.story_service.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = now
+        expected = [StoryService.calculate_interesting_score(story) for story in stories]
+
+    scores = ScoringService.score_batch(
+        [s.id for s in stories],
+        [s.source for s in stories],
+        [s.published_at for s in stories],
+        now=now
+    )
+    assert scores.tolist() == pytest.approx(expected)
+
+def test_rescore_stories_bulk_updates(db_session):
+    """Rescoring writes new scores for every story whose score changed."""
+    now = datetime.utcnow()
+    for i in range(5):
+        StoryService.create_story(
+            db=db_session,
+            title=f"Story {i}",
+            description=None,
+            url=f"https://test{i}.com",
+            source="Test Source",
+            interesting_score=0.0,
+            published_at=now - timedelta(hours=i * 20)
+        )
+
+    stats = ScoringService.rescore_stories(db_session, batch_size=2)
+
+    assert stats["scanned"] == 5
+    assert stats["updated"] == 5
+    db_session.expire_all()
+    scores = [s.interesting_score for s in db_session.query(Story).order_by(Story.id)]
+    assert scores == sorted(scores, reverse=True)
+    assert all(score > 0 for score in scores)
+
+    # Nothing changed, nothing written
+    assert ScoringService.rescore_stories(db_session)["updated"] == 0
+
+def test_rescore_incremental_uses_watermark(db_session):
+    """After the first run, only stories in the decay window or with new metrics or source stats are scanned."""
+    now = datetime.utcnow()
+    ages = [1, 10, 200, 300]  # hours; the last two are past the 72h window
+    stories = [
+        StoryService.create_story(
+            db=db_session,
+            title=f"Story {i}",
+            description=None,
+            url=f"https://test{i}.com",
+            source=f"Source {i}",
+            interesting_score=0.0,
+            published_at=now - timedelta(hours=hours)
+        ) for i, hours in enumerate(ages)
+    ]
+    for story in stories:
+        StoryService.create_story_metrics(db_session, story.id)
+
+    first = ScoringService.rescore_incremental(db_session)
+    assert first.watermark is None
+    assert first.rows_scanned == 4
+
+    # Metrics change on an old story after the watermark
+    StoryService.update_story_metrics(db_session, stories[3].id, link_clicks=5)
+
+    second = ScoringService.rescore_incremental(db_session)
+    assert second.watermark == first.started_at
+    assert second.rows_scanned == 3  # two fresh stories + the one with new metrics
+    assert db_session.query(RescoreRun).count() == 2
+
+    # Another old story's source aggregates change after the new watermark
+    SourceStatsService.increment(db_session, {"Source 2": {"link_clicks": 3}})
+    db_session.commit()
+    third = ScoringService.rescore_incremental(db_session)
+    assert third.rows_scanned == 3  # two fresh stories + the one whose source changed
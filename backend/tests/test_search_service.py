@@ -0,0 +1,31 @@
+from services.search_service import InvertedIndex, tokenize
+
+def build_index(rows):
+    index = InvertedIndex()
+    index.pending_statement(bind=None)
+    index.add_rows(rows)
+    return index
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("The State of AI, in 2026!") == ["state", "ai", "2026"]
+    assert tokenize(None) == []
+
+def test_search_requires_all_terms_and_ranks_title_matches():
+    """Every term must match; a term in the title outranks one in the description."""
+    index = build_index([
+        (1, "Robots in warehouses", "Logistics companies deploy robotics."),
+        (2, "Logistics update", "Warehouses hire more robots."),
+        (3, "Robots learn to cook", None),
+    ])
+    assert index.search("robots warehouses") == [1, 2]
+    assert index.search("robots") == [3, 1, 2]  # ties: newest first, as on Postgres
+    assert index.search("robots", skip=1, limit=1) == [1]
+    assert index.search("robots submarines") == []
+    assert index.search("the of") == []
+
+def test_incremental_loading_skips_known_rows():
+    """Rows at or below the highest indexed id are not indexed twice."""
+    index = build_index([(1, "alpha", None), (2, "beta", None)])
+    index.add_rows([(2, "beta", None), (3, "gamma beta", None)])
+    assert len(index) == 3
+    assert index.search("beta") == [3, 2]
@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime
+from models.source_stats import SourceStats
+from services.source_stats_service import (
+    DEFAULT_CREDIBILITY,
+    DEFAULT_ENGAGEMENT,
+    source_scores,
+    source_stats_cache,
+)
+from services.story_service import StoryService, get_historical_engagement, get_source_credibility
+
+@pytest.fixture(autouse=True)
+def clear_source_stats_cache():
+    source_stats_cache.invalidate()
+    yield
+    source_stats_cache.invalidate()
+
+def create_story(db, i, source):
+    story = StoryService.create_story(
+        db=db,
+        title=f"Story {i}",
+        description=None,
+        url=f"https://test{i}.com",
+        source=source,
+        interesting_score=0.8,
+        published_at=datetime.utcnow()
+    )
+    StoryService.create_story_metrics(db, story.id)
+    return story
+
+def test_metrics_updates_maintain_source_totals(db_session):
+    """Absolute metric updates are folded into per-source totals as deltas."""
+    first = create_story(db_session, 1, "Wire")
+    second = create_story(db_session, 2, "Wire")
+    create_story(db_session, 3, "Blog")
+
+    StoryService.update_story_metrics(db_session, first.id, email_opens=10, link_clicks=4, feedback_score=4.0)
+    StoryService.update_story_metrics(db_session, second.id, email_opens=5, link_clicks=1)
+    StoryService.update_story_metrics(db_session, first.id, email_opens=12)
+
+    wire = db_session.query(SourceStats).filter(SourceStats.source == "Wire").one()
+    assert wire.story_count == 2
+    assert wire.email_opens == 17
+    assert wire.link_clicks == 5
+    assert wire.feedback_total == pytest.approx(4.0)
+    assert wire.feedback_count == 1
+
+    blog = db_session.query(SourceStats).filter(SourceStats.source == "Blog").one()
+    assert blog.story_count == 1
+    assert blog.email_opens == 0
+
+def test_bulk_upsert_counts_stories_per_source(db_session):
+    """Bulk ingestion bumps story_count per source."""
+    StoryService.bulk_upsert_stories(db_session, [
+        {"title": f"Story {i}", "url": f"https://bulk{i}.com", "source": "Wire",
+         "interesting_score": 0.8, "published_at": datetime.utcnow()}
+        for i in range(3)
+    ])
+    assert db_session.query(SourceStats).filter(SourceStats.source == "Wire").one().story_count == 3
+
+def test_scoring_lookups_use_cache(db_session):
+    """Scoring reads engagement/credibility from the in-memory cache."""
+    story = create_story(db_session, 1, "Wire")
+    StoryService.update_story_metrics(db_session, story.id, email_opens=100, link_clicks=90)
+
+    source_stats_cache.ensure_fresh(db_session)
+
+    assert get_historical_engagement("Wire") > DEFAULT_ENGAGEMENT
+    assert get_historical_engagement("Unknown") == DEFAULT_ENGAGEMENT
+    assert get_source_credibility("Unknown") == DEFAULT_CREDIBILITY
+
+def test_source_scores_smoothing():
+    """Sparse sources stay near the defaults; well-observed ones follow their data."""
+    sparse = SourceStats(source="a", email_opens=1, link_clicks=1, feedback_total=0, feedback_count=0)
+    busy = SourceStats(source="b", email_opens=10000, link_clicks=1000, feedback_total=5000, feedback_count=1000)
+
+    sparse_engagement, sparse_credibility = source_scores(sparse)
+    busy_engagement, busy_credibility = source_scores(busy)
+
+    assert sparse_engagement == pytest.approx(DEFAULT_ENGAGEMENT, abs=0.05)
+    assert sparse_credibility == pytest.approx(DEFAULT_CREDIBILITY)
+    assert busy_engagement == pytest.approx(0.1, abs=0.01)
+    assert busy_credibility == pytest.approx(1.0, abs=0.01)
@@ -0,0 +1,56 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from models.story import Story
+from models.story_content import StoryContent, compress_content, decompress_content
+from services.story_service import StoryService
+
+ARTICLE = ("The startup, founded in 2023, said in a statement on Monday that enterprise customers "
+           "are moving from pilots to production. Analysts said the deal is one of the largest in "
+           "the industry this year, and the company said revenue growth would continue.")
+
+def add_story(db_session, i=0):
+    StoryService.bulk_upsert_stories(db_session, [{
+        "title": f"Story {i}", "url": f"https://example.com/{i}", "source": "Test Source",
+        "interesting_score": 0.5, "published_at": datetime.utcnow(),
+    }])
+    return db_session.query(Story.id).filter(Story.url == f"https://example.com/{i}").scalar()
+
+def test_compression_round_trip():
+    """The preset dictionary makes short article text smaller than plain zlib."""
+    body = compress_content(ARTICLE)
+    assert decompress_content(body, 1) == ARTICLE
+    assert decompress_content(compress_content(ARTICLE, 0), 0) == ARTICLE
+    assert len(body) < len(compress_content(ARTICLE, 0)) < len(ARTICLE.encode())
+
+def test_content_is_stored_compressed(db_session):
+    story_id = add_story(db_session)
+    assert StoryService.bulk_update_content(db_session, [story_id], [ARTICLE]) == 1
+    row = db_session.query(StoryContent).one()
+    assert row.length == len(ARTICLE)
+    assert row.body != ARTICLE.encode()
+    assert StoryService.get_story_content(db_session, story_id) == ARTICLE
+
+    # Re-extraction replaces the text
+    StoryService.bulk_update_content(db_session, [story_id], ["Shorter."])
+    db_session.expire_all()
+    assert db_session.get(Story, story_id).content == "Shorter."
+    assert StoryService.get_story_content(db_session, story_id + 1) is None
+
+def test_listings_do_not_read_content(db_session):
+    """Listing queries neither select nor lazy-load the content table."""
+    story_id = add_story(db_session)
+    StoryService.bulk_update_content(db_session, [story_id], [ARTICLE])
+    db_session.expire_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        stories = StoryService.get_stories(db_session)
+        assert [story.title for story in stories] == ["Story 0"]
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements
+    assert not any("story_content" in statement or "content" in statement.split("FROM")[0]
+                   for statement in statements)
@@ -0,0 +1,44 @@
+import pytest
+from services.url_service import canonicalize_url, url_hash
+
+@pytest.mark.parametrize("variant", [
+    "https://example.com/ai/story",
+    "http://example.com/ai/story",
+    "https://www.Example.com/ai/story/",
+    "https://example.com/ai/story?utm_source=twitter&utm_medium=social",
+    "https://example.com/ai/story?fbclid=abc#comments",
+    "https://example.com:443/ai/story",
+    "https://example.com/ai/story/amp/",
+    "https://example.com/amp/ai/story",
+    "https://example.com/ai/story?amp=1",
+    "https://example.com/ai/story?outputType=amp",
+])
+def test_variants_share_canonical_form(variant):
+    """Tracking params, scheme, www, trailing slash and AMP variants collapse together."""
+    assert canonicalize_url(variant) == "https://example.com/ai/story"
+    assert url_hash(variant) == url_hash("https://example.com/ai/story")
+
+def test_meaningful_differences_are_kept():
+    """Other query parameters (in any order), paths and ports still distinguish URLs."""
+    assert canonicalize_url("https://example.com/story?id=2&page=1") == \
+        canonicalize_url("https://example.com/story?page=1&id=2")
+    assert url_hash("https://example.com/story?id=1") != url_hash("https://example.com/story?id=2")
+    assert url_hash("https://example.com/Story") != url_hash("https://example.com/story")
+    assert url_hash("https://example.com:8080/story") != url_hash("https://example.com/story")
+    # amp. is an ordinary subdomain, and outputType only marks AMP with the value "amp"
+    assert canonicalize_url("https://amp.dev/about") == "https://amp.dev/about"
+    assert url_hash("https://amp.example.co.uk/story") != url_hash("https://example.co.uk/story")
+    assert url_hash("https://example.com/story?outputType=json") != url_hash("https://example.com/story")
+
+def test_hash_is_fixed_width():
+    """Hashes are signed 64-bit integers; missing URLs have no hash."""
+    key = url_hash("https://example.com/" + "a" * 5000)
+    assert -2 ** 63 <= key < 2 ** 63
+    assert url_hash(None) is None
+    assert url_hash("") is None
+
+@pytest.mark.parametrize("url", ["http://bad.com:abc/x", "http://[::1/story", "https://example.com:99999/story"])
+def test_malformed_urls_have_no_key(url):
+    """URLs urllib can't parse give no canonical form instead of raising."""
+    assert canonicalize_url(url) is None
+    assert url_hash(url) is None